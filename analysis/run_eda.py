@@ -1,6 +1,11 @@
+"""Exploratory tables and figures for the clean datasets.
+
+Run ``python analysis/run_eda.py`` (or ``python -m analysis.run_eda``) from the repo root.
+"""
 from __future__ import annotations
 
 import math
+import sys
 from pathlib import Path
 
 import matplotlib.pyplot as plt
@@ -11,8 +16,17 @@ try:
 except ImportError:  # pragma: no cover - fallback styling
     sns = None  # type: ignore[assignment]
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    # Run as a script, only analysis/ is on the path; the shared loaders live in utils/.
+    sys.path.insert(0, str(REPO_ROOT))
+
+from utils.columnar import read_table  # noqa: E402
+
 DATA_WEATHER = Path("dataset/clean/weather_history.csv")
 DATA_HEAT = Path("dataset/clean/weather_heat_index.csv")
+DATA_WEATHER_PARQUET = Path("dataset/clean/weather_history.parquet")
+DATA_HEAT_PARQUET = Path("dataset/clean/weather_heat_index.parquet")
 TABLE_DIR = Path("analysis/tables")
 FIG_DIR = Path("analysis/figures")
 FIG_DPI = 200
@@ -34,8 +48,8 @@ def _load_dataset() -> pd.DataFrame:
         raise FileNotFoundError(
             "Cleaned datasets missing. Run ETL scripts before executing run_eda.py."
         )
-    weather = pd.read_csv(DATA_WEATHER, parse_dates=["date"])
-    heat = pd.read_csv(DATA_HEAT, parse_dates=["date"])
+    weather = read_table(DATA_WEATHER, DATA_WEATHER_PARQUET)
+    heat = read_table(DATA_HEAT, DATA_HEAT_PARQUET)
     merged = weather.merge(heat, on=["city", "date"], how="inner", validate="one_to_one")
     merged.sort_values(["city", "date"], inplace=True)
     merged.reset_index(drop=True, inplace=True)
@@ -1,25 +1,50 @@
 """Compute daily heat index values from cleaned weather history data."""
 from __future__ import annotations
 
-import csv
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
 
 from constants.files import HEAT_INDEX_LOG_FILENAME
 from constants.path import (
     LOGS_DIR,
     WEATHER_HEAT_INDEX_FILE,
+    WEATHER_HEAT_INDEX_PARQUET_FILE,
+    WEATHER_HEAT_INDEX_PARTITIONS_DIR,
     WEATHER_HISTORY_FILE,
+    WEATHER_HISTORY_PARQUET_FILE,
     ensure_dirs,
 )
-from constants.weather import HEAT_INDEX_TEMPERATURE_COLUMNS, HUMIDITY_AVG_COLUMN
-from utils.heat_index import compute_heat_index_f
+from constants.weather import (
+    HEAT_INDEX_TEMPERATURE_COLUMNS,
+    HUMIDITY_AVG_COLUMN,
+    WEATHER_CITY_COLUMN,
+    WEATHER_CITY_RAW_COLUMN,
+    WEATHER_DATE_COLUMN,
+    WEATHER_DATE_RAW_COLUMN,
+)
+from utils.atomic import atomic_path
+from utils.columnar import columnar_is_current, read_columnar, write_columnar
+from utils.heat_index import compute_heat_index_f_array
 from utils.logger import get_logger
+from utils.partition import drop_city_partitions, mark_partition_source, write_partitions
 
+HEAT_INDEX_OUTPUT_HEADER: List[str] = [WEATHER_CITY_COLUMN, WEATHER_DATE_COLUMN, "heat_index"]
 
-def _parse_float(value: Optional[str]) -> Optional[float]:
-    if value is None:
-        return None
+_KEY_COLUMNS: Sequence[str] = (
+    WEATHER_CITY_COLUMN,
+    WEATHER_CITY_RAW_COLUMN,
+    WEATHER_DATE_COLUMN,
+    WEATHER_DATE_RAW_COLUMN,
+)
+_VALUE_COLUMNS: Sequence[str] = (*HEAT_INDEX_TEMPERATURE_COLUMNS, HUMIDITY_AVG_COLUMN)
+# Per value column, whether the cell held a number (a literal ``nan`` does; blanks and text don't).
+_PRESENT_PREFIX = "_present_"
+
+
+def _parse_float(value: str) -> Optional[float]:
     stripped = value.strip()
     if not stripped:
         return None
@@ -29,37 +54,103 @@ def _parse_float(value: Optional[str]) -> Optional[float]:
         return None
 
 
-def _average_temperature(row: Dict[str, str]) -> Optional[float]:
-    values = [_parse_float(row.get(col)) for col in HEAT_INDEX_TEMPERATURE_COLUMNS]
-    filtered = [v for v in values if v is not None]
-    if not filtered:
-        return None
-    return sum(filtered) / len(filtered)
-
-
+def _parse_value_column(values: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """``_parse_float`` over a column of strings, once per distinct value: (floats, present)."""
+    codes, uniques = pd.factorize(values.fillna(""), use_na_sentinel=False)
+    parsed = [_parse_float(str(value)) for value in uniques]
+    unique_values = np.array([np.nan if value is None else value for value in parsed], dtype="float64")
+    unique_present = np.array([value is not None for value in parsed], dtype=bool)
+    return unique_values[codes], unique_present[codes]
 
-def _rows_with_heat_index(rows: Iterable[Dict[str, str]], logger) -> List[Dict[str, str]]:
-    output: List[Dict[str, str]] = []
-    skipped = 0
-    for row in rows:
-        city = (row.get("city") or row.get("City") or "").strip()
-        day = (row.get("date") or row.get("Date") or "").strip()
-        if not city or not day:
-            skipped += 1
-            continue
 
-        temp_c = _average_temperature(row)
-        humidity = _parse_float(row.get(HUMIDITY_AVG_COLUMN))
-        if temp_c is None or humidity is None:
-            skipped += 1
+def _read_columnar_weather(path: Path) -> Optional[pd.DataFrame]:
+    frame = read_columnar(path, columns=[*_KEY_COLUMNS, *_VALUE_COLUMNS])
+    if frame is None:
+        return None
+    for col in _KEY_COLUMNS:
+        if col not in frame.columns:
             continue
-
-        hi_f = compute_heat_index_f(temp_c, humidity)
-        output.append({"city": city, "date": day, "heat_index": f"{hi_f:.2f}"})
-
+        series = frame[col]
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            series = series.dt.strftime("%Y-%m-%d")
+        frame[col] = series.astype("string")
+    return frame
+
+
+def _load_weather_frame(path: Path, columnar_path: Optional[Path] = None) -> pd.DataFrame:
+    frame = None
+    if columnar_path is not None and columnar_is_current(path, columnar_path):
+        frame = _read_columnar_weather(columnar_path)
+    if frame is None:
+        wanted = {*_KEY_COLUMNS, *_VALUE_COLUMNS}
+        # Values stay text until ``_parse_value_column`` so one malformed cell skips its row
+        # instead of failing the whole read.
+        frame = pd.read_csv(
+            path,
+            usecols=lambda col: col in wanted,
+            dtype="string",
+            keep_default_na=False,
+            skipinitialspace=True,
+            encoding="utf-8",
+        )
+        for col in _VALUE_COLUMNS:
+            if col in frame.columns:
+                frame[col], frame[f"{_PRESENT_PREFIX}{col}"] = _parse_value_column(frame[col])
+    for col in _KEY_COLUMNS:
+        if col not in frame.columns:
+            frame[col] = ""
+    for col in _VALUE_COLUMNS:
+        if col not in frame.columns:
+            frame[col] = np.nan
+        if f"{_PRESENT_PREFIX}{col}" not in frame.columns:
+            frame[f"{_PRESENT_PREFIX}{col}"] = frame[col].notna().to_numpy()
+    return frame
+
+
+def _first_present(frame: pd.DataFrame, columns: Sequence[str]) -> pd.Series:
+    result = frame[columns[0]].fillna("")
+    for col in columns[1:]:
+        result = result.where(result != "", frame[col].fillna(""))
+    return result.str.strip()
+
+
+def _average_temperature(frame: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean of the present temperatures and whether any was present."""
+    # Accumulate column by column so the mean matches the left-to-right Python sum.
+    total = np.zeros(len(frame), dtype="float64")
+    count = np.zeros(len(frame), dtype="int64")
+    for col in HEAT_INDEX_TEMPERATURE_COLUMNS:
+        values = frame[col].to_numpy(dtype="float64")
+        present = frame[f"{_PRESENT_PREFIX}{col}"].to_numpy(dtype=bool)
+        total = np.where(present, total + values, total)
+        count += present
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan), count > 0
+
+
+def _heat_index_frame(frame: pd.DataFrame, logger) -> pd.DataFrame:
+    city = _first_present(frame, (WEATHER_CITY_COLUMN, WEATHER_CITY_RAW_COLUMN))
+    day = _first_present(frame, (WEATHER_DATE_COLUMN, WEATHER_DATE_RAW_COLUMN))
+    temp_c, has_temp = _average_temperature(frame)
+    humidity = frame[HUMIDITY_AVG_COLUMN].to_numpy(dtype="float64")
+    has_humidity = frame[f"{_PRESENT_PREFIX}{HUMIDITY_AVG_COLUMN}"].to_numpy(dtype=bool)
+
+    valid = (city != "").to_numpy() & (day != "").to_numpy() & has_temp & has_humidity
+    skipped = int(len(frame) - valid.sum())
     if skipped:
         logger.warning(f"Skipped {skipped} rows due to missing data")
-    return output
+
+    # ``inf`` or ``nan`` cells parse like ``float()`` and give a NaN heat index, as before.
+    with np.errstate(invalid="ignore"):
+        heat_index = compute_heat_index_f_array(temp_c[valid], humidity[valid])
+    return pd.DataFrame(
+        {
+            WEATHER_CITY_COLUMN: city.to_numpy()[valid],
+            WEATHER_DATE_COLUMN: day.to_numpy()[valid],
+            "heat_index": heat_index,
+        },
+        columns=HEAT_INDEX_OUTPUT_HEADER,
+    )
 
 
 def main() -> None:
@@ -76,24 +167,33 @@ def main() -> None:
         logger.error(f"Missing source data: {source}. Run get_historical_weather_data.py first.")
         return
 
-    with open(source, newline="", encoding="utf-8") as handle:
-        reader = csv.DictReader(handle)
-        rows = list(reader)
-
-    logger.info(f"Loaded {len(rows)} weather rows")
-    heat_index_rows = _rows_with_heat_index(rows, logger)
-    if not heat_index_rows:
+    frame = _load_weather_frame(source, WEATHER_HISTORY_PARQUET_FILE)
+    logger.info(f"Loaded {len(frame)} weather rows")
+    heat_index = _heat_index_frame(frame, logger)
+    del frame
+    if heat_index.empty:
         logger.warning("No heat index values computed")
         return
 
     destination = Path(WEATHER_HEAT_INDEX_FILE)
-    destination.parent.mkdir(parents=True, exist_ok=True)
-    with open(destination, "w", newline="", encoding="utf-8") as handle:
-        writer = csv.DictWriter(handle, fieldnames=["city", "date", "heat_index"])
-        writer.writeheader()
-        writer.writerows(heat_index_rows)
+    with atomic_path(destination) as tmp_path:
+        heat_index.to_csv(
+            tmp_path,
+            index=False,
+            float_format="%.2f",
+            na_rep="nan",
+            lineterminator="\r\n",
+            encoding="utf-8",
+        )
+    write_columnar(heat_index, WEATHER_HEAT_INDEX_PARQUET_FILE, decimals=2)
+    try:
+        write_partitions(WEATHER_HEAT_INDEX_PARTITIONS_DIR, heat_index, decimals=2)
+    except ValueError:
+        drop_city_partitions(WEATHER_HEAT_INDEX_PARTITIONS_DIR, keep=())
+    else:
+        mark_partition_source(WEATHER_HEAT_INDEX_PARTITIONS_DIR, destination)
 
-    logger.info(f"Wrote {len(heat_index_rows)} heat index rows to {destination}")
+    logger.info(f"Wrote {len(heat_index)} heat index rows to {destination}")
 
 
 if __name__ == "__main__":
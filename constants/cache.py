@@ -0,0 +1,23 @@
+"""Response cache settings for the API clients."""
+import os
+from typing import Final
+
+RESPONSE_CACHE_ENABLED: Final[bool] = True
+RESPONSE_CACHE_MAX_BYTES: Final[int] = 512 * 1024 * 1024
+# Set RESPONSE_CACHE_OFFLINE=1 to replay a previous run purely from the cache.
+RESPONSE_CACHE_OFFLINE: Final[bool] = os.environ.get("RESPONSE_CACHE_OFFLINE", "").lower() in {"1", "true", "yes"}
+
+OPEN_METEO_ARCHIVE_STABLE_DAYS: Final[int] = 7
+OPEN_METEO_RECENT_ARCHIVE_TTL_SECONDS: Final[int] = 6 * 60 * 60
+OPEN_METEO_FORECAST_TTL_SECONDS: Final[int] = 30 * 60
+OVERPASS_TTL_SECONDS: Final[int] = 7 * 24 * 60 * 60
+
+__all__ = [
+    "RESPONSE_CACHE_ENABLED",
+    "RESPONSE_CACHE_MAX_BYTES",
+    "RESPONSE_CACHE_OFFLINE",
+    "OPEN_METEO_ARCHIVE_STABLE_DAYS",
+    "OPEN_METEO_RECENT_ARCHIVE_TTL_SECONDS",
+    "OPEN_METEO_FORECAST_TTL_SECONDS",
+    "OVERPASS_TTL_SECONDS",
+]
@@ -7,16 +7,29 @@ DEFAULT_APP_NAME: Final[str] = "application"
 CITY_COORDS_FILENAME: Final[str] = "city_coords.csv"
 GET_CITY_LOG_FILENAME: Final[str] = "get_city_coords.log"
 WEATHER_HISTORY_FILENAME: Final[str] = "weather_history.csv"
+WEATHER_HISTORY_PARQUET_FILENAME: Final[str] = "weather_history.parquet"
 GET_WEATHER_LOG_FILENAME: Final[str] = "get_historical_weather_data.log"
 WEATHER_HEAT_INDEX_FILENAME: Final[str] = "weather_heat_index.csv"
+WEATHER_HEAT_INDEX_PARQUET_FILENAME: Final[str] = "weather_heat_index.parquet"
 HEAT_INDEX_LOG_FILENAME: Final[str] = "compute_heat_index.log"
 HEAT_INDEX_PREDICTIONS_FILENAME: Final[str] = "heat_index_predictions.csv"
+HEAT_INDEX_PREDICTIONS_PARQUET_FILENAME: Final[str] = "heat_index_predictions.parquet"
 PREDICT_HEAT_INDEX_LOG_FILENAME: Final[str] = "predict_heat_index.log"
+INFER_HEAT_INDEX_LOG_FILENAME: Final[str] = "infer_heat_index.log"
+TUNE_HEAT_INDEX_LOG_FILENAME: Final[str] = "tune_heat_index.log"
+SERVE_HEAT_INDEX_LOG_FILENAME: Final[str] = "serve_heat_index.log"
 HEAT_INDEX_MODEL_FILENAME: Final[str] = "heat_index_xgb.json"
+HEAT_INDEX_MODEL_META_FILENAME: Final[str] = "heat_index_xgb.meta.json"
+HEAT_INDEX_TUNING_PROFILE_FILENAME: Final[str] = "heat_index_xgb.tuning.json"
 METRICS_LOG_FILENAME: Final[str] = "metrics.log"
 HOURLY_HEAT_INDEX_FILENAME: Final[str] = "hourly_heat_index.csv"
 GET_HOURLY_HEAT_INDEX_LOG_FILENAME: Final[str] = "get_hourly_heat_index.log"
 HOURLY_HEAT_INDEX_JSON_FILENAME: Final[str] = "hourly_heat_index.json"
+HOURLY_HEAT_INDEX_COLUMNAR_FILENAME: Final[str] = "hourly_heat_index.v2.json"
+HOURLY_HEAT_INDEX_GENERATION_FILENAME: Final[str] = "hourly_heat_index.generation.json"
+WEATHER_FORECAST_FILENAME: Final[str] = "weather_forecast.csv"
+HEAT_INDEX_FORECAST_FILENAME: Final[str] = "heat_index_forecast.csv"
+HEAT_INDEX_FORECAST_PARQUET_FILENAME: Final[str] = "heat_index_forecast.parquet"
 
 __all__ = [
     "LOG_FILENAME_TEMPLATE",
@@ -24,14 +37,27 @@ __all__ = [
     "CITY_COORDS_FILENAME",
     "GET_CITY_LOG_FILENAME",
     "WEATHER_HISTORY_FILENAME",
+    "WEATHER_HISTORY_PARQUET_FILENAME",
     "GET_WEATHER_LOG_FILENAME",
     "WEATHER_HEAT_INDEX_FILENAME",
+    "WEATHER_HEAT_INDEX_PARQUET_FILENAME",
     "HEAT_INDEX_LOG_FILENAME",
     "HEAT_INDEX_PREDICTIONS_FILENAME",
+    "HEAT_INDEX_PREDICTIONS_PARQUET_FILENAME",
     "PREDICT_HEAT_INDEX_LOG_FILENAME",
+    "INFER_HEAT_INDEX_LOG_FILENAME",
+    "TUNE_HEAT_INDEX_LOG_FILENAME",
+    "SERVE_HEAT_INDEX_LOG_FILENAME",
     "HEAT_INDEX_MODEL_FILENAME",
+    "HEAT_INDEX_MODEL_META_FILENAME",
+    "HEAT_INDEX_TUNING_PROFILE_FILENAME",
     "METRICS_LOG_FILENAME",
     "HOURLY_HEAT_INDEX_FILENAME",
     "GET_HOURLY_HEAT_INDEX_LOG_FILENAME",
     "HOURLY_HEAT_INDEX_JSON_FILENAME",
+    "HOURLY_HEAT_INDEX_COLUMNAR_FILENAME",
+    "HOURLY_HEAT_INDEX_GENERATION_FILENAME",
+    "WEATHER_FORECAST_FILENAME",
+    "HEAT_INDEX_FORECAST_FILENAME",
+    "HEAT_INDEX_FORECAST_PARQUET_FILENAME",
 ]
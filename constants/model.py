@@ -7,12 +7,15 @@ from constants.weather import (
 
 HEAT_INDEX_FEATURE_CONFIG: Dict[str, Any] = {
     "max_lag_days": 7,
-    "rolling_window_days": 7,
+    "rolling_windows": [7],
+    "rolling_stats": ["mean"],
     "validation_days": 90,
     "fallback_split_fraction": 0.8,
     "seasonality_period": 365.25,
     "time_cols": ["dayofyear", "sin_day", "cos_day"],
     "forecast_horizon_days": 14,
+    # Days past the observed history forecast recursively from weather forecast covariates.
+    "future_horizon_days": 7,
 }
 
 HEAT_INDEX_TRAINING_LIMITS: Dict[str, Any] = {
@@ -25,6 +28,52 @@ HEAT_INDEX_TRAINING_LIMITS: Dict[str, Any] = {
     "large_learning_rate": 0.05,
     "small_subsample": 1.0,
     "large_subsample": 0.9,
+    # Stop once validation RMSE has not improved for this many rounds (0 disables), and
+    # optionally after ``time_budget_seconds`` of boosting (None disables). The best round
+    # is saved with the model and used for predictions.
+    "early_stopping_rounds": 100,
+    "time_budget_seconds": None,
+    # Daily runs continue boosting the saved model with this many extra trees, and retrain
+    # from scratch every ``full_retrain_days`` or once validation RMSE drifts more than
+    # ``warm_start_max_drift`` (relative) above the last full retrain.
+    "warm_start": True,
+    "warm_start_rounds": 100,
+    "full_retrain_days": 7,
+    "warm_start_max_drift": 0.05,
+}
+
+# ``python predict_heat_index.py tune``: time-series CV over ``folds`` trailing windows of
+# ``fold_days`` each, trials spread over a process pool until ``budget_seconds`` run out.
+# ``max_workers``/``threads_per_trial`` of None split the logical CPUs between trials.
+HEAT_INDEX_TUNING_CONFIG: Dict[str, Any] = {
+    "folds": 3,
+    "fold_days": 90,
+    "budget_seconds": 900,
+    "max_trials": 40,
+    "max_workers": None,
+    "threads_per_trial": None,
+    "max_rounds": 2000,
+    "early_stopping_rounds": 50,
+    "max_bin": 256,
+    "seed": 42,
+    "search_space": {
+        "max_depth": [4, 5, 6, 7, 8, 9],
+        "learning_rate": [0.03, 0.05, 0.08, 0.12],
+        "subsample": [0.7, 0.8, 0.9, 1.0],
+    },
+}
+
+# ``python serve_heat_index.py``: requests arriving within ``max_batch_wait_ms`` of each
+# other share one predict call; the model and lag state are reloaded when their source
+# files change, checked at most every ``refresh_check_seconds``.
+HEAT_INDEX_SERVICE_CONFIG: Dict[str, Any] = {
+    "host": "127.0.0.1",
+    "port": 8765,
+    "max_batch_size": 256,
+    "max_batch_wait_ms": 2.0,
+    "request_timeout_seconds": 10.0,
+    "latency_window": 10000,
+    "refresh_check_seconds": 30.0,
 }
 
 HEAT_INDEX_BASE_PARAMS: Dict[str, Any] = {
@@ -51,6 +100,8 @@ HEAT_INDEX_NUMERIC_COLUMNS = [
 __all__ = [
     "HEAT_INDEX_FEATURE_CONFIG",
     "HEAT_INDEX_TRAINING_LIMITS",
+    "HEAT_INDEX_TUNING_CONFIG",
+    "HEAT_INDEX_SERVICE_CONFIG",
     "HEAT_INDEX_BASE_PARAMS",
     "HEAT_INDEX_NUMERIC_COLUMNS",
 ]
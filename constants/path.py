@@ -1,11 +1,21 @@
 from constants.files import (
     CITY_COORDS_FILENAME,
     WEATHER_HISTORY_FILENAME,
+    WEATHER_HISTORY_PARQUET_FILENAME,
     WEATHER_HEAT_INDEX_FILENAME,
+    WEATHER_HEAT_INDEX_PARQUET_FILENAME,
     HEAT_INDEX_PREDICTIONS_FILENAME,
+    HEAT_INDEX_PREDICTIONS_PARQUET_FILENAME,
     HEAT_INDEX_MODEL_FILENAME,
+    HEAT_INDEX_MODEL_META_FILENAME,
+    HEAT_INDEX_TUNING_PROFILE_FILENAME,
     HOURLY_HEAT_INDEX_FILENAME,
     HOURLY_HEAT_INDEX_JSON_FILENAME,
+    HOURLY_HEAT_INDEX_COLUMNAR_FILENAME,
+    HOURLY_HEAT_INDEX_GENERATION_FILENAME,
+    WEATHER_FORECAST_FILENAME,
+    HEAT_INDEX_FORECAST_FILENAME,
+    HEAT_INDEX_FORECAST_PARQUET_FILENAME,
 )
 from pathlib import Path
 
@@ -20,18 +30,33 @@ DATASET_RAW_DIR: Path = DATASET_DIR / "raw"
 DATASET_PREDICTION_DIR: Path = DATASET_DIR / "prediction"
 PUBLIC_DATA_DIR: Path = REPO_ROOT / "public" / "data"
 MODELS_DIR: Path = REPO_ROOT / "models"
+CACHE_DIR: Path = REPO_ROOT / "cache"
+RESPONSE_CACHE_DIR: Path = CACHE_DIR / "responses"
+HEAT_INDEX_FEATURE_STORE_DIR: Path = CACHE_DIR / "features"
 WEB_PUBLIC_DIR: Path = WEB_DIR / "public"
 WEB_PUBLIC_DATA_DIR: Path = WEB_PUBLIC_DIR / "data"
 
 CITY_COORDS_FILE: Path = DATASET_CLEAN_DIR / CITY_COORDS_FILENAME
 CITY_COORDS_RAW_FILE: Path = DATASET_RAW_DIR / CITY_COORDS_FILENAME
 WEATHER_HISTORY_FILE: Path = DATASET_CLEAN_DIR / WEATHER_HISTORY_FILENAME
+WEATHER_HISTORY_PARQUET_FILE: Path = DATASET_CLEAN_DIR / WEATHER_HISTORY_PARQUET_FILENAME
+WEATHER_HISTORY_PARTITIONS_DIR: Path = DATASET_CLEAN_DIR / "weather_history"
 WEATHER_HISTORY_RAW_FILE: Path = DATASET_RAW_DIR / WEATHER_HISTORY_FILENAME
 WEATHER_HEAT_INDEX_FILE: Path = DATASET_CLEAN_DIR / WEATHER_HEAT_INDEX_FILENAME
+WEATHER_HEAT_INDEX_PARQUET_FILE: Path = DATASET_CLEAN_DIR / WEATHER_HEAT_INDEX_PARQUET_FILENAME
+WEATHER_HEAT_INDEX_PARTITIONS_DIR: Path = DATASET_CLEAN_DIR / "weather_heat_index"
 HEAT_INDEX_PREDICTIONS_FILE: Path = DATASET_PREDICTION_DIR / HEAT_INDEX_PREDICTIONS_FILENAME
+HEAT_INDEX_PREDICTIONS_PARQUET_FILE: Path = DATASET_PREDICTION_DIR / HEAT_INDEX_PREDICTIONS_PARQUET_FILENAME
+HEAT_INDEX_FORECAST_FILE: Path = DATASET_PREDICTION_DIR / HEAT_INDEX_FORECAST_FILENAME
+HEAT_INDEX_FORECAST_PARQUET_FILE: Path = DATASET_PREDICTION_DIR / HEAT_INDEX_FORECAST_PARQUET_FILENAME
 HEAT_INDEX_MODEL_FILE: Path = MODELS_DIR / HEAT_INDEX_MODEL_FILENAME
+HEAT_INDEX_MODEL_META_FILE: Path = MODELS_DIR / HEAT_INDEX_MODEL_META_FILENAME
+HEAT_INDEX_TUNING_PROFILE_FILE: Path = MODELS_DIR / HEAT_INDEX_TUNING_PROFILE_FILENAME
 HOURLY_HEAT_INDEX_FILE: Path = DATASET_CLEAN_DIR / HOURLY_HEAT_INDEX_FILENAME
 HOURLY_HEAT_INDEX_PUBLIC_FILE: Path = WEB_PUBLIC_DATA_DIR / HOURLY_HEAT_INDEX_JSON_FILENAME
+HOURLY_HEAT_INDEX_COLUMNAR_PUBLIC_FILE: Path = WEB_PUBLIC_DATA_DIR / HOURLY_HEAT_INDEX_COLUMNAR_FILENAME
+HOURLY_HEAT_INDEX_GENERATION_FILE: Path = WEB_PUBLIC_DATA_DIR / HOURLY_HEAT_INDEX_GENERATION_FILENAME
+WEATHER_FORECAST_FILE: Path = DATASET_CLEAN_DIR / WEATHER_FORECAST_FILENAME
 
 def ensure_dirs():
     for p in (
@@ -58,14 +83,29 @@ __all__ = [
     "WEB_PUBLIC_DIR",
     "WEB_PUBLIC_DATA_DIR",
     "MODELS_DIR",
+    "CACHE_DIR",
+    "RESPONSE_CACHE_DIR",
+    "HEAT_INDEX_FEATURE_STORE_DIR",
     "CITY_COORDS_FILE",
     "CITY_COORDS_RAW_FILE",
     "WEATHER_HISTORY_FILE",
     "WEATHER_HISTORY_RAW_FILE",
+    "WEATHER_HISTORY_PARQUET_FILE",
+    "WEATHER_HISTORY_PARTITIONS_DIR",
     "WEATHER_HEAT_INDEX_FILE",
+    "WEATHER_HEAT_INDEX_PARQUET_FILE",
+    "WEATHER_HEAT_INDEX_PARTITIONS_DIR",
     "HOURLY_HEAT_INDEX_FILE",
     "HEAT_INDEX_PREDICTIONS_FILE",
+    "HEAT_INDEX_PREDICTIONS_PARQUET_FILE",
+    "HEAT_INDEX_FORECAST_FILE",
+    "HEAT_INDEX_FORECAST_PARQUET_FILE",
     "HEAT_INDEX_MODEL_FILE",
+    "HEAT_INDEX_MODEL_META_FILE",
+    "HEAT_INDEX_TUNING_PROFILE_FILE",
     "HOURLY_HEAT_INDEX_PUBLIC_FILE",
+    "HOURLY_HEAT_INDEX_COLUMNAR_PUBLIC_FILE",
+    "HOURLY_HEAT_INDEX_GENERATION_FILE",
+    "WEATHER_FORECAST_FILE",
     "ensure_dirs",
 ]
@@ -1,7 +1,7 @@
 """Shared weather-related schema values and API defaults."""
 from __future__ import annotations
 
-from typing import Final, List, Sequence
+from typing import Dict, Final, List, Sequence
 
 # Canonical column names
 WEATHER_CITY_COLUMN: Final[str] = "city"
@@ -52,6 +52,22 @@ WEATHER_HOURLY_AVERAGE_COLUMNS: Final[List[str]] = [
     hourly_average_name(metric) for metric in WEATHER_HOURLY_METRICS
 ]
 
+# Per-day statistics of each hourly metric; "mean" keeps the historical ``_avg`` columns.
+WEATHER_HOURLY_STATS: Final[List[str]] = ["mean"]
+HOURLY_STAT_SUFFIXES: Final[Dict[str, str]] = {
+    "mean": HOURLY_AVG_SUFFIX,
+    "min": "_hourly_min",
+    "max": "_hourly_max",
+    "count": "_hourly_count",
+}
+
+def hourly_stat_name(metric: str, stat: str) -> str:
+    return f"{metric}{HOURLY_STAT_SUFFIXES[stat]}"
+
+WEATHER_HOURLY_SUMMARY_COLUMNS: Final[List[str]] = [
+    hourly_stat_name(metric, stat) for metric in WEATHER_HOURLY_METRICS for stat in WEATHER_HOURLY_STATS
+]
+
 HUMIDITY_AVG_COLUMN: Final[str] = hourly_average_name("relative_humidity_2m")
 
 HEAT_INDEX_TEMPERATURE_COLUMNS: Final[List[str]] = [
@@ -65,14 +81,22 @@ WEATHER_HISTORY_HEADER: Final[List[str]] = [
     WEATHER_CITY_COLUMN,
     WEATHER_DATE_COLUMN,
     *WEATHER_DAILY_METRICS,
-    *WEATHER_HOURLY_AVERAGE_COLUMNS,
+    *WEATHER_HOURLY_SUMMARY_COLUMNS,
 ]
 
 # API defaults
 WEATHER_LOOKBACK_YEARS: Final[int] = 5
+WEATHER_REFRESH_OVERLAP_DAYS: Final[int] = 7
+WEATHER_CLEAN_CONTEXT_DAYS: Final[int] = 30
 OPEN_METEO_TIMEOUT_SECONDS: Final[int] = 60
 OPEN_METEO_MAX_RETRIES: Final[int] = 5
 OPEN_METEO_REQUEST_COOLDOWN: Final[float] = 1.5
+OPEN_METEO_MAX_WORKERS: Final[int] = 4
+OPEN_METEO_RATE_LIMIT_PER_SECOND: Final[float] = 1.0 / OPEN_METEO_REQUEST_COOLDOWN
+OPEN_METEO_ARCHIVE_BATCH_SIZE: Final[int] = 10
+OPEN_METEO_FORECAST_BATCH_SIZE: Final[int] = 50
+OPEN_METEO_POOL_SIZE: Final[int] = max(10, OPEN_METEO_MAX_WORKERS)
+OPEN_METEO_TRANSPORT_RETRIES: Final[int] = 2
 DEFAULT_TEMPERATURE_UNIT: Final[str] = "celsius"
 DEFAULT_TIMEZONE: Final[str] = "Asia/Singapore"
 OPEN_METEO_API_URL: Final[str] = "https://archive-api.open-meteo.com/v1/archive"
@@ -96,13 +120,25 @@ __all__ = [
     "HOURLY_AVG_SUFFIX",
     "hourly_average_name",
     "WEATHER_HOURLY_AVERAGE_COLUMNS",
+    "WEATHER_HOURLY_STATS",
+    "HOURLY_STAT_SUFFIXES",
+    "hourly_stat_name",
+    "WEATHER_HOURLY_SUMMARY_COLUMNS",
     "HUMIDITY_AVG_COLUMN",
     "HEAT_INDEX_TEMPERATURE_COLUMNS",
     "WEATHER_HISTORY_HEADER",
     "WEATHER_LOOKBACK_YEARS",
+    "WEATHER_REFRESH_OVERLAP_DAYS",
+    "WEATHER_CLEAN_CONTEXT_DAYS",
     "OPEN_METEO_TIMEOUT_SECONDS",
     "OPEN_METEO_MAX_RETRIES",
     "OPEN_METEO_REQUEST_COOLDOWN",
+    "OPEN_METEO_MAX_WORKERS",
+    "OPEN_METEO_RATE_LIMIT_PER_SECOND",
+    "OPEN_METEO_ARCHIVE_BATCH_SIZE",
+    "OPEN_METEO_FORECAST_BATCH_SIZE",
+    "OPEN_METEO_POOL_SIZE",
+    "OPEN_METEO_TRANSPORT_RETRIES",
     "DEFAULT_TEMPERATURE_UNIT",
     "DEFAULT_TIMEZONE",
     "OPEN_METEO_API_URL",
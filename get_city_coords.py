@@ -5,6 +5,7 @@ from constants.path import CITY_COORDS_FILE, CITY_COORDS_RAW_FILE, LOGS_DIR, ens
 from constants.weather import CITY_COORDS_HEADER
 from dataset.misc.coords_request import get_coords_query
 from dataset.misc.exclude_places import get_exclude_places
+from routes.cache import response_cache_stats
 from routes.overpass import get_coords
 from utils.clean import clean_city_coords
 from utils.csv import write_csv
@@ -25,6 +26,11 @@ def main() -> None:
     query = get_coords_query()
     result = get_coords(query)
     logger.info(f"Retrieved {len(result.nodes)} locations from Overpass")
+    cache_stats = response_cache_stats()
+    logger.info(
+        f"Response cache hits={cache_stats['hits']} | misses={cache_stats['misses']} | "
+        f"bytes saved={cache_stats['bytes_saved']}"
+    )
 
     exclude_places = get_exclude_places()
     output_file = str(CITY_COORDS_RAW_FILE)
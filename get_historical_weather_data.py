@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import argparse
 import csv
 from datetime import date, timedelta
 from pathlib import Path
-from typing import Dict, List, Sequence, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 from constants.error import OpenMeteoRequestError
 from constants.files import GET_WEATHER_LOG_FILENAME
@@ -16,24 +19,37 @@ from constants.path import (
 	CITY_COORDS_FILE,
 	LOGS_DIR,
 	WEATHER_HISTORY_FILE,
+	WEATHER_HISTORY_PARQUET_FILE,
+	WEATHER_HISTORY_PARTITIONS_DIR,
 	WEATHER_HISTORY_RAW_FILE,
 	ensure_dirs,
 )
 from constants.weather import (
 	CITY_COLUMN_ALIASES,
+	HOURLY_STAT_SUFFIXES,
 	LAT_COLUMN_ALIASES,
 	LON_COLUMN_ALIASES,
+	OPEN_METEO_ARCHIVE_BATCH_SIZE,
 	OPEN_METEO_MAX_RETRIES,
-	OPEN_METEO_REQUEST_COOLDOWN,
+	OPEN_METEO_MAX_WORKERS,
+	OPEN_METEO_RATE_LIMIT_PER_SECOND,
 	OPEN_METEO_TIMEOUT_SECONDS,
 	WEATHER_CITY_COLUMN,
 	WEATHER_DATE_COLUMN,
+	WEATHER_HOURLY_STATS,
 	WEATHER_LOOKBACK_YEARS,
-	hourly_average_name,
+	WEATHER_REFRESH_OVERLAP_DAYS,
+	hourly_stat_name,
 )
-from routes.openmeteo import fetch_weather_archive
-from utils.clean import clean_weather_history
+from routes.cache import response_cache_stats
+from routes.openmeteo import fetch_weather_archive_many
+from routes.session import connection_stats
+from utils.atomic import atomic_write
+from utils.clean import clean_weather_history, refresh_weather_history
+from utils.hourly import HourlySummary, summarize_hourly
 from utils.logger import get_logger
+from utils.partition import last_partition_dates, partitions_match_source
+from utils.rate_limit import TokenBucket
 
 
 def _get_date_window(years: int = WEATHER_LOOKBACK_YEARS) -> Tuple[str, str]:
@@ -62,25 +78,84 @@ def _read_cities(path: Path) -> List[Tuple[str, float, float]]:
 	return cities
 
 
-def _summarize_hourly(hourly: Dict[str, List], metrics: Sequence[str]) -> Dict[str, Dict[str, float]]:
-	if not hourly:
-		return {}
-	timestamps = [str(ts) for ts in (hourly.get("time") or [])]
-	summaries: Dict[str, Dict[str, float]] = {}
-	for metric in metrics:
-		values = hourly.get(metric) or []
-		daily_totals: Dict[str, List[float]] = {}
-		for ts, value in zip(timestamps, values):
-			if value is None:
+def _read_header(path: Path) -> List[str]:
+	if not path.exists():
+		return []
+	with open(path, newline="", encoding="utf-8") as handle:
+		return next(csv.reader(handle), [])
+
+
+def _last_stored_dates(path: Path) -> Dict[str, date]:
+	last_dates: Dict[str, date] = {}
+	if not path.exists():
+		return last_dates
+	if partitions_match_source(WEATHER_HISTORY_PARTITIONS_DIR, path):
+		# The partition manifests already hold each city's newest date.
+		stored = last_partition_dates(WEATHER_HISTORY_PARTITIONS_DIR)
+		return {city: date.fromisoformat(day) for city, day in stored.items()}
+	with open(path, newline="", encoding="utf-8") as handle:
+		reader = csv.DictReader(handle)
+		for row in reader:
+			city = row.get(WEATHER_CITY_COLUMN)
+			try:
+				day = date.fromisoformat(row.get(WEATHER_DATE_COLUMN) or "")
+			except ValueError:
 				continue
-			day = ts.split("T", 1)[0]
-			daily_totals.setdefault(day, []).append(float(value))
-		metric_key = hourly_average_name(metric)
-		for day, samples in daily_totals.items():
-			if not samples:
+			if city and (city not in last_dates or day > last_dates[city]):
+				last_dates[city] = day
+	return last_dates
+
+
+def _refresh_start_dates(
+	cities: Sequence[Tuple[str, float, float]],
+	last_dates: Dict[str, date],
+	start_date: str,
+	overlap_days: int = WEATHER_REFRESH_OVERLAP_DAYS,
+) -> Dict[str, str]:
+	window_start = date.fromisoformat(start_date)
+	starts: Dict[str, str] = {}
+	for name, _, _ in cities:
+		last = last_dates.get(name)
+		if last is None:
+			starts[name] = start_date
+		else:
+			starts[name] = max(window_start, last - timedelta(days=overlap_days - 1)).isoformat()
+	return starts
+
+
+def _merge_raw_rows(
+	path: Path,
+	new_rows: List[Dict[str, str]],
+	since: Dict[str, str],
+	start_date: str,
+) -> List[Dict[str, str]]:
+	merged: Dict[Tuple[str, str], Dict[str, str]] = {}
+	with open(path, newline="", encoding="utf-8") as handle:
+		for row in csv.DictReader(handle):
+			city = row.get(WEATHER_CITY_COLUMN) or ""
+			day = row.get(WEATHER_DATE_COLUMN) or ""
+			if day < start_date or (city in since and day >= since[city]):
 				continue
-			summaries.setdefault(day, {})[metric_key] = sum(samples) / len(samples)
-	return summaries
+			merged[(city, day)] = row
+	for row in new_rows:
+		merged[(row[WEATHER_CITY_COLUMN], row[WEATHER_DATE_COLUMN])] = row
+	return [merged[key] for key in sorted(merged)]
+
+
+def _format_daily_column(values: Optional[List], size: int) -> List[str]:
+	values = list(values or [])[:size]
+	column = ["" if value is None else str(value) for value in values]
+	column.extend([""] * (size - len(column)))
+	return column
+
+
+def _format_hourly_column(values: np.ndarray, positions: np.ndarray, integer: bool) -> List[str]:
+	found = positions >= 0
+	picked = np.full(len(positions), np.nan)
+	if len(values):
+		picked[found] = values[positions[found]]
+	template = "{:.0f}" if integer else "{:.2f}"
+	return ["" if value != value else template.format(value) for value in picked.tolist()]
 
 
 def _build_daily_rows(
@@ -88,25 +163,27 @@ def _build_daily_rows(
 	daily: Dict[str, List[float]],
 	daily_metrics: Sequence[str],
 	hourly_metric_cols: Sequence[str],
-	hourly_summary: Dict[str, Dict[str, float]],
+	hourly_summary: HourlySummary,
 ) -> List[Dict[str, str]]:
 	times = [str(ts) for ts in (daily.get("time") or [])]
-	rows: List[Dict[str, str]] = []
-	for idx, day in enumerate(times):
-		row: Dict[str, str] = {WEATHER_CITY_COLUMN: city, WEATHER_DATE_COLUMN: day}
-		for metric in daily_metrics:
-			values = daily.get(metric)
-			value = values[idx] if values and idx < len(values) else ""
-			row[metric] = "" if value is None else str(value)
-		hourly_values = hourly_summary.get(day) or {}
-		for col in hourly_metric_cols:
-			value = hourly_values.get(col)
-			row[col] = "" if value is None else f"{value:.2f}"
-		rows.append(row)
-	return rows
-
-
-def main() -> None:
+	if not times:
+		return []
+	positions = hourly_summary.positions(times)
+	columns: Dict[str, List[str]] = {
+		WEATHER_CITY_COLUMN: [city] * len(times),
+		WEATHER_DATE_COLUMN: times,
+	}
+	for metric in daily_metrics:
+		columns[metric] = _format_daily_column(daily.get(metric), len(times))
+	empty = np.empty(0, dtype="float64")
+	for col in hourly_metric_cols:
+		values = hourly_summary.columns.get(col, empty)
+		columns[col] = _format_hourly_column(values, positions, col.endswith(HOURLY_STAT_SUFFIXES["count"]))
+	names = list(columns)
+	return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+def main(full_refresh: bool = False) -> None:
 	ensure_dirs()
 	logger = get_logger(
 		name="get_historical_weather_data",
@@ -120,51 +197,118 @@ def main() -> None:
 		logger.warning("No cities available for weather download. Run get_city_coords.py first.")
 		return
 
-	start_date, end_date = _get_date_window()
-	logger.info(f"Requesting weather data from {start_date} to {end_date}")
-
 	daily_metrics = list(DEFAULT_DAILY)
 	hourly_metrics = list(DEFAULT_HOURLY)
-	hourly_metric_cols = [hourly_average_name(metric) for metric in hourly_metrics]
+	hourly_stats = list(WEATHER_HOURLY_STATS)
+	hourly_metric_cols = [hourly_stat_name(metric, stat) for metric in hourly_metrics for stat in hourly_stats]
 	header = [WEATHER_CITY_COLUMN, WEATHER_DATE_COLUMN, *daily_metrics, *hourly_metric_cols]
 
+	raw_path = Path(WEATHER_HISTORY_RAW_FILE)
+	clean_path = Path(WEATHER_HISTORY_FILE)
+	start_date, end_date = _get_date_window()
+	incremental = (
+		not full_refresh
+		and clean_path.exists()
+		and _read_header(raw_path) == header
+		and _read_header(clean_path) == header
+	)
+	if incremental:
+		since = _refresh_start_dates(cities, _last_stored_dates(clean_path), start_date)
+		since = {name: day for name, day in since.items() if day <= end_date}
+		logger.info(f"Incremental refresh for {len(since)} of {len(cities)} cities up to {end_date}")
+	else:
+		since = {name: start_date for name, _, _ in cities}
+		logger.info(f"Requesting weather data from {start_date} to {end_date}")
+	if not since:
+		logger.info("Weather history already up to date.")
+		return
+
+	fetch_cities = [city for city in cities if city[0] in since]
 	raw_rows: List[Dict[str, str]] = []
-	for name, lat, lon in cities:
-		params = build_weather_params(lat, lon, start_date, end_date, daily=daily_metrics, hourly=hourly_metrics)
-		try:
-			payload = fetch_weather_archive(
-				params,
-				timeout=OPEN_METEO_TIMEOUT_SECONDS,
-				retries=OPEN_METEO_MAX_RETRIES,
-				cooldown=OPEN_METEO_REQUEST_COOLDOWN,
-			)
-		except OpenMeteoRequestError as exc:
-			logger.error(f"Failed to fetch data for {name}: {exc}")
+	params_list = [
+		build_weather_params(lat, lon, since[name], end_date, daily=daily_metrics, hourly=hourly_metrics)
+		for name, lat, lon in fetch_cities
+	]
+	rate_limiter = TokenBucket(OPEN_METEO_RATE_LIMIT_PER_SECOND, capacity=OPEN_METEO_MAX_WORKERS)
+	payloads = fetch_weather_archive_many(
+		params_list,
+		max_workers=OPEN_METEO_MAX_WORKERS,
+		batch_size=OPEN_METEO_ARCHIVE_BATCH_SIZE,
+		rate_limiter=rate_limiter,
+		timeout=OPEN_METEO_TIMEOUT_SECONDS,
+		retries=OPEN_METEO_MAX_RETRIES,
+		summarize_hourly=hourly_metrics,
+		hourly_stats=hourly_stats,
+	)
+	fetched: Dict[str, str] = {}
+	for (name, _, _), payload in zip(fetch_cities, payloads):
+		if isinstance(payload, OpenMeteoRequestError):
+			logger.error(f"Failed to fetch data for {name}: {payload}")
 			continue
 
 		daily_section = payload.get("daily") or {}
-		hourly_section = payload.get("hourly") or {}
-		hourly_summary = _summarize_hourly(hourly_section, hourly_metrics)
+		hourly_summary = payload.get("hourly_summary")
+		if hourly_summary is None:
+			hourly_summary = summarize_hourly(payload.get("hourly"), hourly_metrics, hourly_stats)
 		city_rows = _build_daily_rows(name, daily_section, daily_metrics, hourly_metric_cols, hourly_summary)
+		if not city_rows:
+			# Marking the city as fetched would drop its stored rows from ``since`` on.
+			logger.warning(f"No daily rows returned for {name}; keeping its stored history")
+			continue
 		raw_rows.extend(city_rows)
+		fetched[name] = since[name]
 		logger.info(f"Fetched {len(city_rows)} daily rows for {name}")
 
+	stats = connection_stats()
+	logger.info(f"HTTP requests={stats['requests']} | new connections={stats['new']} | reused={stats['reused']}")
+	cache_stats = response_cache_stats()
+	logger.info(
+		f"Response cache hits={cache_stats['hits']} | misses={cache_stats['misses']} | "
+		f"bytes saved={cache_stats['bytes_saved']} | evictions={cache_stats['evictions']}"
+	)
+
 	if not raw_rows:
 		logger.warning("No weather rows collected; aborting.")
 		return
 
-	raw_path = Path(WEATHER_HISTORY_RAW_FILE)
-	clean_path = Path(WEATHER_HISTORY_FILE)
+	if incremental:
+		raw_rows = _merge_raw_rows(raw_path, raw_rows, fetched, start_date)
 	logger.info(f"Writing raw data to {raw_path}")
-	with open(raw_path, "w", newline="", encoding="utf-8") as handle:
+	with atomic_write(raw_path, "w", newline="", encoding="utf-8") as handle:
 		writer = csv.DictWriter(handle, fieldnames=header)
 		writer.writeheader()
 		writer.writerows(raw_rows)
+	del raw_rows
 
-	logger.info("Cleaning raw weather data")
-	cleaned_count = clean_weather_history(str(raw_path), str(clean_path))
+	if incremental:
+		logger.info(f"Re-cleaning weather data for {len(fetched)} refreshed cities")
+		cleaned_count = refresh_weather_history(
+			str(raw_path),
+			str(clean_path),
+			fetched,
+			columnar_path=WEATHER_HISTORY_PARQUET_FILE,
+			partition_root=WEATHER_HISTORY_PARTITIONS_DIR,
+		)
+	else:
+		logger.info("Cleaning raw weather data")
+		cleaned_count = clean_weather_history(
+			str(raw_path),
+			str(clean_path),
+			columnar_path=WEATHER_HISTORY_PARQUET_FILE,
+			partition_root=WEATHER_HISTORY_PARTITIONS_DIR,
+		)
 	logger.info(f"Wrote cleaned weather dataset with {cleaned_count} rows to {clean_path}")
 
 
+def _parse_args() -> argparse.Namespace:
+	parser = argparse.ArgumentParser(description="Download and clean historical daily weather data.")
+	parser.add_argument(
+		"--full",
+		action="store_true",
+		help="Re-download the full lookback window instead of only the missing tail.",
+	)
+	return parser.parse_args()
+
+
 if __name__ == "__main__":
-	main()
+	main(full_refresh=_parse_args().full)
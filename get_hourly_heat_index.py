@@ -1,20 +1,28 @@
 from __future__ import annotations
 
+import asyncio
 import csv
+import gzip
 import json
 from datetime import datetime, timezone, timedelta, tzinfo
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+import numpy as np
+
 from constants.error import OpenMeteoRequestError
 from constants.files import GET_HOURLY_HEAT_INDEX_LOG_FILENAME
-from constants.params import DEFAULT_HOURLY
+from constants.model import HEAT_INDEX_FEATURE_CONFIG
+from constants.params import DEFAULT_DAILY, DEFAULT_HOURLY
 from constants.path import (
     CITY_COORDS_FILE,
+    HOURLY_HEAT_INDEX_COLUMNAR_PUBLIC_FILE,
     HOURLY_HEAT_INDEX_FILE,
+    HOURLY_HEAT_INDEX_GENERATION_FILE,
     HOURLY_HEAT_INDEX_PUBLIC_FILE,
     LOGS_DIR,
+    WEATHER_FORECAST_FILE,
     ensure_dirs,
 )
 from constants.weather import (
@@ -23,19 +31,72 @@ from constants.weather import (
     DEFAULT_TIMEZONE,
     LAT_COLUMN_ALIASES,
     LON_COLUMN_ALIASES,
+    OPEN_METEO_FORECAST_BATCH_SIZE,
     OPEN_METEO_MAX_RETRIES,
-    OPEN_METEO_REQUEST_COOLDOWN,
+    OPEN_METEO_MAX_WORKERS,
+    OPEN_METEO_RATE_LIMIT_PER_SECOND,
     OPEN_METEO_TIMEOUT_SECONDS,
+    WEATHER_HISTORY_HEADER,
+    WEATHER_HOURLY_STATS,
+    WEATHER_HOURLY_SUMMARY_COLUMNS,
 )
-from routes.openmeteo import fetch_weather_forecast
-from utils.heat_index import compute_heat_index_f
+from get_historical_weather_data import _build_daily_rows
+from routes.cache import response_cache_stats
+from routes.openmeteo import fetch_weather_forecast_async
+from routes.session import connection_stats
+from utils.atomic import FileGeneration, atomic_write
+from utils.columnar import round_like_format
+from utils.heat_index import compute_heat_index_f_array
+from utils.hourly import summarize_hourly
 from utils.logger import get_logger
+from utils.rate_limit import TokenBucket
 from utils.units import fahrenheit_to_celsius
 
+try:
+    import brotli  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    brotli = None
+
 HOURLY_METRICS: Sequence[str] = tuple(sorted(set(DEFAULT_HOURLY + ["temperature_2m", "apparent_temperature"])))
 MAX_EXPORTED_HOURS = 48
+HOURLY_CSV_HEADER: Sequence[str] = (
+    "city",
+    "timestamp",
+    "temperature_c",
+    "apparent_temperature_c",
+    "relative_humidity",
+    "heat_index_f",
+    "heat_index_c",
+)
+# Order of the fields of a JSON point; ``apparent_temperature_c`` follows when known.
+POINT_FIELDS: Sequence[str] = ("timestamp", "temperature_c", "relative_humidity", "heat_index_f", "heat_index_c")
+# The columnar public payload: per city one array per field, values scaled by
+# ``COLUMNAR_SCALE`` to integers (0.01 steps) and timestamps as ``start`` plus a step.
+# Bump the version whenever the layout changes; ``web/lib/server/insights.ts`` checks it.
+COLUMNAR_SCHEMA = "hourly_heat_index"
+COLUMNAR_SCHEMA_VERSION = 2
+COLUMNAR_SCALE = 100
+COLUMNAR_STEP_SECONDS = 3600
+COLUMNAR_FIELDS: Sequence[str] = (
+    "temperature_c",
+    "apparent_temperature_c",
+    "relative_humidity",
+    "heat_index_f",
+    "heat_index_c",
+)
+# The hourly CSV and JSON payloads cover these days around today (``_hourly_points``).
 PAST_DAYS = 1
 FORECAST_DAYS = 1
+# The daily covariates in ``WEATHER_FORECAST_FILE`` for multi-day heat index forecasts (see
+# ``infer_heat_index.py``) come from a separate, wider request: the past days bridge the lag
+# of the historical archive behind today, and the forecast days reach the end of the
+# recursive forecast horizon. It is only sent once the saved covariates are
+# ``COVARIATE_REFRESH_HOURS`` old or from an earlier day, so most hourly runs skip it.
+COVARIATE_PAST_DAYS = 7
+COVARIATE_FORECAST_DAYS = int(HEAT_INDEX_FEATURE_CONFIG.get("future_horizon_days", 7)) + 1
+COVARIATE_REFRESH_HOURS = 6
+# Responses waiting to be parsed; fetching pauses while this many are queued.
+PIPELINE_QUEUE_SIZE = 2 * OPEN_METEO_FORECAST_BATCH_SIZE
 
 
 def _read_cities(path: Path) -> List[Tuple[str, float, float]]:
@@ -81,65 +142,293 @@ def _build_forecast_params(lat: float, lon: float) -> Dict[str, Any]:
     }
 
 
-def _point_from_hour(
+def _build_covariate_params(lat: float, lon: float) -> Dict[str, Any]:
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "hourly": list(DEFAULT_HOURLY),
+        "temperature_unit": DEFAULT_TEMPERATURE_UNIT,
+        "timezone": DEFAULT_TIMEZONE,
+        "daily": list(DEFAULT_DAILY),
+        "past_days": COVARIATE_PAST_DAYS,
+        "forecast_days": COVARIATE_FORECAST_DAYS,
+    }
+
+
+class _TimeAxis:
+    """An hourly time axis parsed once: ISO labels with offsets, UTC epochs and local days.
+
+    Cities fetched together share the same axis, so ``_time_axis`` caches it by its labels.
+    Unparseable entries are marked invalid.
+    """
+
+    def __init__(self, times: Sequence[str], tz: tzinfo) -> None:
+        size = len(times)
+        self.labels = np.empty(size, dtype=object)
+        self.epochs = np.zeros(size, dtype="float64")
+        self.days = np.full(size, np.datetime64("NaT"), dtype="datetime64[D]")
+        self.valid = np.zeros(size, dtype=bool)
+        for idx, stamp in enumerate(times):
+            try:
+                moment = datetime.fromisoformat(stamp).replace(tzinfo=tz)
+            except ValueError:
+                continue
+            self.labels[idx] = moment.isoformat()
+            self.epochs[idx] = moment.timestamp()
+            self.days[idx] = np.datetime64(moment.date(), "D")
+            self.valid[idx] = True
+        # Stable, so hours at the same instant keep their order on the axis.
+        self.order = np.argsort(np.where(self.valid, self.epochs, np.inf), kind="stable")
+
+
+def _time_axis(times: Sequence[Any], tz: tzinfo, cache: Dict[Tuple[str, ...], _TimeAxis]) -> _TimeAxis:
+    key = tuple(str(stamp) for stamp in times)
+    axis = cache.get(key)
+    if axis is None:
+        axis = cache[key] = _TimeAxis(key, tz)
+    return axis
+
+
+def _float_column(values: Optional[Sequence[Any]], size: int) -> np.ndarray:
+    """``values`` as float64 of length ``size``; missing or non-numeric entries become NaN."""
+    column = np.full(size, np.nan)
+    values = list(values or [])[:size]
+    if not values:
+        return column
+    try:
+        column[: len(values)] = np.array(values, dtype="float64")
+    except (TypeError, ValueError):
+        parsed = [_safe_float(values, idx) for idx in range(len(values))]
+        column[: len(values)] = [np.nan if value is None else value for value in parsed]
+    return column
+
+
+def _scaled(values: np.ndarray) -> List[Optional[int]]:
+    """Rounded values as integers in units of ``1 / COLUMNAR_SCALE``; unknown ones become None."""
+    scaled = np.rint(np.asarray(values, dtype="float64") * COLUMNAR_SCALE)
+    known = ~np.isnan(scaled)
+    out: List[Optional[int]] = [None] * len(scaled)
+    for idx, value in zip(np.flatnonzero(known).tolist(), scaled[known].astype("int64").tolist()):
+        out[idx] = value
+    return out
+
+
+class HourlyPoints:
+    """One city's hourly heat index points as columns, in time order."""
+
+    def __init__(self, city: str, columns: Dict[str, np.ndarray], epochs: np.ndarray) -> None:
+        self.city = city
+        self.columns = columns
+        self.epochs = epochs
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    def current_index(self, now: datetime) -> int:
+        """The last point at or before ``now``, or the first point when all are later."""
+        return max(int(np.searchsorted(self.epochs, now.timestamp(), side="right")) - 1, 0)
+
+    def records(self, rows: Sequence[int] | slice) -> List[Dict[str, Any]]:
+        """JSON points for ``rows``; ``apparent_temperature_c`` is left out where unknown."""
+        picked = {name: column[rows].tolist() for name, column in self.columns.items()}
+        records = []
+        for idx in range(len(picked["timestamp"])):
+            record = {"city": self.city}
+            for name in POINT_FIELDS:
+                record[name] = picked[name][idx]
+            if picked["apparent_temperature_c"][idx] is not None:
+                record["apparent_temperature_c"] = picked["apparent_temperature_c"][idx]
+            records.append(record)
+        return records
+
+    def columnar(self, rows: slice, current: int) -> Dict[str, Any]:
+        """``rows`` as scaled integer columns, with ``current`` located by its step from ``start``.
+
+        ``offsets`` (steps from ``start`` per point) is only written when the points are not
+        exactly one step apart.
+        """
+        epochs = self.epochs[rows]
+        base = epochs[0]
+        steps = np.rint((epochs - base) / COLUMNAR_STEP_SECONDS).astype("int64")
+        entry: Dict[str, Any] = {
+            "start": str(self.columns["timestamp"][rows][0]),
+            "values": {name: _scaled(self.columns[name][rows]) for name in COLUMNAR_FIELDS},
+            "current": {
+                "offset": int(round((self.epochs[current] - base) / COLUMNAR_STEP_SECONDS)),
+                "values": [_scaled(self.columns[name][current : current + 1])[0] for name in COLUMNAR_FIELDS],
+            },
+        }
+        if not np.array_equal(steps, np.arange(len(steps))):
+            entry["offsets"] = steps.tolist()
+        return entry
+
+    def csv_rows(self) -> Iterable[Tuple[Any, ...]]:
+        return zip([self.city] * len(self), *(self.columns[name].tolist() for name in HOURLY_CSV_HEADER[1:]))
+
+
+def _hourly_points(
     city: str,
-    timestamp: str,
-    temp_c: float,
-    humidity: float,
-    apparent_c: Optional[float],
+    hourly: Dict[str, List[Any]],
     tz: tzinfo,
-) -> Dict[str, Any]:
-    dt_local = datetime.fromisoformat(timestamp).replace(tzinfo=tz)
-    hi_f = compute_heat_index_f(temp_c, humidity)
-    hi_c = float(fahrenheit_to_celsius(hi_f))
-    point: Dict[str, Any] = {
-        "city": city,
-        "timestamp": dt_local.isoformat(),
-        "temperature_c": round(temp_c, 2),
-        "relative_humidity": round(humidity, 2),
-        "heat_index_f": round(hi_f, 2),
-        "heat_index_c": round(hi_c, 2),
-        "_dt": dt_local,
+    today: datetime,
+    axes: Dict[Tuple[str, ...], _TimeAxis],
+) -> HourlyPoints:
+    """Heat index for every valid hour of the exported days, computed over whole arrays."""
+    axis = _time_axis(hourly.get("time") or [], tz, axes)
+    size = len(axis.valid)
+    temps = _float_column(hourly.get("temperature_2m"), size)
+    humidity = _float_column(hourly.get("relative_humidity_2m"), size)
+    apparent = _float_column(hourly.get("apparent_temperature"), size)
+
+    first = np.datetime64((today - timedelta(days=PAST_DAYS)).date(), "D")
+    last = np.datetime64((today + timedelta(days=FORECAST_DAYS - 1)).date(), "D")
+    keep = axis.valid & ~np.isnan(temps) & ~np.isnan(humidity) & (axis.days >= first) & (axis.days <= last)
+    rows = axis.order[keep[axis.order]]
+
+    temps, humidity, apparent = temps[rows], humidity[rows], apparent[rows]
+    hi_f = compute_heat_index_f_array(temps, humidity)
+    hi_c = fahrenheit_to_celsius(hi_f)
+    apparent_out = round_like_format(apparent, 2).astype(object)
+    apparent_out[np.isnan(apparent)] = None
+    columns = {
+        "timestamp": axis.labels[rows],
+        "temperature_c": round_like_format(temps, 2),
+        "apparent_temperature_c": apparent_out,
+        "relative_humidity": round_like_format(humidity, 2),
+        "heat_index_f": round_like_format(hi_f, 2),
+        "heat_index_c": round_like_format(hi_c, 2),
     }
-    if apparent_c is not None:
-        point["apparent_temperature_c"] = round(apparent_c, 2)
-    return point
-
-
-def _build_points(city: str, hourly: Dict[str, List[Any]], tz: tzinfo) -> List[Dict[str, Any]]:
-    times = [str(ts) for ts in (hourly.get("time") or [])]
-    temps = hourly.get("temperature_2m") or []
-    humidity = hourly.get("relative_humidity_2m") or []
-    apparent = hourly.get("apparent_temperature") or []
-    points: List[Dict[str, Any]] = []
-    for idx, stamp in enumerate(times):
-        temp_c = _safe_float(temps, idx)
-        rh = _safe_float(humidity, idx)
-        if temp_c is None or rh is None:
+    return HourlyPoints(city, columns, axis.epochs[rows])
+
+
+def _covariate_rows(city: str, payload: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Daily rows shaped like the weather history, from the forecast's daily and hourly sections."""
+    hourly_metrics = list(DEFAULT_HOURLY)
+    summary = summarize_hourly(payload.get("hourly"), hourly_metrics, WEATHER_HOURLY_STATS)
+    return _build_daily_rows(
+        city,
+        payload.get("daily") or {},
+        list(DEFAULT_DAILY),
+        WEATHER_HOURLY_SUMMARY_COLUMNS,
+        summary,
+    )
+
+
+# Per city: the parsed points (None when nothing usable) and the fetch seconds of the
+# request chunk it came in (shared by every city of that chunk).
+_CityResult = Tuple[Optional[HourlyPoints], float]
+
+
+async def _collect(
+    cities: Sequence[Tuple[str, float, float]],
+    tz: tzinfo,
+    now_local: datetime,
+    logger,
+) -> List[Optional[_CityResult]]:
+    """Fetch every city's forecast and parse each response while the next ones are in flight."""
+    results: List[Optional[_CityResult]] = [None] * len(cities)
+    axes: Dict[Tuple[str, ...], _TimeAxis] = {}
+    responses = fetch_weather_forecast_async(
+        [_build_forecast_params(lat, lon) for _, lat, lon in cities],
+        max_concurrency=OPEN_METEO_MAX_WORKERS,
+        batch_size=OPEN_METEO_FORECAST_BATCH_SIZE,
+        rate_limiter=TokenBucket(OPEN_METEO_RATE_LIMIT_PER_SECOND, capacity=OPEN_METEO_MAX_WORKERS),
+        timeout=OPEN_METEO_TIMEOUT_SECONDS,
+        retries=OPEN_METEO_MAX_RETRIES,
+        queue_size=PIPELINE_QUEUE_SIZE,
+    )
+    async for idx, payload, seconds in responses:
+        name = cities[idx][0]
+        if isinstance(payload, OpenMeteoRequestError):
+            logger.error("Failed to fetch hourly data for {} (request chunk took {:.2f}s): {}", name, seconds, payload)
             continue
-        apparent_c = _safe_float(apparent, idx)
-        try:
-            point = _point_from_hour(city, stamp, temp_c, rh, apparent_c, tz)
-        except ValueError:
+        points: Optional[HourlyPoints] = _hourly_points(name, payload.get("hourly") or {}, tz, now_local, axes)
+        if not len(points):
+            logger.warning("No hourly samples available for {}", name)
+            points = None
+        else:
+            logger.info("Collected {} hourly points for {} (request chunk took {:.2f}s)", len(points), name, seconds)
+        results[idx] = (points, seconds)
+    return results
+
+
+def _covariates_due(now_local: datetime) -> bool:
+    """Whether the saved forecast covariates are missing, stale or from an earlier day."""
+    try:
+        written = datetime.fromtimestamp(Path(WEATHER_FORECAST_FILE).stat().st_mtime, now_local.tzinfo)
+    except OSError:
+        return True
+    return written.date() != now_local.date() or now_local - written >= timedelta(hours=COVARIATE_REFRESH_HOURS)
+
+
+async def _collect_covariates(cities: Sequence[Tuple[str, float, float]], logger) -> List[Dict[str, str]]:
+    """Daily covariate rows of every city from the wider covariate request."""
+    rows: List[Dict[str, str]] = []
+    responses = fetch_weather_forecast_async(
+        [_build_covariate_params(lat, lon) for _, lat, lon in cities],
+        max_concurrency=OPEN_METEO_MAX_WORKERS,
+        batch_size=OPEN_METEO_FORECAST_BATCH_SIZE,
+        rate_limiter=TokenBucket(OPEN_METEO_RATE_LIMIT_PER_SECOND, capacity=OPEN_METEO_MAX_WORKERS),
+        timeout=OPEN_METEO_TIMEOUT_SECONDS,
+        retries=OPEN_METEO_MAX_RETRIES,
+        queue_size=PIPELINE_QUEUE_SIZE,
+    )
+    async for idx, payload, _ in responses:
+        if isinstance(payload, OpenMeteoRequestError):
+            logger.error("Failed to fetch forecast covariates for {}: {}", cities[idx][0], payload)
             continue
-        points.append(point)
-    points.sort(key=lambda item: item["_dt"])
-    return points
+        rows.extend(_covariate_rows(cities[idx][0], payload))
+    return rows
 
 
-def _select_current_point(points: Sequence[Dict[str, Any]], now_local: datetime) -> Optional[Dict[str, Any]]:
-    if not points:
-        return None
-    past = [point for point in points if point["_dt"] <= now_local]
-    if past:
-        return past[-1]
-    return points[0]
+def _refresh_covariates(cities: Sequence[Tuple[str, float, float]], now_local: datetime, logger) -> None:
+    if not _covariates_due(now_local):
+        logger.info("Forecast covariates in {} are recent; not refetching them.", WEATHER_FORECAST_FILE)
+        return
+    covariate_rows = asyncio.run(_collect_covariates(cities, logger))
+    if not covariate_rows:
+        logger.warning("No forecast covariates collected; keeping {}", WEATHER_FORECAST_FILE)
+        return
+    with atomic_write(WEATHER_FORECAST_FILE, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=WEATHER_HISTORY_HEADER)
+        writer.writeheader()
+        writer.writerows(covariate_rows)
+    logger.info("Wrote {} daily forecast covariate rows to {}", len(covariate_rows), WEATHER_FORECAST_FILE)
 
 
-def _strip_dt(point: Dict[str, Any]) -> Dict[str, Any]:
-    point = dict(point)
-    point.pop("_dt", None)
-    return point
+def _log_latency(cities: Sequence[Tuple[str, float, float]], results: Sequence[Optional[_CityResult]], logger) -> None:
+    fetched = [(result[1], cities[idx][0]) for idx, result in enumerate(results) if result is not None]
+    if not fetched:
+        return
+    seconds = np.array([elapsed for elapsed, _ in fetched])
+    p50, p95 = np.percentile(seconds, [50, 95])
+    slowest, slowest_city = max(fetched)
+    logger.info(
+        "Fetch latency per request chunk (weighted by cities) p50={:.2f}s | p95={:.2f}s | max={:.2f}s (chunk with {})",
+        p50,
+        p95,
+        slowest,
+        slowest_city,
+    )
+
+
+def _write_columnar(payload: Dict[str, Any], generation: FileGeneration, logger) -> None:
+    """Stage the compact payload plus pre-compressed gzip (and brotli, when installed) siblings."""
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    path = Path(HOURLY_HEAT_INDEX_COLUMNAR_PUBLIC_FILE)
+    generation.write_bytes(path, body)
+    # mtime=0 keeps the gzip bytes identical for identical payloads.
+    compressed = {".gz": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressed[".br"] = brotli.compress(body, quality=11)
+    for suffix, data in compressed.items():
+        generation.write_bytes(path.with_name(path.name + suffix), data)
+    logger.info(
+        "Wrote columnar hourly summary to {} ({} bytes; {})",
+        path,
+        len(body),
+        ", ".join(f"{suffix[1:]} {len(data)} bytes" for suffix, data in compressed.items()),
+    )
 
 
 def _resolve_timezone(name: str, logger) -> tzinfo:
@@ -150,6 +439,55 @@ def _resolve_timezone(name: str, logger) -> tzinfo:
         return timezone(timedelta(hours=8), name="UTC+08:00")
 
 
+def _publish(
+    collected: Sequence[HourlyPoints],
+    summaries: List[Dict[str, Any]],
+    columnar: List[Dict[str, Any]],
+    logger,
+) -> None:
+    """Publish the hourly CSV and both public JSON payloads as one file generation."""
+    # The CSV and the public JSON files are staged first and published together, so the
+    # dashboard never reads a partial file. The renames land one at a time, so each JSON
+    # payload carries the generation id and the dashboard only trusts one whose id matches
+    # the manifest, which is replaced last.
+    with FileGeneration(HOURLY_HEAT_INDEX_GENERATION_FILE) as generation:
+        with generation.open(HOURLY_HEAT_INDEX_FILE, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(HOURLY_CSV_HEADER)
+            for points in collected:
+                writer.writerows(points.csv_rows())
+        logger.info("Wrote {} hourly rows to {}", sum(len(points) for points in collected), HOURLY_HEAT_INDEX_FILE)
+
+        payload = {
+            "generation": generation.generation,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "timezone": DEFAULT_TIMEZONE,
+            "unit": "celsius",
+            "cities": summaries,
+        }
+        with generation.open(HOURLY_HEAT_INDEX_PUBLIC_FILE, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, ensure_ascii=False, indent=2)
+        logger.info("Wrote public hourly summary to {}", HOURLY_HEAT_INDEX_PUBLIC_FILE)
+
+        _write_columnar(
+            {
+                "schema": COLUMNAR_SCHEMA,
+                "version": COLUMNAR_SCHEMA_VERSION,
+                "generation": generation.generation,
+                "generated_at": payload["generated_at"],
+                "timezone": DEFAULT_TIMEZONE,
+                "unit": "celsius",
+                "scale": COLUMNAR_SCALE,
+                "step_seconds": COLUMNAR_STEP_SECONDS,
+                "fields": list(COLUMNAR_FIELDS),
+                "cities": columnar,
+            },
+            generation,
+            logger,
+        )
+    logger.info("Published hourly generation {} ({})", generation.generation, HOURLY_HEAT_INDEX_GENERATION_FILE)
+
+
 def main() -> None:
     ensure_dirs()
     logger = get_logger(
@@ -166,70 +504,53 @@ def main() -> None:
 
     tz = _resolve_timezone(DEFAULT_TIMEZONE, logger)
     now_local = datetime.now(tz)
-    all_points: List[Dict[str, Any]] = []
+    collected: List[HourlyPoints] = []
     summaries: List[Dict[str, Any]] = []
+    columnar: List[Dict[str, Any]] = []
 
-    for name, lat, lon in cities:
-        params = _build_forecast_params(lat, lon)
-        try:
-            payload = fetch_weather_forecast(
-                params,
-                timeout=OPEN_METEO_TIMEOUT_SECONDS,
-                retries=OPEN_METEO_MAX_RETRIES,
-                cooldown=OPEN_METEO_REQUEST_COOLDOWN,
-            )
-        except OpenMeteoRequestError as exc:
-            logger.error("Failed to fetch hourly data for %s: %s", name, exc)
+    results = asyncio.run(_collect(cities, tz, now_local, logger))
+    for (name, lat, lon), result in zip(cities, results):
+        if result is None:
             continue
-
-        hourly_section = payload.get("hourly") or {}
-        points = _build_points(name, hourly_section, tz)
-        if not points:
-            logger.warning("No hourly samples available for %s", name)
+        points, _ = result
+        if points is None:
             continue
-
-        current_point = _select_current_point(points, now_local)
+        current = points.current_index(now_local)
+        exported = slice(max(len(points) - MAX_EXPORTED_HOURS, 0), None)
         summary = {
             "city": name,
             "latitude": lat,
             "longitude": lon,
-            "current": _strip_dt(current_point) if current_point else None,
-            "hourly": [_strip_dt(point) for point in points[-MAX_EXPORTED_HOURS:]],
+            "current": points.records([current])[0],
+            "hourly": points.records(exported),
         }
         summaries.append(summary)
-        all_points.extend(points)
-        logger.info("Collected %d hourly points for %s", len(points), name)
+        columnar.append({"city": name, "latitude": lat, "longitude": lon, **points.columnar(exported, current)})
+        collected.append(points)
 
-    if not all_points:
-        logger.warning("No hourly heat index data collected.")
-        return
-
-    header = [
-        "city",
-        "timestamp",
-        "temperature_c",
-        "apparent_temperature_c",
-        "relative_humidity",
-        "heat_index_f",
-        "heat_index_c",
-    ]
-    with open(HOURLY_HEAT_INDEX_FILE, "w", newline="", encoding="utf-8") as handle:
-        writer = csv.DictWriter(handle, fieldnames=header)
-        writer.writeheader()
-        for point in all_points:
-            writer.writerow({key: point.get(key) for key in header})
-    logger.info("Wrote %d hourly rows to %s", len(all_points), HOURLY_HEAT_INDEX_FILE)
+    _log_latency(cities, results, logger)
+    stats = connection_stats()
+    logger.info(
+        "HTTP requests={} | new connections={} | reused={}",
+        stats["requests"],
+        stats["new"],
+        stats["reused"],
+    )
+    cache_stats = response_cache_stats()
+    logger.info(
+        "Response cache hits={} | misses={} | bytes saved={} | evictions={}",
+        cache_stats["hits"],
+        cache_stats["misses"],
+        cache_stats["bytes_saved"],
+        cache_stats["evictions"],
+    )
 
-    payload = {
-        "generated_at": datetime.now(timezone.utc).isoformat(),
-        "timezone": DEFAULT_TIMEZONE,
-        "unit": "celsius",
-        "cities": summaries,
-    }
-    HOURLY_HEAT_INDEX_PUBLIC_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(HOURLY_HEAT_INDEX_PUBLIC_FILE, "w", encoding="utf-8") as handle:
-        json.dump(payload, handle, ensure_ascii=False, indent=2)
-    logger.info("Wrote public hourly summary to %s", HOURLY_HEAT_INDEX_PUBLIC_FILE)
+    if collected:
+        _publish(collected, summaries, columnar, logger)
+    else:
+        logger.warning("No hourly heat index data collected.")
+    # After publishing, so the hourly files are not held up by the covariate request.
+    _refresh_covariates(cities, now_local, logger)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+"""Refresh heat index forecasts from the saved model without retraining.
+
+Besides the held-out horizon, the days after the weather history are forecast recursively
+from the weather forecast covariates written by ``get_hourly_heat_index.py``.
+"""
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from xgboost.core import XGBoostError
+
+from constants.files import INFER_HEAT_INDEX_LOG_FILENAME
+from constants.path import HEAT_INDEX_MODEL_FILE, LOGS_DIR, ensure_dirs
+from predict_heat_index import (
+	_best_iteration,
+	_horizon_features,
+	_lag_buffer_size,
+	_last_dates,
+	_load_dataset,
+	_load_saved_model,
+	_write_future_forecast,
+	_write_predictions,
+)
+from utils.atomic import GenerationMismatchError
+from utils.lag_buffers import LagBuffers
+from utils.logger import get_logger
+
+
+def main() -> None:
+	ensure_dirs()
+	logger = get_logger(
+		name="infer_heat_index",
+		log_dir=str(LOGS_DIR),
+		log_filename=INFER_HEAT_INDEX_LOG_FILENAME,
+		use_case="data",
+	)
+	started = time.perf_counter()
+
+	model_path = Path(HEAT_INDEX_MODEL_FILE)
+	try:
+		saved = _load_saved_model()
+	except (XGBoostError, GenerationMismatchError) as exc:
+		logger.error("Could not load {} ({}). Run predict_heat_index.py to retrain.", model_path, exc)
+		return
+	if saved is None:
+		logger.error("Missing saved model or its metadata in {}. Run predict_heat_index.py first.", model_path.parent)
+		return
+	booster, meta = saved
+
+	# ``city_id`` must use the codes the booster was trained on, not today's category order.
+	categories = meta.get("categories")
+	data = _load_dataset()
+	if categories is None or set(data["city"].astype(str).unique()) != set(categories):
+		logger.error("Cities differ from the saved model's; run predict_heat_index.py to retrain.")
+		return
+	data["city"] = pd.Categorical(data["city"].astype(str), categories=categories)
+	data.sort_values(["city", "date"], kind="stable", inplace=True, ignore_index=True)
+	forecast, feature_cols = _horizon_features(data)
+	if feature_cols != meta.get("feature_columns"):
+		logger.error("Feature columns differ from the saved model's; run predict_heat_index.py to retrain.")
+		return
+	if forecast.empty:
+		logger.error("No forecast rows available; skipping prediction export.")
+		return
+
+	booster.set_param({"device": "cpu"})
+	features = forecast[feature_cols].to_numpy()
+	forecast_pred = booster.inplace_predict(features, iteration_range=(0, _best_iteration(booster) + 1))
+	_write_predictions(
+		forecast["city"].to_numpy(),
+		forecast["date"].to_numpy(),
+		forecast["heat_index"].to_numpy(),
+		np.asarray(forecast_pred),
+		logger,
+	)
+	buffers = LagBuffers.from_frame(data, "city", "heat_index", _lag_buffer_size())
+	_write_future_forecast(booster, buffers, _last_dates(data), categories, feature_cols, logger)
+	logger.info(
+		"Refreshed forecasts with the {} model trained at {} in {:.2f}s",
+		meta.get("mode", "saved"),
+		meta.get("trained_at"),
+		time.perf_counter() - started,
+	)
+
+
+if __name__ == "__main__":
+	main()
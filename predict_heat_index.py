@@ -1,16 +1,20 @@
 from __future__ import annotations
 
+import argparse
+import json
 import math
 import os
 import subprocess
+import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Tuple, cast
+from typing import Any, Dict, List, Sequence, Tuple, cast
 
 import numpy as np
 import pandas as pd
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from xgboost import XGBRegressor
+from xgboost import Booster, XGBRegressor
+from xgboost.callback import TrainingCallback
 from xgboost.core import XGBoostError
 
 try:
@@ -29,20 +33,46 @@ from constants.model import (
     HEAT_INDEX_NUMERIC_COLUMNS,
 )
 from constants.path import (
+	HEAT_INDEX_FEATURE_STORE_DIR,
+	HEAT_INDEX_FORECAST_FILE,
+	HEAT_INDEX_FORECAST_PARQUET_FILE,
 	HEAT_INDEX_MODEL_FILE,
+	HEAT_INDEX_MODEL_META_FILE,
 	HEAT_INDEX_PREDICTIONS_FILE,
+	HEAT_INDEX_PREDICTIONS_PARQUET_FILE,
+	HEAT_INDEX_TUNING_PROFILE_FILE,
 	LOGS_DIR,
+	WEATHER_FORECAST_FILE,
 	WEATHER_HEAT_INDEX_FILE,
+	WEATHER_HEAT_INDEX_PARQUET_FILE,
+	WEATHER_HEAT_INDEX_PARTITIONS_DIR,
 	WEATHER_HISTORY_FILE,
+	WEATHER_HISTORY_PARQUET_FILE,
+	WEATHER_HISTORY_PARTITIONS_DIR,
 	ensure_dirs,
 )
+from constants.weather import WEATHER_CLEAN_CONTEXT_DAYS, WEATHER_REFRESH_OVERLAP_DAYS
+from utils.atomic import FileGeneration, GenerationMismatchError, atomic_path, read_generation
+from utils.columnar import read_table, write_columnar
+from utils.feature_store import (
+	FeatureStore,
+	config_fingerprint,
+	extend_feature_store,
+	source_fingerprint,
+	write_feature_store,
+)
+from utils.lag_buffers import LagBuffers
 from utils.logger import get_logger
+from utils.partition import first_partition_dates, load_partitions, partition_rebuild_id, partitions_match_source
 from utils.units import fahrenheit_to_celsius
+from utils.windows import iter_window_history, lag_values, window_stats
 
 FEATURE_CONF = HEAT_INDEX_FEATURE_CONFIG
 TRAIN_LIMITS = HEAT_INDEX_TRAINING_LIMITS
 BASE_PARAMS = HEAT_INDEX_BASE_PARAMS
 BASE_NUMERIC = list(HEAT_INDEX_NUMERIC_COLUMNS)
+# Bump when the feature engineering code changes so cached feature stores are rebuilt.
+FEATURE_STORE_VERSION = 3
 
 
 def _run_command(args: List[str]) -> str | None:
@@ -89,18 +119,21 @@ def _system_stats() -> Dict[str, Any]:
 	return stats
 
 
-def _write_metrics_log(rmse: float, mae: float, r2: float) -> None:
+def _write_metrics_log(rmse: float, mae: float, r2: float, best_iteration: int, trees: int, stopped: str) -> None:
 	metrics_path = Path(LOGS_DIR) / METRICS_LOG_FILENAME
 	metrics_path.parent.mkdir(parents=True, exist_ok=True)
 	timestamp = datetime.now(timezone.utc).isoformat()
-	line = f"{timestamp},rmse={rmse:.4f},mae={mae:.4f},r2={r2:.4f}"
+	line = (
+		f"{timestamp},rmse={rmse:.4f},mae={mae:.4f},r2={r2:.4f},"
+		f"best_iteration={best_iteration},trees={trees},stopped={stopped}"
+	)
 	with open(metrics_path, "a", encoding="utf-8") as handle:
 		handle.write(line + "\n")
 
 
 def _load_dataset() -> pd.DataFrame:
-	weather = pd.read_csv(WEATHER_HISTORY_FILE, parse_dates=["date"])
-	heat = pd.read_csv(WEATHER_HEAT_INDEX_FILE, parse_dates=["date"])
+	weather = read_table(WEATHER_HISTORY_FILE, WEATHER_HISTORY_PARQUET_FILE, categories=["city"])
+	heat = read_table(WEATHER_HEAT_INDEX_FILE, WEATHER_HEAT_INDEX_PARQUET_FILE, categories=["city"])
 	merged = weather.merge(heat, on=["city", "date"], how="inner", validate="one_to_one")
 	merged.sort_values(["city", "date"], inplace=True)
 	return merged.reset_index(drop=True)
@@ -131,24 +164,56 @@ def _add_weather_features(frame: pd.DataFrame) -> None:
 
 
 
+def _rolling_windows() -> List[int]:
+	return [int(window) for window in FEATURE_CONF.get("rolling_windows", [7])]
+
+
+def _lag_buffer_size() -> int:
+	return max([int(FEATURE_CONF.get("max_lag_days", 7)), *_rolling_windows()])
+
+
 def _add_lag_features(frame: pd.DataFrame) -> None:
+	"""Add heat index lags and trailing-window statistics from the preceding days of each city."""
+	codes = frame["city"].astype("category").cat.codes.to_numpy()
+	values = frame["heat_index"].to_numpy(dtype="float64", na_value=np.nan)
+	columns: Dict[str, np.ndarray] = {}
+	# Chunked so the (rows x largest window) history is never materialized at once.
+	for positions, history in iter_window_history(values, codes, _lag_buffer_size()):
+		for name, column in _history_features(history).items():
+			columns.setdefault(name, np.empty(len(frame)))[positions] = column
+	for name, column in columns.items():
+		frame[name] = column
+
+
+def _history_features(history: np.ndarray) -> Dict[str, np.ndarray]:
+	"""The lag and rolling columns from ``history``, each row's preceding values oldest first."""
 	max_lag = int(FEATURE_CONF.get("max_lag_days", 7))
-	window = int(FEATURE_CONF.get("rolling_window_days", 7))
-	grouped = frame.groupby("city", sort=False, observed=True)
-	for lag in range(1, max_lag + 1):
-		frame[f"heat_index_lag_{lag}"] = grouped["heat_index"].shift(lag)
+	stats = list(FEATURE_CONF.get("rolling_stats", ["mean"]))
+	columns = {f"heat_index_lag_{lag}": lag_values(history, lag) for lag in range(1, max_lag + 1)}
+	for window in _rolling_windows():
+		for stat, values in window_stats(history, window, stats).items():
+			columns[f"heat_index_roll_{stat}_{window}"] = values
+	return columns
+
 
-	def _rolling_mean(series: pd.Series) -> pd.Series:
-		return series.shift(1).rolling(window=window, min_periods=1).mean()
+def _add_history_features(frame: pd.DataFrame, history: np.ndarray) -> None:
+	for name, column in _history_features(history).items():
+		frame[name] = column
 
-	frame["heat_index_roll_mean_7"] = grouped["heat_index"].transform(_rolling_mean)
 
+def _build_feature_matrix(frame: pd.DataFrame, history: np.ndarray | None = None) -> Tuple[pd.DataFrame, List[str]]:
+	"""Engineer the feature rows of ``frame``, dropping rows with a missing input.
 
-def _build_feature_matrix(frame: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+	Lags come from ``history`` when given (each row's preceding heat index values, see
+	``LagBuffers.push``), otherwise from the preceding rows of the same city in ``frame``.
+	"""
 	_add_time_features(frame)
 	_add_city_features(frame)
 	_add_weather_features(frame)
-	_add_lag_features(frame)
+	if history is None:
+		_add_lag_features(frame)
+	else:
+		_add_history_features(frame, history)
 
 	excluded = {"city", "date", "heat_index"}
 	numeric_cols = [col for col in frame.columns if col not in excluded]
@@ -163,31 +228,323 @@ def _build_feature_matrix(frame: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]
 	return cleaned, numeric_cols
 
 
-def _split_forecast_horizon(frame: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+def _split_forecast_horizon(frame: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+	"""Return (trainable, forecast) row positions; forecast rows are the last days per city."""
 	horizon = int(FEATURE_CONF.get("forecast_horizon_days", 14))
+	positions = np.arange(len(frame))
 	if horizon <= 0:
-		return frame.copy(), pd.DataFrame(columns=frame.columns)
-	grouped = frame.groupby("city", group_keys=False, observed=True)
-	forecast = grouped.tail(horizon).copy()
-	forecast.sort_values(["city", "date"], inplace=True)
-	trainable = frame.drop(forecast.index).copy()
-	return trainable, forecast
+		return positions, positions[:0]
+	from_end = frame.groupby("city", observed=True).cumcount(ascending=False).to_numpy()
+	forecast = positions[from_end < horizon]
+	codes = frame["city"].cat.codes.to_numpy()[forecast]
+	forecast = forecast[np.lexsort((frame["date"].to_numpy()[forecast], codes))]
+	return positions[from_end >= horizon], forecast
 
 
-def _train_valid_split(frame: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+def _train_valid_split(frame: pd.DataFrame, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+	"""Split ``positions`` into (train, valid) row positions by date."""
 	validation_days = int(FEATURE_CONF.get("validation_days", 90))
-	split_date = frame["date"].max() - pd.Timedelta(days=validation_days)
-	train = cast(pd.DataFrame, frame.loc[frame["date"] < split_date].copy())
-	valid = cast(pd.DataFrame, frame.loc[frame["date"] >= split_date].copy())
-	if train.empty or valid.empty:
+	dates = frame["date"].iloc[positions]
+	split_date = dates.max() - pd.Timedelta(days=validation_days)
+	train = positions[(dates < split_date).to_numpy()]
+	valid = positions[(dates >= split_date).to_numpy()]
+	if not len(train) or not len(valid):
 		fraction = float(FEATURE_CONF.get("fallback_split_fraction", 0.8))
-		cutoff = int(len(frame) * fraction)
-		train = cast(pd.DataFrame, frame.iloc[:cutoff].copy())
-		valid = cast(pd.DataFrame, frame.iloc[cutoff:].copy())
+		cutoff = int(len(positions) * fraction)
+		train, valid = positions[:cutoff], positions[cutoff:]
 	return train, valid
 
 
+def _horizon_features(data: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+	"""Build the feature rows of the forecast horizon without engineering the full history.
+
+	Features are computed over the last ``horizon + lag buffer`` days of each city; the
+	window doubles until every city has ``horizon`` complete rows whose lags lie inside
+	it (or its whole history is included), so the rows match the training run's forecast
+	block exactly. ``data`` must be sorted by city and date as from ``_load_dataset``.
+	"""
+	horizon = int(FEATURE_CONF.get("forecast_horizon_days", 14))
+	lookback = _lag_buffer_size()
+	city_count = len(data["city"].cat.categories)
+	codes = data["city"].cat.codes.to_numpy()
+	rows_per_city = np.bincount(codes[codes >= 0], minlength=city_count)
+	from_end = data.groupby("city", observed=True).cumcount(ascending=False).to_numpy()
+	context = horizon + lookback
+	while True:
+		keep = from_end < context
+		subset = data.loc[keep].reset_index(drop=True)
+		features, feature_cols = _build_feature_matrix(subset)
+		# Rows at least ``lookback`` days into the window have the same lags as in the full history.
+		exact = from_end[keep][features.index.to_numpy()] < context - lookback
+		whole = rows_per_city <= context
+		exact |= whole[features["city"].cat.codes.to_numpy()]
+		features = features.loc[exact].reset_index(drop=True)
+		complete = np.bincount(features["city"].cat.codes.to_numpy(), minlength=city_count)
+		if np.all((complete >= horizon) | whole):
+			break
+		context *= 2
+	_, forecast = _split_forecast_horizon(features)
+	return features.iloc[forecast].reset_index(drop=True), feature_cols
+
+
+def _split_blocks(frame: pd.DataFrame, logger) -> Dict[str, np.ndarray]:
+	"""Return the train, valid and forecast row positions of a frame sorted by city and date."""
+	trainable, forecast = _split_forecast_horizon(frame)
+	if not len(trainable):
+		logger.warning("Not enough rows after reserving forecast horizon; training on full dataset instead.")
+		trainable = np.arange(len(frame))
+	train, valid = _train_valid_split(frame, trainable)
+	return {"train": train, "valid": valid, "forecast": forecast}
+
+
+def _feature_config_fingerprint() -> str:
+	return config_fingerprint({"version": FEATURE_STORE_VERSION, "features": FEATURE_CONF, "numeric": BASE_NUMERIC})
+
+
+def _feature_store_key() -> str:
+	sources = source_fingerprint([WEATHER_HISTORY_FILE, WEATHER_HEAT_INDEX_FILE])
+	return f"{sources[:32]}{_feature_config_fingerprint()[:32]}"
+
+
+def _first_dates(data: pd.DataFrame) -> Dict[str, str]:
+	first_dates = data.groupby("city", observed=True)["date"].min()
+	return {str(city): date.strftime("%Y-%m-%d") for city, date in first_dates.items()}
+
+
+def _last_dates(data: pd.DataFrame) -> Dict[str, str]:
+	last_dates = data.groupby("city", observed=True)["date"].max()
+	return {str(city): date.strftime("%Y-%m-%d") for city, date in last_dates.items()}
+
+
+def _anchor_dates(last_dates: Dict[str, str]) -> Dict[str, str]:
+	"""Each city's last day before the overlap days a weather refresh may still revise."""
+	overlap = pd.Timedelta(days=WEATHER_REFRESH_OVERLAP_DAYS)
+	return {city: (pd.Timestamp(day) - overlap).strftime("%Y-%m-%d") for city, day in last_dates.items()}
+
+
+def _city_dates(frame: pd.DataFrame, dates: Dict[str, str]) -> pd.Series:
+	return pd.to_datetime(frame["city"].astype(str).map(dates))
+
+
+def _partition_rebuild() -> str | None:
+	"""The weather partitions' rebuild id, or None when either partitioned dataset is stale."""
+	if not partitions_match_source(WEATHER_HISTORY_PARTITIONS_DIR, WEATHER_HISTORY_FILE):
+		return None
+	if not partitions_match_source(WEATHER_HEAT_INDEX_PARTITIONS_DIR, WEATHER_HEAT_INDEX_FILE):
+		return None
+	return partition_rebuild_id(WEATHER_HISTORY_PARTITIONS_DIR)
+
+
+def _load_partitioned(start: str | None = None, end: str | None = None) -> pd.DataFrame:
+	"""The merged rows dated ``start``..``end``, read from the city/year partitions like ``_load_dataset``."""
+	weather = load_partitions(WEATHER_HISTORY_PARTITIONS_DIR, start=start, end=end)
+	heat = load_partitions(WEATHER_HEAT_INDEX_PARTITIONS_DIR, start=start, end=end, columns=["heat_index"])
+	weather["city"] = weather["city"].astype(str)
+	heat["city"] = heat["city"].astype(str)
+	merged = weather.merge(heat, on=["city", "date"], how="inner", validate="one_to_one")
+	merged.sort_values(["city", "date"], inplace=True)
+	return merged.reset_index(drop=True)
+
+
+def _history_state(data: pd.DataFrame) -> Dict[str, Any]:
+	# What ``_update_features`` needs instead of the history: each city's first and last day,
+	# its lag buffers before the overlap days (the anchor the tail is recomputed from) and at
+	# its last day (for the recursive forecast), and the partition rebuild the rows came from.
+	size = _lag_buffer_size()
+	last_dates = _last_dates(data)
+	anchored = (data["date"] <= _city_dates(data, _anchor_dates(last_dates))).to_numpy()
+	return {
+		"config": _feature_config_fingerprint(),
+		"partition_rebuild": _partition_rebuild(),
+		"first_dates": _first_dates(data),
+		"last_dates": last_dates,
+		"anchor_buffers": LagBuffers.from_frame(data.loc[anchored], "city", "heat_index", size).to_state(),
+		"lag_buffers": LagBuffers.from_frame(data, "city", "heat_index", size).to_state(),
+	}
+
+
+def _head_cuts(head: pd.DataFrame) -> Dict[str, str] | None:
+	"""Each city's last row whose lags may reach a re-cleaned day; None if ``head`` ends before it.
+
+	A refresh re-cleans each city's first ``WEATHER_CLEAN_CONTEXT_DAYS``, which moves every
+	lag window that reaches them. ``head`` must start at each city's first row.
+	"""
+	size = _lag_buffer_size()
+	context = pd.Timedelta(days=WEATHER_CLEAN_CONTEXT_DAYS)
+	cuts: Dict[str, str] = {}
+	for city, dates in head.groupby("city", observed=True)["date"]:
+		recleaned = int((dates < dates.iloc[0] + context).sum())
+		if len(dates) < recleaned + size:
+			return None
+		cuts[str(city)] = dates.iloc[recleaned + size - 1].strftime("%Y-%m-%d")
+	return cuts
+
+
+def _update_features(store: FeatureStore, key: str, logger) -> FeatureStore | None:
+	"""Recompute each city's head and tail rows and copy the rows between them from ``store``.
+
+	An incremental weather refresh trims days before the lookback window, re-cleans each
+	city's first ``WEATHER_CLEAN_CONTEXT_DAYS`` and revises or appends days after the stored
+	anchor (see ``_history_state``); other rows keep their bytes. Head rows come from the
+	start of each city's history up to ``_head_cuts``, tail rows from the anchor lag buffers,
+	and both are read from the city/year partitions, so the feature work scales with those
+	days rather than with the history. Returns None when the store cannot be updated (other
+	settings or cities, stale partitions or a full partition rewrite since the store was
+	built), in which case the caller rebuilds it.
+	"""
+	state = store.state
+	size = _lag_buffer_size()
+	categories = store.categories
+	last_dates = state.get("last_dates") or {}
+	rebuild = _partition_rebuild()
+	anchor = LagBuffers.from_state(size, state.get("anchor_buffers") or {})
+	if (
+		state.get("config") != _feature_config_fingerprint()
+		or state.get("rows") != store.manifest["rows"]
+		or rebuild is None
+		or state.get("partition_rebuild") != rebuild
+		or anchor is None
+		or set(last_dates) != set(categories)
+	):
+		return None
+
+	anchor_dates = _anchor_dates(last_dates)
+	tail_start = (pd.Timestamp(min(anchor_dates.values())) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+	tail = _load_partitioned(start=tail_start)
+	tail = tail.loc[(tail["date"] > _city_dates(tail, anchor_dates)).to_numpy()].reset_index(drop=True)
+	new_last_dates = _last_dates(tail)
+	if set(new_last_dates) != set(categories):
+		return None
+	new_anchor_dates = _anchor_dates(new_last_dates)
+	if any(new_anchor_dates[city] < anchor_dates[city] for city in categories):
+		return None
+
+	# The head is read with twice the lag window of margin for missing days.
+	first_dates = first_partition_dates(WEATHER_HISTORY_PARTITIONS_DIR)
+	head_end = pd.Timestamp(max(first_dates.values())) + pd.Timedelta(days=WEATHER_CLEAN_CONTEXT_DAYS + 2 * size)
+	head = _load_partitioned(end=head_end.strftime("%Y-%m-%d"))
+	cuts = _head_cuts(head)
+	if cuts is None or set(cuts) != set(categories) or any(cuts[city] >= anchor_dates[city] for city in categories):
+		return None
+	head = head.loc[(head["date"] <= _city_dates(head, cuts)).to_numpy()].reset_index(drop=True)
+
+	head["city"] = pd.Categorical(head["city"], categories=categories)
+	tail["city"] = pd.Categorical(tail["city"], categories=categories)
+	tail_cities = tail["city"].astype(str).to_numpy()
+	tail_values = tail["heat_index"].to_numpy(dtype="float64", na_value=np.nan)
+	buffers = LagBuffers.from_state(size, state["anchor_buffers"])
+	history = buffers.push(tail_cities, tail_values)
+	anchored = (tail["date"] <= _city_dates(tail, new_anchor_dates)).to_numpy()
+	anchor.push(tail_cities[anchored], tail_values[anchored])
+
+	head_features, head_cols = _build_feature_matrix(head)
+	tail_features, tail_cols = _build_feature_matrix(tail, history)
+	if head_cols != store.feature_columns or tail_cols != store.feature_columns:
+		return None
+	features = pd.concat([head_features, tail_features], ignore_index=True)
+
+	stored = int(store.manifest["rows"])
+	stored_dates = np.asarray(store.dates)
+	stored_codes = np.asarray(store.city_codes)
+	lower = pd.to_datetime(pd.Series(categories).map(cuts)).to_numpy(dtype="datetime64[ns]")[stored_codes]
+	upper = pd.to_datetime(pd.Series(categories).map(anchor_dates)).to_numpy(dtype="datetime64[ns]")[stored_codes]
+	kept = np.flatnonzero((stored_dates > lower) & (stored_dates <= upper))
+	new_codes = np.asarray(features["city"].cat.codes, dtype=np.int32)
+	rows = pd.DataFrame(
+		{
+			"city": pd.Categorical.from_codes(np.concatenate([stored_codes[kept], new_codes]), categories),
+			"date": np.concatenate([stored_dates[kept], features["date"].to_numpy(dtype="datetime64[ns]")]),
+			"source": np.concatenate([kept, stored + np.arange(len(features))]),
+		}
+	)
+	rows.sort_values(["city", "date"], kind="stable", inplace=True, ignore_index=True)
+	source = rows["source"].to_numpy()
+	blocks = {name: source[positions] for name, positions in _split_blocks(rows, logger).items()}
+	# Training rows stay in stored order, so the unchanged middle is copied as contiguous runs.
+	blocks["train"] = np.sort(blocks["train"])
+	state = {
+		"config": _feature_config_fingerprint(),
+		"partition_rebuild": rebuild,
+		"first_dates": _first_dates(head),
+		"last_dates": new_last_dates,
+		"anchor_buffers": anchor.to_state(),
+		"lag_buffers": buffers.to_state(),
+		"rows": int(sum(len(positions) for positions in blocks.values())),
+	}
+	updated = extend_feature_store(
+		store,
+		key,
+		features,
+		blocks,
+		target_col="heat_index",
+		date_col="date",
+		city_col="city",
+		state=state,
+	)
+	logger.info(
+		"Recomputed features for {} head and {} tail rows and kept {} stored rows in {}",
+		len(head_features),
+		len(tail_features),
+		len(kept),
+		HEAT_INDEX_FEATURE_STORE_DIR,
+	)
+	return updated
+
+
+def _prepare_feature_store(logger) -> FeatureStore:
+	"""Open the cached feature store, updating or rebuilding it when the inputs changed.
+
+	Rows are laid out as contiguous train, validation and forecast blocks, so every split is
+	a view into the memory-mapped matrix. After an incremental weather refresh only the head
+	and tail days of each city are read and engineered (see ``_update_features``); the
+	other rows are copied from the previous store.
+	"""
+	key = _feature_store_key()
+	store = FeatureStore.open(HEAT_INDEX_FEATURE_STORE_DIR, key)
+	if store is not None:
+		logger.info("Reusing cached features from {}", HEAT_INDEX_FEATURE_STORE_DIR)
+		return store
+
+	previous = FeatureStore.open(HEAT_INDEX_FEATURE_STORE_DIR)
+	if previous is not None:
+		updated = _update_features(previous, key, logger)
+		if updated is not None:
+			return updated
+
+	data = _load_dataset()
+	logger.info("Loaded {} merged rows", len(data))
+	state = _history_state(data)
+	feature_frame, feature_cols = _build_feature_matrix(data)
+	del data
+	logger.info("Prepared {} rows with {} features", len(feature_frame), len(feature_cols))
+	state["rows"] = len(feature_frame)
+	store = write_feature_store(
+		HEAT_INDEX_FEATURE_STORE_DIR,
+		key,
+		feature_frame,
+		feature_cols,
+		_split_blocks(feature_frame, logger),
+		target_col="heat_index",
+		date_col="date",
+		city_col="city",
+		state=state,
+	)
+	logger.info("Cached features to {}", HEAT_INDEX_FEATURE_STORE_DIR)
+	return store
+
+
+def _read_tuning_profile() -> Dict[str, Any] | None:
+	"""The search result saved by ``predict_heat_index.py tune``, if any."""
+	try:
+		with open(HEAT_INDEX_TUNING_PROFILE_FILE, encoding="utf-8") as handle:
+			profile = json.load(handle)
+	except (OSError, ValueError):
+		return None
+	return profile if isinstance(profile.get("params"), dict) else None
+
+
 def _training_params(stats: Dict[str, float | int | None], n_rows: int) -> Dict[str, float | int | str]:
+	"""Parameters for ``n_rows`` training rows; a tuning profile overrides depth, learning rate and subsample."""
 	logical_cpus = int(stats.get("logical_cpus", 4) or 4)
 	limits = TRAIN_LIMITS
 	large_threshold = int(limits.get("large_dataset_rows", 30000))
@@ -211,10 +568,45 @@ def _training_params(stats: Dict[str, float | int | None], n_rows: int) -> Dict[
 		"learning_rate": learning_rate,
 		"subsample": subsample,
 		"n_jobs": logical_cpus,
+		"early_stopping_rounds": int(limits.get("early_stopping_rounds", 0) or 0) or None,
 	}
+	profile = _read_tuning_profile()
+	if profile is not None:
+		tuned = profile["params"]
+		for name, cast_value in (("max_depth", int), ("learning_rate", float), ("subsample", float)):
+			if tuned.get(name) is not None:
+				params[name] = cast_value(tuned[name])
 	return params
 
 
+class _TimeBudget(TrainingCallback):
+	"""Stop boosting once ``seconds`` of wall-clock time have passed."""
+
+	def __init__(self, seconds: float) -> None:
+		super().__init__()
+		self.seconds = seconds
+		self.exhausted = False
+		self._deadline = 0.0
+
+	def before_training(self, model):
+		self._deadline = time.monotonic() + self.seconds
+		return model
+
+	def after_iteration(self, model, epoch: int, evals_log) -> bool:
+		self.exhausted = time.monotonic() >= self._deadline
+		return self.exhausted
+
+
+def _best_iteration(booster: Booster) -> int:
+	"""Index of the best tree round, falling back to the last one without early stopping."""
+	value = booster.attr("best_iteration")
+	return int(value) if value is not None else booster.num_boosted_rounds() - 1
+
+
+def _predict(model: XGBRegressor, features: np.ndarray) -> np.ndarray:
+	return model.predict(features, iteration_range=(0, _best_iteration(model.get_booster()) + 1))
+
+
 def _fit_model(
 	params: Dict[str, float | int | str],
 	X_train: np.ndarray,
@@ -222,16 +614,39 @@ def _fit_model(
 	X_valid: np.ndarray,
 	y_valid: np.ndarray,
 	logger,
-) -> Tuple[XGBRegressor, Dict[str, float | int | str]]:
-	model = XGBRegressor(**params)
-	try:
+	xgb_model: Booster | None = None,
+) -> Tuple[XGBRegressor, Dict[str, float | int | str], str]:
+	"""Fit with early stopping and the optional time budget; returns (model, params, stop reason).
+
+	The stop reason is ``"budget"``, ``"early"`` or ``"complete"``. The best iteration is
+	stored as a booster attribute, so it is saved with the model.
+	"""
+	budget_seconds = float(TRAIN_LIMITS.get("time_budget_seconds") or 0.0)
+	target_rounds = int(params["n_estimators"]) + (xgb_model.num_boosted_rounds() if xgb_model is not None else 0)
+
+	def _fit(fit_params: Dict[str, float | int | str]) -> Tuple[XGBRegressor, str]:
+		budget = _TimeBudget(budget_seconds) if budget_seconds > 0 else None
+		model = XGBRegressor(**fit_params, callbacks=[budget] if budget else None)
 		model.fit(
 			X_train,
 			y_train,
 			eval_set=[(X_valid, y_valid)],
 			verbose=100,
+			xgb_model=xgb_model,
 		)
-		return model, params
+		booster = model.get_booster()
+		if budget is not None and budget.exhausted:
+			stopped = "budget"
+		elif booster.num_boosted_rounds() < target_rounds:
+			stopped = "early"
+		else:
+			stopped = "complete"
+		booster.set_attr(best_iteration=str(_best_iteration(booster)))
+		return model, stopped
+
+	try:
+		model, stopped = _fit(params)
+		return model, params, stopped
 	except XGBoostError as exc:
 		message = str(exc).lower()
 		if any(token in message for token in ("gpu", "cuda", "device")):
@@ -242,17 +657,249 @@ def _fit_model(
 				"predictor": "auto",
 				"device": "cpu",
 			}
-			model = XGBRegressor(**cpu_params)
-			model.fit(
-				X_train,
-				y_train,
-				eval_set=[(X_valid, y_valid)],
-				verbose=100,
-			)
-			return model, cpu_params
+			model, stopped = _fit(cpu_params)
+			return model, cpu_params, stopped
 		raise
 
 
+def _read_model_meta() -> Dict[str, Any] | None:
+	try:
+		with open(HEAT_INDEX_MODEL_META_FILE, encoding="utf-8") as handle:
+			return json.load(handle)
+	except (OSError, ValueError):
+		return None
+
+
+def _load_saved_model() -> Tuple[Booster, Dict[str, Any]] | None:
+	"""Load the saved booster together with the metadata of the same generation.
+
+	Returns None when either file is missing. The booster's ``generation`` attribute must
+	match the metadata's, so a read that lands between the two renames of a publish is
+	retried; raises ``GenerationMismatchError`` if they never line up and ``XGBoostError``
+	when the model cannot be parsed.
+	"""
+	def read() -> Tuple[Booster, Dict[str, Any]] | None:
+		meta = _read_model_meta()
+		if meta is None or not Path(HEAT_INDEX_MODEL_FILE).exists():
+			return None
+		booster = Booster()
+		booster.load_model(HEAT_INDEX_MODEL_FILE)
+		return booster, meta
+
+	def stamps(loaded: Tuple[Booster, Dict[str, Any]] | None) -> List[str | None]:
+		if loaded is None:
+			return []
+		return [loaded[0].attr("generation"), loaded[1].get("generation")]
+
+	return read_generation(read, stamps)
+
+
+def _write_model_meta(meta: Dict[str, Any], generation: FileGeneration) -> None:
+	with generation.open(HEAT_INDEX_MODEL_META_FILE, encoding="utf-8") as handle:
+		json.dump(meta, handle, indent=2)
+
+
+def _rmse(y_true: np.ndarray, y_pred: np.ndarray) -> float:
+	return math.sqrt(float(mean_squared_error(y_true, y_pred)))
+
+
+def _warm_start_base(
+	feature_cols: List[str],
+	categories: List[str],
+	X_valid: np.ndarray,
+	y_valid: np.ndarray,
+	logger,
+) -> Tuple[Booster, Dict[str, Any], float] | None:
+	"""Return (booster, meta, current validation RMSE) of the saved model if it may be continued.
+
+	A full retrain is due when warm starts are disabled, there is no compatible saved model
+	(same feature columns and ``city_id`` categories), the last full retrain is ``full_retrain_days`` old, or the saved model's RMSE on today's
+	validation rows drifted past ``warm_start_max_drift`` of the last full retrain's.
+	"""
+	if not TRAIN_LIMITS.get("warm_start", False) or not len(X_valid):
+		return None
+	try:
+		saved = _load_saved_model()
+	except (XGBoostError, GenerationMismatchError) as exc:
+		logger.warning("Could not load saved model ({}); running a full retrain.", exc)
+		return None
+	if saved is None:
+		logger.info("No saved model metadata; running a full retrain.")
+		return None
+	booster, meta = saved
+	if meta.get("feature_columns") != feature_cols:
+		logger.info("Feature columns changed since the saved model; running a full retrain.")
+		return None
+	# ``city_id`` is the city's position in ``categories``; the saved trees split on those codes.
+	if meta.get("categories") != categories:
+		logger.info("Cities changed since the saved model; running a full retrain.")
+		return None
+	if meta.get("tuning_profile") != (_read_tuning_profile() or {}).get("tuned_at"):
+		logger.info("Tuning profile changed since the saved model; running a full retrain.")
+		return None
+	try:
+		full_trained_at = datetime.fromisoformat(meta["full_trained_at"])
+		full_rmse = float(meta["full_valid_rmse"])
+	except (KeyError, TypeError, ValueError):
+		return None
+	age_days = (datetime.now(timezone.utc) - full_trained_at).total_seconds() / 86400.0
+	if age_days >= float(TRAIN_LIMITS.get("full_retrain_days", 7)):
+		logger.info("Last full retrain was {:.1f} days ago; running a scheduled full retrain.", age_days)
+		return None
+
+	# Continue from the best round; trees boosted past it only fit the previous window's noise.
+	booster = booster[: _best_iteration(booster) + 1]
+	baseline = _rmse(y_valid, booster.inplace_predict(X_valid))
+	max_drift = float(TRAIN_LIMITS.get("warm_start_max_drift", 0.05))
+	if baseline > full_rmse * (1.0 + max_drift):
+		logger.info(
+			"Saved model RMSE {:.3f} drifted past {:.3f} (last full retrain {:.3f}); running a full retrain.",
+			baseline,
+			full_rmse * (1.0 + max_drift),
+			full_rmse,
+		)
+		return None
+	return booster, meta, baseline
+
+
+def _write_predictions(
+	cities: Any,
+	dates: np.ndarray,
+	actual_f: np.ndarray,
+	pred_f: np.ndarray,
+	logger,
+) -> None:
+	"""Write forecast rows (heat index in Fahrenheit) as Celsius predictions and residuals."""
+	predictions = pd.DataFrame({"city": cities, "date": dates})
+	predictions["heat_index_actual_f"] = pd.Series(actual_f).round(2)
+	predictions["heat_index_pred_f"] = pred_f.round(2)
+	actual_c = cast(pd.Series, fahrenheit_to_celsius(predictions["heat_index_actual_f"]))
+	pred_c = cast(pd.Series, fahrenheit_to_celsius(predictions["heat_index_pred_f"]))
+	predictions["heat_index_actual"] = actual_c.round(2)
+	predictions["heat_index_pred"] = pred_c.round(2)
+	predictions["residual"] = (predictions["heat_index_pred"] - predictions["heat_index_actual"]).round(2)
+	predictions.drop(columns=["heat_index_actual_f", "heat_index_pred_f"], inplace=True)
+	logger.info("Generated {} forecast rows ({} per city)", len(predictions), FEATURE_CONF.get("forecast_horizon_days", 14))
+
+	dest = Path(HEAT_INDEX_PREDICTIONS_FILE)
+	with atomic_path(dest) as tmp_path:
+		predictions.to_csv(tmp_path, index=False)
+	write_columnar(predictions, HEAT_INDEX_PREDICTIONS_PARQUET_FILE)
+	logger.info("Wrote predictions to {}", dest)
+
+
+def _future_features(
+	rows: pd.DataFrame,
+	history: np.ndarray,
+	categories: Sequence[str],
+	feature_cols: List[str],
+) -> np.ndarray:
+	"""Feature matrix for days past the observed history, NaN where an input is missing.
+
+	``rows`` hold city names, dates and the weather history columns; ``history`` holds each
+	row's preceding heat index values oldest first (see ``LagBuffers.window``). ``rows`` is
+	modified in place.
+	"""
+	rows["city"] = pd.Categorical(rows["city"].astype(str), categories=list(categories))
+	_add_time_features(rows)
+	_add_city_features(rows)
+	_add_weather_features(rows)
+	_add_history_features(rows, history)
+	missing = [col for col in feature_cols if col not in rows.columns]
+	if missing:
+		raise ValueError(f"Weather inputs lack the columns behind features {missing}")
+	return rows[feature_cols].to_numpy(dtype=np.float32)
+
+
+def _recursive_forecast(
+	booster: Booster,
+	buffers: LagBuffers,
+	last_dates: Dict[str, str],
+	categories: Sequence[str],
+	covariates: pd.DataFrame,
+	feature_cols: List[str],
+) -> pd.DataFrame:
+	"""Predict each city's heat index (Fahrenheit) for the days after its last observed day.
+
+	Step ``k`` covers day ``last + k`` of every city in one ``inplace_predict`` call. Lag and
+	rolling features come from ``buffers``, into which each step's predictions are pushed
+	before the next, and weather features from ``covariates`` (daily forecast rows shaped like
+	the weather history). A city stops at the first day without complete covariates.
+	``buffers`` is advanced in place.
+	"""
+	days = int(FEATURE_CONF.get("future_horizon_days", 7))
+	frame = covariates.copy()
+	frame["city"] = frame["city"].astype(str)
+	frame = frame.loc[frame["city"].isin(list(last_dates))].copy()
+	frame["date"] = pd.to_datetime(frame["date"], errors="coerce")
+	frame["lead_days"] = (frame["date"] - pd.to_datetime(frame["city"].map(last_dates))).dt.days
+	frame = frame.loc[(frame["lead_days"] >= 1) & (frame["lead_days"] <= days)]
+	frame = frame.drop_duplicates(["city", "date"], keep="last")
+
+	iteration_range = (0, _best_iteration(booster) + 1)
+	active = np.array(sorted(last_dates), dtype=object)
+	steps: List[pd.DataFrame] = []
+	for lead in range(1, days + 1):
+		step = frame.loc[(frame["lead_days"] == lead) & frame["city"].isin(active)].reset_index(drop=True)
+		if step.empty:
+			break
+		cities = step["city"].to_numpy(dtype=object)
+		features = _future_features(step, buffers.window(cities), categories, feature_cols)
+		complete = ~np.isnan(features).any(axis=1)
+		if not complete.any():
+			break
+		pred = np.asarray(booster.inplace_predict(features[complete], iteration_range=iteration_range))
+		active = cities[complete]
+		buffers.push(active, pred)
+		steps.append(
+			pd.DataFrame(
+				{
+					"city": active,
+					"date": step["date"].to_numpy()[complete],
+					"lead_days": lead,
+					"heat_index_pred_f": pred,
+				}
+			)
+		)
+	if not steps:
+		return pd.DataFrame(columns=["city", "date", "lead_days", "heat_index_pred_f"])
+	return pd.concat(steps, ignore_index=True).sort_values(["city", "date"], ignore_index=True)
+
+
+def _write_future_forecast(
+	booster: Booster,
+	buffers: LagBuffers,
+	last_dates: Dict[str, str],
+	categories: Sequence[str],
+	feature_cols: List[str],
+	logger,
+) -> None:
+	"""Forecast past the observed history from the covariates saved by ``get_hourly_heat_index.py``."""
+	path = Path(WEATHER_FORECAST_FILE)
+	if not path.exists():
+		logger.warning("No forecast covariates at {}; skipping multi-day forecast.", path)
+		return
+	covariates = pd.read_csv(path)
+	forecast = _recursive_forecast(booster, buffers, last_dates, categories, covariates, feature_cols)
+	if forecast.empty:
+		logger.warning("Forecast covariates in {} do not cover the days after the weather history.", path)
+		return
+
+	pred_c = cast(pd.Series, fahrenheit_to_celsius(forecast.pop("heat_index_pred_f").round(2)))
+	forecast["heat_index_pred"] = pred_c.round(2)
+	dest = Path(HEAT_INDEX_FORECAST_FILE)
+	with atomic_path(dest) as tmp_path:
+		forecast.to_csv(tmp_path, index=False)
+	write_columnar(forecast, HEAT_INDEX_FORECAST_PARQUET_FILE)
+	logger.info(
+		"Forecast up to {} days ahead for {} cities ({} rows) to {}",
+		int(forecast["lead_days"].max()),
+		forecast["city"].nunique(),
+		len(forecast),
+		dest,
+	)
+
+
 def main() -> None:
 	ensure_dirs()
 	logger = get_logger(
@@ -270,78 +917,135 @@ def main() -> None:
 		stats.get("gpu"),
 	)
 
-	data = _load_dataset()
-	logger.info("Loaded {} merged rows", len(data))
-
-	feature_frame, feature_cols = _build_feature_matrix(data)
-	logger.info("Prepared {} rows with {} features", len(feature_frame), len(feature_cols))
-
-	train_ready, forecast_frame = _split_forecast_horizon(feature_frame)
-	if train_ready.empty:
-		logger.warning("Not enough rows after reserving forecast horizon; training on full dataset instead.")
-		train_ready = feature_frame.copy()
+	store = _prepare_feature_store(logger)
+	X_train, y_train = store.block("train")
+	X_valid, y_valid = store.block("valid")
+	forecast_features, forecast_target = store.block("forecast")
 	logger.info(
 		"Reserved {} horizon days per city; training rows now {}; forecast rows {}",
 		FEATURE_CONF.get("forecast_horizon_days", 14),
-		len(train_ready),
-		len(forecast_frame),
+		len(X_train) + len(X_valid),
+		len(forecast_features),
 	)
-
-	train_df, valid_df = _train_valid_split(train_ready)
 	logger.info(
 		"Training rows={} | Validation rows={} | Split date={}",
-		len(train_df),
-		len(valid_df),
-		valid_df["date"].min(),
+		len(X_train),
+		len(X_valid),
+		pd.Timestamp(store.dates[store.bounds("valid")].min()) if len(X_valid) else None,
 	)
 
-	params = _training_params(stats, len(train_df))
+	params = _training_params(stats, len(X_train))
 	logger.info("Training config: {}", params)
 
-	X_train = train_df[feature_cols].to_numpy()
-	y_train = train_df["heat_index"].to_numpy()
-	X_valid = valid_df[feature_cols].to_numpy()
-	y_valid = valid_df["heat_index"].to_numpy()
-
-	model, used_params = _fit_model(params, X_train, y_train, X_valid, y_valid, logger)
-	if used_params is not params:
+	feature_cols = store.feature_columns
+	warm = _warm_start_base(feature_cols, store.categories, X_valid, y_valid, logger)
+	meta = _read_model_meta() or {}
+	started = time.perf_counter()
+	if warm is not None:
+		booster, meta, baseline = warm
+		warm_params = {**params, "n_estimators": int(TRAIN_LIMITS.get("warm_start_rounds", 100))}
+		logger.info("Warm start: boosting {} more rounds on top of the saved model", warm_params["n_estimators"])
+		model, used_params, stopped = _fit_model(
+			warm_params, X_train, y_train, X_valid, y_valid, logger, xgb_model=booster
+		)
+		elapsed = time.perf_counter() - started
+		rmse = _rmse(y_valid, _predict(model, X_valid))
+		full_rmse = float(meta["full_valid_rmse"])
+		logger.info(
+			"Warm start took {:.1f}s (saved {:.1f}s vs last full retrain) | Validation RMSE {:.3f} -> {:.3f} ({:+.3f})",
+			elapsed,
+			float(meta.get("full_train_seconds", 0.0)) - elapsed,
+			baseline,
+			rmse,
+			rmse - baseline,
+		)
+		if rmse > full_rmse * (1.0 + float(TRAIN_LIMITS.get("warm_start_max_drift", 0.05))):
+			logger.warning("Warm-started RMSE {:.3f} drifted from last full retrain {:.3f}; retraining from scratch.", rmse, full_rmse)
+			warm = None
+			started = time.perf_counter()
+	if warm is None:
+		model, used_params, stopped = _fit_model(params, X_train, y_train, X_valid, y_valid, logger)
+	elapsed = time.perf_counter() - started
+	mode = "warm" if warm is not None else "full"
+	if used_params is not params and mode == "full":
 		logger.info("Training config adjusted to: {}", used_params)
 
-	valid_pred = model.predict(X_valid)
-	rmse = math.sqrt(float(mean_squared_error(y_valid, valid_pred)))
+	booster = model.get_booster()
+	best_iteration = _best_iteration(booster)
+	trees = booster.num_boosted_rounds()
+	logger.info("Boosting stopped ({}) after {} trees; best iteration {}", stopped, trees, best_iteration)
+	valid_pred = _predict(model, X_valid)
+	rmse = _rmse(y_valid, valid_pred)
 	mae = mean_absolute_error(y_valid, valid_pred)
 	r2 = r2_score(y_valid, valid_pred)
 	logger.info("Validation RMSE={:.3f} | MAE={:.3f} | R2={:.3f}", rmse, mae, r2)
-	_write_metrics_log(rmse, mae, r2)
+	if mode == "full" and "full_valid_rmse" in meta:
+		logger.info("Validation RMSE delta vs previous full retrain: {:+.3f}", rmse - float(meta["full_valid_rmse"]))
+	_write_metrics_log(rmse, mae, r2, best_iteration, trees, stopped)
 
-	if forecast_frame.empty:
+	if not len(forecast_features):
 		logger.error("No forecast rows available; skipping prediction export.")
 		return
 
-	forecast_features = forecast_frame[feature_cols].to_numpy()
-	forecast_pred = model.predict(forecast_features)
-	predictions = forecast_frame[["city", "date"]].copy()
-	predictions["heat_index_actual_f"] = forecast_frame["heat_index"].round(2)
-	predictions["heat_index_pred_f"] = forecast_pred.round(2)
-	actual_c = cast(pd.Series, fahrenheit_to_celsius(predictions["heat_index_actual_f"]))
-	pred_c = cast(pd.Series, fahrenheit_to_celsius(predictions["heat_index_pred_f"]))
-	predictions["heat_index_actual"] = actual_c.round(2)
-	predictions["heat_index_pred"] = pred_c.round(2)
-	predictions["residual"] = (predictions["heat_index_pred"] - predictions["heat_index_actual"]).round(2)
-	predictions.drop(columns=["heat_index_actual_f", "heat_index_pred_f"], inplace=True)
-	logger.info("Generated {} forecast rows ({} per city)", len(predictions), FEATURE_CONF.get("forecast_horizon_days", 14))
-
-	dest = Path(HEAT_INDEX_PREDICTIONS_FILE)
-	dest.parent.mkdir(parents=True, exist_ok=True)
-	predictions.to_csv(dest, index=False)
-	logger.info("Wrote predictions to {}", dest)
+	forecast_pred = _predict(model, forecast_features)
+	_write_predictions(
+		store.cities("forecast"),
+		np.asarray(store.dates[store.bounds("forecast")]),
+		np.asarray(forecast_target),
+		forecast_pred,
+		logger,
+	)
 
 	model_path = Path(HEAT_INDEX_MODEL_FILE)
-	model_path.parent.mkdir(parents=True, exist_ok=True)
-	model.save_model(model_path)
-	logger.info("Saved model to {}", model_path)
+	trained_at = datetime.now(timezone.utc).isoformat()
+	meta.update(
+		{
+			"trained_at": trained_at,
+			"mode": mode,
+			"valid_rmse": rmse,
+			"train_seconds": elapsed,
+			"rounds": trees,
+			"best_iteration": best_iteration,
+			"feature_columns": feature_cols,
+			"categories": store.categories,
+			"tuning_profile": (_read_tuning_profile() or {}).get("tuned_at"),
+		}
+	)
+	if mode == "full":
+		meta.update({"full_trained_at": trained_at, "full_valid_rmse": rmse, "full_train_seconds": elapsed})
+	# The booster and its metadata are renamed into place one after the other, so both carry
+	# the generation id and ``_load_saved_model`` retries until they match; raw JSON keeps
+	# the format the ``.json`` name implies.
+	with FileGeneration() as generation:
+		meta["generation"] = generation.generation
+		saved = model.get_booster()
+		saved.set_attr(generation=generation.generation)
+		generation.write_bytes(model_path, saved.save_raw(raw_format="json"))
+		_write_model_meta(meta, generation)
+	logger.info("Saved {} model ({} trees) to {}", mode, meta["rounds"], model_path)
+
+	buffers = LagBuffers.from_state(_lag_buffer_size(), store.state.get("lag_buffers") or {})
+	if buffers is not None:
+		_write_future_forecast(booster, buffers, store.state.get("last_dates") or {}, store.categories, feature_cols, logger)
+
+
+def _parse_args() -> argparse.Namespace:
+	parser = argparse.ArgumentParser(description="Train the heat index model and export forecasts.")
+	commands = parser.add_subparsers(dest="command")
+	commands.add_parser("train", help="Train or warm-start the model and export forecasts (default).")
+	tune = commands.add_parser("tune", help="Search depth, learning rate and subsample with time-series CV.")
+	tune.add_argument("--budget", type=float, help="Wall-clock budget in seconds for the whole search.")
+	tune.add_argument("--trials", type=int, help="Maximum number of configurations to evaluate.")
+	tune.add_argument("--workers", type=int, help="Number of trial processes.")
+	return parser.parse_args()
 
 
 if __name__ == "__main__":
-	main()
+	args = _parse_args()
+	if args.command == "tune":
+		from tune_heat_index import main as tune_main
+
+		tune_main(budget_seconds=args.budget, max_trials=args.trials, workers=args.workers)
+	else:
+		main()
 
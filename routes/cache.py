@@ -0,0 +1,231 @@
+"""Content-addressed on-disk cache for API responses."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Mapping, Optional
+
+from constants.cache import (
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_MAX_BYTES,
+    RESPONSE_CACHE_OFFLINE,
+)
+from constants.path import RESPONSE_CACHE_DIR
+
+_ENTRY_SUFFIX = ".cache"
+
+
+def _canonical_value(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return [_canonical_value(item) for item in value]
+    if isinstance(value, Mapping):
+        return {str(key): _canonical_value(item) for key, item in value.items()}
+    return str(value)
+
+
+def cache_key(url: str, params: Optional[Mapping[str, Any]] = None) -> str:
+    """Hash ``url`` plus ``params`` with sorted keys and stringified values."""
+    canonical = json.dumps(
+        {"url": url, "params": _canonical_value(params or {})},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of response bodies, one file per key.
+
+    Each entry stores its write time in a one-line header, so a TTL check does not depend on
+    the file mtime; the mtime is bumped on every hit and drives LRU eviction. In ``offline``
+    mode every stored entry is served regardless of age and nothing is evicted.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, *, offline: bool = False) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = int(max_bytes)
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+        self._total_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{_ENTRY_SUFFIX}"
+
+    def open_entry(self, key: str, ttl: Optional[float] = None) -> Optional[BinaryIO]:
+        """Like ``get`` but return an open handle positioned at the start of the body."""
+        path = self._path(key)
+        try:
+            handle = open(path, "rb")
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            header = json.loads(handle.readline())
+            body_bytes = os.fstat(handle.fileno()).st_size - handle.tell()
+        except (OSError, ValueError):
+            handle.close()
+            with self._lock:
+                self.misses += 1
+            return None
+
+        stored_at = float(header.get("stored_at", 0.0))
+        if not self.offline and ttl is not None and time.time() - stored_at > ttl:
+            handle.close()
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += body_bytes
+        return handle
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[bytes]:
+        """Return the cached body for ``key`` if it exists and is younger than ``ttl`` seconds."""
+        handle = self.open_entry(key, ttl)
+        if handle is None:
+            return None
+        with handle:
+            return handle.read()
+
+    def put(self, key: str, body: bytes) -> None:
+        self.put_stream(key, (body,))
+
+    def put_stream(self, key: str, chunks: Iterable[bytes]) -> Optional[Path]:
+        """Write ``chunks`` as the body for ``key`` and return the entry path."""
+        if self.offline:
+            return None
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        header = json.dumps({"stored_at": time.time()}).encode("utf-8") + b"\n"
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "wb") as handle:
+                handle.write(header)
+                for chunk in chunks:
+                    handle.write(chunk)
+                written = handle.tell()
+            try:
+                previous = path.stat().st_size
+            except OSError:
+                previous = 0
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += written - previous
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+        return path
+
+    def _entries(self):
+        return self.directory.glob(f"*/*{_ENTRY_SUFFIX}")
+
+    def _scan_size(self) -> int:
+        total = 0
+        for entry in self._entries():
+            try:
+                total += entry.stat().st_size
+            except OSError:
+                continue
+        return total
+
+    def _evict(self) -> None:
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for _, size, entry in entries:
+            if total <= target:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._total_bytes = total
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bytes_saved": self.bytes_saved,
+                "evictions": self.evictions,
+            }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_configured = False
+_cache_lock = threading.Lock()
+
+
+def configure_response_cache(
+    enabled: bool = RESPONSE_CACHE_ENABLED,
+    *,
+    directory: Path = RESPONSE_CACHE_DIR,
+    max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+    offline: bool = RESPONSE_CACHE_OFFLINE,
+) -> Optional[ResponseCache]:
+    """Replace the shared cache; ``enabled=False`` turns caching off entirely."""
+    global _cache, _cache_configured
+    with _cache_lock:
+        _cache = ResponseCache(directory, max_bytes, offline=offline) if enabled or offline else None
+        _cache_configured = True
+        return _cache
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the shared cache, or ``None`` when caching is disabled."""
+    global _cache, _cache_configured
+    with _cache_lock:
+        if not _cache_configured:
+            if RESPONSE_CACHE_ENABLED or RESPONSE_CACHE_OFFLINE:
+                _cache = ResponseCache(RESPONSE_CACHE_DIR, RESPONSE_CACHE_MAX_BYTES, offline=RESPONSE_CACHE_OFFLINE)
+            _cache_configured = True
+        return _cache
+
+
+def response_cache_stats() -> Dict[str, int]:
+    cache = get_response_cache()
+    if cache is None:
+        return {"hits": 0, "misses": 0, "bytes_saved": 0, "evictions": 0}
+    return cache.stats()
+
+
+__all__ = [
+    "ResponseCache",
+    "cache_key",
+    "configure_response_cache",
+    "get_response_cache",
+    "response_cache_stats",
+]
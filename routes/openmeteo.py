@@ -1,13 +1,50 @@
 """Open-Meteo API client helpers."""
 from __future__ import annotations
 
+import asyncio
+import json
+import tempfile
 import time
-from typing import Any, Dict
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Any, AsyncIterator, BinaryIO, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 import requests
 
+from constants.cache import (
+    OPEN_METEO_ARCHIVE_STABLE_DAYS,
+    OPEN_METEO_FORECAST_TTL_SECONDS,
+    OPEN_METEO_RECENT_ARCHIVE_TTL_SECONDS,
+)
 from constants.error import OpenMeteoRequestError
-from constants.weather import OPEN_METEO_API_URL, OPEN_METEO_FORECAST_API_URL
+from constants.weather import OPEN_METEO_API_URL, OPEN_METEO_FORECAST_API_URL, WEATHER_HOURLY_STATS
+from routes.cache import ResponseCache, cache_key, get_response_cache
+from routes.session import get_session
+from utils.rate_limit import TokenBucket
+from utils.stream import read_archive_summary
+
+_STREAM_CHUNK_BYTES = 64 * 1024
+
+PayloadReader = Callable[[BinaryIO], Any]
+
+
+def _read_streamed(
+    response: requests.Response,
+    reader: PayloadReader,
+    cache: Optional[ResponseCache],
+    key: str,
+) -> Any:
+    # Spool the body to disk so neither the raw bytes nor a full decode is held in memory.
+    with tempfile.TemporaryFile() as spool:
+        for chunk in response.iter_content(chunk_size=_STREAM_CHUNK_BYTES):
+            spool.write(chunk)
+        spool.seek(0)
+        data = reader(spool)
+        if cache is not None:
+            spool.seek(0)
+            cache.put_stream(key, iter(lambda: spool.read(_STREAM_CHUNK_BYTES), b""))
+    return data
 
 
 def _perform_request(
@@ -17,16 +54,66 @@ def _perform_request(
     timeout: int,
     retries: int,
     cooldown: float,
-) -> Dict[str, Any]:
+    rate_limiter: Optional[TokenBucket] = None,
+    use_cache: bool = True,
+    cache_ttl: Optional[float] = None,
+    reader: Optional[PayloadReader] = None,
+    deadline: Optional[float] = None,
+) -> Any:
+    """GET ``url`` with retries, serving and filling the response cache.
+
+    ``deadline`` is a ``time.monotonic()`` instant: each attempt's timeout is cut to it, and a
+    backoff wait that would end after it fails the call right away.
+    """
+    cache = get_response_cache() if use_cache else None
+    key = cache_key(url, params) if cache is not None else ""
+    if cache is not None:
+        if reader is not None:
+            handle = cache.open_entry(key, cache_ttl)
+            if handle is not None:
+                with handle:
+                    cached = reader(handle)
+                if isinstance(cached, (dict, list)):
+                    return cached
+        else:
+            body = cache.get(key, cache_ttl)
+            if body is not None:
+                cached = json.loads(body)
+                if isinstance(cached, (dict, list)):
+                    return cached
+        if cache.offline:
+            raise OpenMeteoRequestError("Offline replay: response not in cache")
+
+    def remaining() -> float:
+        if deadline is None:
+            return float(timeout)
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise OpenMeteoRequestError("Open-Meteo request ran past its deadline", original=last_exc)
+        return min(float(timeout), left)
+
+    def pause(seconds: float) -> None:
+        if deadline is not None and time.monotonic() + seconds >= deadline:
+            raise OpenMeteoRequestError("Open-Meteo request would retry past its deadline", original=last_exc)
+        time.sleep(seconds)
+
     attempt = 0
     last_exc: Exception | None = None
     while attempt <= retries:
         attempt += 1
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        request_timeout = remaining()
         try:
-            response = requests.get(url, params=params, timeout=timeout)
-            response.raise_for_status()
-            data = response.json()
-            if not isinstance(data, dict):
+            with get_session().get(url, params=params, timeout=request_timeout, stream=reader is not None) as response:
+                response.raise_for_status()
+                if reader is not None:
+                    data = _read_streamed(response, reader, cache, key)
+                else:
+                    data = response.json()
+                    if cache is not None and isinstance(data, (dict, list)):
+                        cache.put(key, response.content)
+            if not isinstance(data, (dict, list)):
                 raise OpenMeteoRequestError("Unexpected response payload type", original=None)
             if cooldown > 0:
                 time.sleep(cooldown)
@@ -35,40 +122,82 @@ def _perform_request(
             last_exc = exc
             if attempt > retries:
                 raise OpenMeteoRequestError("Open-Meteo request timed out", original=exc) from exc
-            time.sleep(attempt)
+            pause(attempt)
         except requests.HTTPError as exc:
+            last_exc = exc
             status_code = exc.response.status_code if exc.response is not None else None
             if status_code == 429 and attempt <= retries:
                 wait_time = min(5.0 * attempt, 60.0)
-                time.sleep(wait_time)
+                pause(wait_time)
                 continue
             raise OpenMeteoRequestError(str(exc), status_code=status_code, original=exc) from exc
         except Exception as exc:
             last_exc = exc
             if attempt > retries:
                 raise OpenMeteoRequestError("Failed to fetch Open-Meteo data", original=exc) from exc
-            time.sleep(0.5 * attempt)
+            pause(0.5 * attempt)
 
     raise OpenMeteoRequestError("Failed to fetch Open-Meteo data", original=last_exc)
 
 
+def _archive_cache_ttl(params: Dict[str, Any]) -> Optional[float]:
+    """Archive days older than the stable window never change, so such requests never expire."""
+    try:
+        end_day = date.fromisoformat(str(params.get("end_date")))
+    except ValueError:
+        return OPEN_METEO_RECENT_ARCHIVE_TTL_SECONDS
+    if end_day <= date.today() - timedelta(days=OPEN_METEO_ARCHIVE_STABLE_DAYS):
+        return None
+    return OPEN_METEO_RECENT_ARCHIVE_TTL_SECONDS
+
+
+def _validate_archive(data: Any) -> Dict[str, Any]:
+    if not isinstance(data, dict):
+        raise OpenMeteoRequestError("Unexpected response payload type")
+    # The streamed decoder always attaches an ``hourly_summary``, so check for days, not keys.
+    summary = data.get("hourly_summary")
+    has_days = (
+        bool((data.get("daily") or {}).get("time"))
+        or bool((data.get("hourly") or {}).get("time"))
+        or (summary is not None and len(summary.days) > 0)
+    )
+    if not has_days:
+        raise OpenMeteoRequestError("Response missing 'daily' or 'hourly' data")
+    return data
+
+
+def _validate_forecast(data: Any) -> Dict[str, Any]:
+    if not isinstance(data, dict):
+        raise OpenMeteoRequestError("Unexpected response payload type")
+    if not data.get("hourly") and not data.get("current_weather"):
+        raise OpenMeteoRequestError("Response missing 'hourly' or 'current_weather' data")
+    return data
+
+
+def _forecast_cache_ttl(params: Dict[str, Any]) -> Optional[float]:
+    return OPEN_METEO_FORECAST_TTL_SECONDS
+
+
 def fetch_weather_archive(
     params: Dict[str, Any],
     timeout: int = 30,
     retries: int = 2,
     cooldown: float = 1.0,
+    *,
+    url: str = OPEN_METEO_API_URL,
+    rate_limiter: Optional[TokenBucket] = None,
 ) -> Dict[str, Any]:
     """Fetch weather archive data with basic retry logic."""
     data = _perform_request(
-        OPEN_METEO_API_URL,
+        url,
         params,
         timeout=timeout,
         retries=retries,
         cooldown=cooldown,
+        rate_limiter=rate_limiter,
+        cache_ttl=_archive_cache_ttl(params),
     )
-    if not data.get("daily") and not data.get("hourly"):
-        raise OpenMeteoRequestError("Response missing 'daily' or 'hourly' data")
-    return data
+    return _validate_archive(data)
 
 
 def fetch_weather_forecast(
@@ -76,18 +205,276 @@ def fetch_weather_forecast(
     timeout: int = 30,
     retries: int = 2,
     cooldown: float = 1.0,
+    *,
+    url: str = OPEN_METEO_FORECAST_API_URL,
+    rate_limiter: Optional[TokenBucket] = None,
 ) -> Dict[str, Any]:
     """Fetch near-real-time hourly forecast data."""
     data = _perform_request(
-        OPEN_METEO_FORECAST_API_URL,
+        url,
         params,
         timeout=timeout,
         retries=retries,
         cooldown=cooldown,
+        rate_limiter=rate_limiter,
+        cache_ttl=_forecast_cache_ttl(params),
     )
-    if not data.get("hourly") and not data.get("current_weather"):
-        raise OpenMeteoRequestError("Response missing 'hourly' or 'current_weather' data")
-    return data
+    return _validate_forecast(data)
+
+
+FetchResult = Union[Dict[str, Any], OpenMeteoRequestError]
+_COORD_KEYS = ("latitude", "longitude")
+
+
+def _batch_signature(params: Dict[str, Any]) -> str:
+    shared = {key: value for key, value in params.items() if key not in _COORD_KEYS}
+    return json.dumps(shared, sort_keys=True, default=str)
+
+
+def _chunk_params(params_list: Sequence[Dict[str, Any]], batch_size: int) -> List[List[Dict[str, Any]]]:
+    """Group consecutive requests that differ only in their coordinates."""
+    chunks: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    signature: Optional[str] = None
+    for params in params_list:
+        params_signature = _batch_signature(params)
+        if current and (params_signature != signature or len(current) >= batch_size):
+            chunks.append(current)
+            current = []
+        current.append(params)
+        signature = params_signature
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _merge_batch_params(chunk: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    merged = dict(chunk[0])
+    for key in _COORD_KEYS:
+        merged[key] = ",".join(str(params[key]) for params in chunk)
+    return merged
+
+
+def _fetch_chunk(
+    url: str,
+    chunk: Sequence[Dict[str, Any]],
+    validate: Callable[[Any], Dict[str, Any]],
+    cache_ttl_for: Callable[[Dict[str, Any]], Optional[float]],
+    **kwargs: Any,
+) -> List[FetchResult]:
+    results: List[FetchResult] = []
+    if len(chunk) > 1:
+        try:
+            data = _perform_request(url, _merge_batch_params(chunk), cache_ttl=cache_ttl_for(chunk[0]), **kwargs)
+            locations = data if isinstance(data, list) else [data]
+            if len(locations) != len(chunk):
+                raise OpenMeteoRequestError(
+                    f"Batched response returned {len(locations)} locations for {len(chunk)} requested"
+                )
+            for location in locations:
+                try:
+                    results.append(validate(location))
+                except OpenMeteoRequestError as exc:
+                    results.append(exc)
+            return results
+        except OpenMeteoRequestError:
+            results = []
+
+    # Single request, or the batched call failed: fetch each location on its own.
+    for params in chunk:
+        try:
+            data = _perform_request(url, params, cache_ttl=cache_ttl_for(params), **kwargs)
+            results.append(validate(data))
+        except OpenMeteoRequestError as exc:
+            results.append(exc)
+    return results
+
+
+def _fetch_many(
+    url: str,
+    validate: Callable[[Any], Dict[str, Any]],
+    cache_ttl_for: Callable[[Dict[str, Any]], Optional[float]],
+    params_list: Sequence[Dict[str, Any]],
+    *,
+    max_workers: int,
+    batch_size: int,
+    **kwargs: Any,
+) -> Iterator[FetchResult]:
+    chunks = _chunk_params(params_list, max(1, batch_size))
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        pending = deque(
+            executor.submit(_fetch_chunk, url, chunk, validate, cache_ttl_for, **kwargs) for chunk in chunks
+        )
+        while pending:
+            yield from pending.popleft().result()
+
+
+def fetch_weather_archive_many(
+    params_list: Sequence[Dict[str, Any]],
+    *,
+    max_workers: int = 4,
+    batch_size: int = 1,
+    rate_limiter: Optional[TokenBucket] = None,
+    timeout: int = 30,
+    retries: int = 2,
+    url: str = OPEN_METEO_API_URL,
+    summarize_hourly: Optional[Sequence[str]] = None,
+    hourly_stats: Sequence[str] = WEATHER_HOURLY_STATS,
+) -> Iterator[FetchResult]:
+    """Fetch several archive requests concurrently, yielding results in input order.
+
+    At most ``max_workers`` requests are in flight. Consecutive requests that differ only in
+    coordinates are sent ``batch_size`` locations at a time and split back per location; a
+    failed batch falls back to per-location requests. The shared ``rate_limiter`` replaces the
+    per-call cooldown sleep, and a failed location yields its ``OpenMeteoRequestError``.
+
+    With ``summarize_hourly`` the body is streamed and those hourly metrics are reduced to
+    per-day ``hourly_stats`` while decoding; each result then carries ``hourly_summary``
+    instead of ``hourly`` (see ``utils.stream.read_archive_summary``).
+    """
+    reader: Optional[PayloadReader] = None
+    if summarize_hourly is not None:
+        metrics = list(summarize_hourly)
+
+        def reader(handle: BinaryIO) -> Any:
+            return read_archive_summary(handle, metrics, hourly_stats)
+
+    return _fetch_many(
+        url,
+        _validate_archive,
+        _archive_cache_ttl,
+        params_list,
+        max_workers=max_workers,
+        batch_size=batch_size,
+        timeout=timeout,
+        retries=retries,
+        cooldown=0.0,
+        rate_limiter=rate_limiter,
+        reader=reader,
+    )
+
+
+def fetch_weather_forecast_many(
+    params_list: Sequence[Dict[str, Any]],
+    *,
+    max_workers: int = 4,
+    batch_size: int = 1,
+    rate_limiter: Optional[TokenBucket] = None,
+    timeout: int = 30,
+    retries: int = 2,
+    url: str = OPEN_METEO_FORECAST_API_URL,
+) -> Iterator[FetchResult]:
+    """Forecast counterpart of ``fetch_weather_archive_many``."""
+    return _fetch_many(
+        url,
+        _validate_forecast,
+        _forecast_cache_ttl,
+        params_list,
+        max_workers=max_workers,
+        batch_size=batch_size,
+        timeout=timeout,
+        retries=retries,
+        cooldown=0.0,
+        rate_limiter=rate_limiter,
+    )
+
+
+class _PrepaidLimiter:
+    """Rate limiter whose first token was already taken by the caller; later ones (retries,
+    per-location fallbacks) still come from ``bucket``."""
+
+    def __init__(self, bucket: TokenBucket) -> None:
+        self.bucket = bucket
+        self._prepaid = True
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        if self._prepaid:
+            self._prepaid = False
+            return 0.0
+        return self.bucket.acquire(tokens)
+
+
+async def fetch_weather_forecast_async(
+    params_list: Sequence[Dict[str, Any]],
+    *,
+    max_concurrency: int = 4,
+    max_workers: Optional[int] = None,
+    batch_size: int = 1,
+    rate_limiter: Optional[TokenBucket] = None,
+    timeout: int = 30,
+    retries: int = 2,
+    deadline: Optional[float] = None,
+    queue_size: int = 64,
+    url: str = OPEN_METEO_FORECAST_API_URL,
+) -> AsyncIterator[Tuple[int, FetchResult, float]]:
+    """Yield ``(index, result, seconds)`` for every entry of ``params_list`` as soon as it lands.
+
+    Chunks (as in ``fetch_weather_forecast_many``) are fetched by ``max_concurrency`` workers,
+    on a pool of ``max_workers`` threads (default and minimum ``max_concurrency``), while the
+    caller consumes results. Results pass through a queue of ``queue_size`` entries and a
+    worker waits for room before fetching its next chunk, so fetching pauses when the
+    consumer falls behind. Each chunk waits for a token from
+    ``rate_limiter`` without blocking the event loop. With ``deadline``, a chunk whose
+    requests, retries and backoff waits have not finished ``deadline`` seconds after its
+    thread picked it up fails with ``OpenMeteoRequestError``; the worker stops by then
+    instead of running on unobserved. ``seconds`` is the chunk's fetch time on its thread,
+    shared by every location in the chunk. Results arrive in completion order.
+    """
+    chunks = _chunk_params(params_list, max(1, batch_size))
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+    executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency, max_workers or 0))
+    loop = asyncio.get_running_loop()
+
+    def fetch(chunk: List[Dict[str, Any]], limiter: Optional[_PrepaidLimiter]) -> Tuple[List[FetchResult], float]:
+        # The clock starts on the worker thread, so time spent queued for it is not counted.
+        started = time.monotonic()
+        results = _fetch_chunk(
+            url,
+            chunk,
+            _validate_forecast,
+            _forecast_cache_ttl,
+            timeout=timeout,
+            retries=retries,
+            cooldown=0.0,
+            rate_limiter=limiter,
+            deadline=started + float(deadline) if deadline is not None else None,
+        )
+        return results, time.monotonic() - started
+
+    async def produce(pending: Deque[Tuple[int, List[Dict[str, Any]]]]) -> None:
+        # A worker starts its next fetch only once every result of the last one is queued,
+        # so a stalled consumer leaves at most ``max_concurrency`` chunks in flight.
+        while pending:
+            start, chunk = pending.popleft()
+            limiter = None
+            if rate_limiter is not None:
+                await rate_limiter.acquire_async()
+                limiter = _PrepaidLimiter(rate_limiter)
+            try:
+                results, elapsed = await loop.run_in_executor(executor, fetch, chunk, limiter)
+            except Exception as exc:  # noqa: BLE001 - reported per location like other fetch errors
+                results, elapsed = [OpenMeteoRequestError("Failed to fetch Open-Meteo data", original=exc)] * len(chunk), 0.0
+            for offset, result in enumerate(results):
+                await queue.put((start + offset, result, elapsed))
+
+    starts = [0]
+    for chunk in chunks[:-1]:
+        starts.append(starts[-1] + len(chunk))
+    pending = deque(zip(starts, chunks))
+    producers = [asyncio.create_task(produce(pending)) for _ in range(min(max(1, max_concurrency), len(chunks)))]
+    try:
+        for _ in range(len(params_list)):
+            yield await queue.get()
+    finally:
+        for task in producers:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
-__all__ = ["fetch_weather_archive", "fetch_weather_forecast"]
+__all__ = [
+    "fetch_weather_archive",
+    "fetch_weather_archive_many",
+    "fetch_weather_forecast",
+    "fetch_weather_forecast_async",
+    "fetch_weather_forecast_many",
+]
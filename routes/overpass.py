@@ -1,12 +1,46 @@
 import concurrent.futures
 import overpy
 import time
-from typing import Any
+from typing import Any, Optional, Union
 
-_api = overpy.Overpass()
+from constants.cache import OVERPASS_TTL_SECONDS
+from constants.error import OverpassQueryError
+from routes.cache import cache_key, get_response_cache
+
+
+class _RecordingOverpass(overpy.Overpass):
+    """Overpass client that keeps the raw body of the last parsed response for caching."""
+
+    last_body: Optional[bytes] = None
+
+    def parse_json(self, data: Union[bytes, str], encoding: str = "utf-8") -> overpy.Result:
+        self.last_body = data if isinstance(data, bytes) else data.encode(encoding)
+        return super().parse_json(data, encoding=encoding)
+
+    def parse_xml(self, data: Union[bytes, str], encoding: str = "utf-8", parser: Optional[int] = None) -> overpy.Result:
+        self.last_body = data if isinstance(data, bytes) else data.encode(encoding)
+        return super().parse_xml(data, encoding=encoding, parser=parser)
+
+
+_api = _RecordingOverpass()
+
+
+def _parse_cached(body: bytes) -> overpy.Result:
+    if body.lstrip().startswith(b"{"):
+        return _api.parse_json(body)
+    return _api.parse_xml(body)
 
 
 def get_coords(query: str, timeout: int = 30, retries: int = 2) -> Any:
+    cache = get_response_cache()
+    key = cache_key(_api.url, {"data": query}) if cache is not None else ""
+    if cache is not None:
+        body = cache.get(key, OVERPASS_TTL_SECONDS)
+        if body is not None:
+            return _parse_cached(body)
+        if cache.offline:
+            raise OverpassQueryError("Offline replay: Overpass response not in cache")
+
     attempt = 0
     last_exc: Exception | None = None
     while attempt <= retries:
@@ -15,13 +49,16 @@ def get_coords(query: str, timeout: int = 30, retries: int = 2) -> Any:
             with concurrent.futures.ThreadPoolExecutor(max_workers=1) as ex:
                 future = ex.submit(_api.query, query)
                 try:
-                    return future.result(timeout=timeout)
+                    result = future.result(timeout=timeout)
                 except KeyboardInterrupt:
                     # If the user interrupts, cancel the pending request and re-raise
                     try:
                         future.cancel()
                     finally:
                         raise
+                if cache is not None and _api.last_body is not None:
+                    cache.put(key, _api.last_body)
+                return result
         except concurrent.futures.TimeoutError as e:
             last_exc = e
             if attempt > retries:
@@ -0,0 +1,133 @@
+"""Shared pooled HTTP session for the API clients."""
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from constants.weather import OPEN_METEO_POOL_SIZE, OPEN_METEO_TRANSPORT_RETRIES
+
+
+class ConnectionStats:
+    """Thread-safe counters of new versus reused pooled connections."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.new_connections = 0
+        self.requests = 0
+
+    def record_new(self) -> None:
+        with self._lock:
+            self.new_connections += 1
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.new_connections = 0
+            self.requests = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "new": self.new_connections,
+                "reused": max(0, self.requests - self.new_connections),
+            }
+
+
+_STATS = ConnectionStats()
+
+
+class _CountingPoolMixin:
+    def _new_conn(self) -> Any:
+        _STATS.record_new()
+        return super()._new_conn()  # type: ignore[misc]
+
+    def _make_request(self, *args: Any, **kwargs: Any) -> Any:
+        _STATS.record_request()
+        return super()._make_request(*args, **kwargs)  # type: ignore[misc]
+
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _CountingAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _build_session(pool_size: int, retries: int) -> requests.Session:
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=0,
+        backoff_factor=0.5,
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+    )
+    adapter = _CountingAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def configure_session(
+    pool_size: int = OPEN_METEO_POOL_SIZE,
+    retries: int = OPEN_METEO_TRANSPORT_RETRIES,
+) -> requests.Session:
+    """Replace the shared session with one using the given pool size and transport retries."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = _build_session(max(1, pool_size), max(0, retries))
+        return _session
+
+
+def get_session() -> requests.Session:
+    """Return the shared keep-alive session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session(OPEN_METEO_POOL_SIZE, OPEN_METEO_TRANSPORT_RETRIES)
+        return _session
+
+
+def connection_stats() -> Dict[str, int]:
+    """Return request, new-connection and reused-connection counts since the last reset."""
+    return _STATS.snapshot()
+
+
+def reset_connection_stats() -> None:
+    _STATS.reset()
+
+
+__all__ = [
+    "ConnectionStats",
+    "configure_session",
+    "get_session",
+    "connection_stats",
+    "reset_connection_stats",
+]
@@ -99,8 +99,8 @@ def run_command(args: list[str]) -> None:
 def build_jobs() -> list[ScheduledJob]:
     return [
         ScheduledJob(
-            name="Hourly Heat Index",
-            commands=[[PYTHON, "get_hourly_heat_index.py"]],
+            name="Hourly Heat Index & Forecast Refresh",
+            commands=[[PYTHON, "get_hourly_heat_index.py"], [PYTHON, "infer_heat_index.py"]],
             cadence="hourly",
         ),
         ScheduledJob(
@@ -0,0 +1,375 @@
+"""Serve ad-hoc heat index predictions from the saved model on localhost.
+
+Usage:
+  python serve_heat_index.py [--host 127.0.0.1] [--port 8765]
+  python serve_heat_index.py --unix /tmp/heat_index.sock
+
+Endpoints:
+  POST /predict  {"city": "...", "date": "YYYY-MM-DD", "weather": {...}}
+                 or {"requests": [...]} for several at once. ``weather`` holds the
+                 weather history columns of that day; without it the forecast covariates
+                 from get_hourly_heat_index.py are used. ``date`` defaults to the day after
+                 the city's last observed day, whose lag values are always the ones used.
+  GET  /stats    request count, p50/p99 latency and batching counters
+  GET  /health   model and lag state summary
+
+The booster and the per-city lag buffers are loaded once and reloaded only when their
+source files change. Concurrent requests are micro-batched into one predict call.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socketserver
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from xgboost import Booster
+from xgboost.core import XGBoostError
+
+from constants.files import SERVE_HEAT_INDEX_LOG_FILENAME
+from constants.model import HEAT_INDEX_SERVICE_CONFIG
+from constants.path import (
+	HEAT_INDEX_MODEL_FILE,
+	HEAT_INDEX_MODEL_META_FILE,
+	LOGS_DIR,
+	WEATHER_FORECAST_FILE,
+	WEATHER_HEAT_INDEX_FILE,
+	WEATHER_HEAT_INDEX_PARQUET_FILE,
+	WEATHER_HISTORY_FILE,
+	WEATHER_HISTORY_PARQUET_FILE,
+	ensure_dirs,
+)
+from constants.weather import WEATHER_DAILY_METRICS, WEATHER_HOURLY_SUMMARY_COLUMNS
+from predict_heat_index import (
+	_best_iteration,
+	_future_features,
+	_lag_buffer_size,
+	_last_dates,
+	_load_dataset,
+	_load_saved_model,
+)
+from utils.atomic import GenerationMismatchError
+from utils.batching import LatencyTracker, MicroBatcher
+from utils.lag_buffers import LagBuffers
+from utils.logger import get_logger
+from utils.units import fahrenheit_to_celsius
+
+SERVICE_CONF = HEAT_INDEX_SERVICE_CONFIG
+WEATHER_COLUMNS = [*WEATHER_DAILY_METRICS, *WEATHER_HOURLY_SUMMARY_COLUMNS]
+_SOURCES = (
+	HEAT_INDEX_MODEL_FILE,
+	HEAT_INDEX_MODEL_META_FILE,
+	WEATHER_HISTORY_FILE,
+	WEATHER_HISTORY_PARQUET_FILE,
+	WEATHER_HEAT_INDEX_FILE,
+	WEATHER_HEAT_INDEX_PARQUET_FILE,
+	WEATHER_FORECAST_FILE,
+)
+
+
+def _source_signature() -> Tuple[int, ...]:
+	signature = []
+	for path in _SOURCES:
+		try:
+			signature.append(os.stat(path).st_mtime_ns)
+		except OSError:
+			signature.append(0)
+	return tuple(signature)
+
+
+class HeatIndexService:
+	"""The saved booster plus each city's recent heat index values, predicting in batches.
+
+	``predict_batch`` runs on the batcher thread only, so the loaded state needs no locking.
+	"""
+
+	def __init__(self, logger) -> None:
+		self.logger = logger
+		self.booster: Booster | None = None
+		self.meta: Dict[str, Any] = {}
+		self.feature_cols: List[str] = []
+		self.iteration_range = (0, 0)
+		self.buffers = LagBuffers(_lag_buffer_size())
+		self.last_dates: Dict[str, str] = {}
+		self.categories: List[str] = []
+		self.covariates: Dict[Tuple[str, str], Dict[str, Any]] = {}
+		self._signature: Tuple[int, ...] = ()
+		self._checked_at = 0.0
+
+	def load(self) -> None:
+		"""Load the booster, lag buffers and forecast covariates; raises when there is no usable model."""
+		signature = _source_signature()
+		saved = _load_saved_model()
+		if saved is None:
+			raise FileNotFoundError(f"Missing saved model or its metadata in {Path(HEAT_INDEX_MODEL_FILE).parent}")
+		booster, meta = saved
+		# ``city_id`` must use the codes the booster was trained on, not today's category order.
+		categories = meta.get("categories")
+		if categories is None:
+			raise ValueError("Saved model metadata lists no cities; run predict_heat_index.py to retrain")
+		booster.set_param({"device": "cpu"})
+
+		data = _load_dataset()
+		covariates: Dict[Tuple[str, str], Dict[str, Any]] = {}
+		if Path(WEATHER_FORECAST_FILE).exists():
+			forecast = pd.read_csv(WEATHER_FORECAST_FILE, dtype={"city": str, "date": str})
+			for row in forecast.to_dict("records"):
+				covariates[(row["city"], row["date"])] = row
+
+		self.booster = booster
+		self.meta = meta
+		self.feature_cols = list(meta.get("feature_columns") or [])
+		self.iteration_range = (0, _best_iteration(booster) + 1)
+		self.buffers = LagBuffers.from_frame(data, "city", "heat_index", _lag_buffer_size())
+		self.last_dates = _last_dates(data)
+		self.categories = [str(city) for city in categories]
+		self.covariates = covariates
+		self._signature = signature
+		self._checked_at = time.monotonic()
+		self.logger.info(
+			"Loaded {} model trained at {} with lag state for {} cities and {} covariate days",
+			meta.get("mode", "saved"),
+			meta.get("trained_at"),
+			len(self.last_dates),
+			len(covariates),
+		)
+		untrained = sorted(set(self.last_dates) - set(self.categories))
+		if untrained:
+			self.logger.warning("Rejecting cities the model was not trained on: {}", ", ".join(untrained))
+
+	def refresh_if_stale(self) -> None:
+		if time.monotonic() - self._checked_at < float(SERVICE_CONF.get("refresh_check_seconds", 30.0)):
+			return
+		self._checked_at = time.monotonic()
+		if _source_signature() == self._signature:
+			return
+		try:
+			self.load()
+		except (OSError, ValueError, KeyError, XGBoostError, GenerationMismatchError) as exc:
+			self.logger.warning("Reload failed ({}); keeping the loaded model and lag state.", exc)
+
+	def _request_row(self, request: Any) -> Dict[str, Any]:
+		if not isinstance(request, dict):
+			raise ValueError("Each request must be a JSON object")
+		city = str(request.get("city") or "")
+		if city not in self.last_dates:
+			raise ValueError(f"Unknown city: {city!r}")
+		if city not in self.categories:
+			raise ValueError(f"The model was not trained on {city!r}; retrain it to predict this city")
+		if request.get("date"):
+			date = pd.Timestamp(str(request["date"])).normalize()
+		else:
+			date = pd.Timestamp(self.last_dates[city]) + pd.Timedelta(days=1)
+		weather = request.get("weather")
+		if weather is None:
+			weather = self.covariates.get((city, date.strftime("%Y-%m-%d")))
+			if weather is None:
+				raise ValueError(f"No weather given and no forecast covariates for {city} on {date:%Y-%m-%d}")
+		if not isinstance(weather, dict):
+			raise ValueError("weather must be an object of weather history columns")
+		row: Dict[str, Any] = {"city": city, "date": date}
+		for col in WEATHER_COLUMNS:
+			value = weather.get(col)
+			try:
+				row[col] = np.nan if value is None or value == "" else float(value)
+			except (TypeError, ValueError) as exc:
+				raise ValueError(f"weather.{col} must be a number") from exc
+		return row
+
+	def predict_batch(self, requests: List[Any]) -> List[Any]:
+		"""Predict every valid request with one ``inplace_predict``; invalid ones get a ValueError."""
+		self.refresh_if_stale()
+		results: List[Any] = [None] * len(requests)
+		rows: List[Dict[str, Any]] = []
+		positions: List[int] = []
+		for idx, request in enumerate(requests):
+			try:
+				rows.append(self._request_row(request))
+				positions.append(idx)
+			except ValueError as exc:
+				results[idx] = exc
+		if not rows:
+			return results
+
+		frame = pd.DataFrame(rows, columns=["city", "date", *WEATHER_COLUMNS])
+		cities = frame["city"].to_numpy(dtype=object)
+		dates = frame["date"].dt.strftime("%Y-%m-%d").to_numpy()
+		features = _future_features(frame, self.buffers.window(cities), self.categories, self.feature_cols)
+		complete = ~np.isnan(features).any(axis=1)
+		pred_f = np.full(len(frame), np.nan)
+		if complete.any() and self.booster is not None:
+			pred_f[complete] = self.booster.inplace_predict(features[complete], iteration_range=self.iteration_range)
+		pred_c = np.asarray(fahrenheit_to_celsius(np.round(pred_f, 2)))
+		for pos, idx in enumerate(positions):
+			city = str(cities[pos])
+			if not complete[pos]:
+				results[idx] = ValueError(f"Incomplete weather or lag history for {city}")
+				continue
+			results[idx] = {
+				"city": city,
+				"date": dates[pos],
+				"heat_index_f": round(float(pred_f[pos]), 2),
+				"heat_index": round(float(pred_c[pos]), 2),
+				"lags_through": self.last_dates[city],
+			}
+		return results
+
+	def health(self) -> Dict[str, Any]:
+		return {
+			"model_trained_at": self.meta.get("trained_at"),
+			"model_mode": self.meta.get("mode"),
+			"cities": len(self.last_dates),
+			"covariate_days": len(self.covariates),
+		}
+
+
+class _Handler(BaseHTTPRequestHandler):
+	server_version = "HeatIndexService/1.0"
+	protocol_version = "HTTP/1.1"
+
+	def address_string(self) -> str:
+		# Unix-socket peers have no address.
+		return str(self.client_address[0]) if self.client_address else "unix"
+
+	def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - BaseHTTPRequestHandler signature
+		self.server.logger.debug("{} {}", self.address_string(), format % args)
+
+	def _send_json(self, status: HTTPStatus, payload: Any) -> None:
+		body = json.dumps(payload).encode("utf-8")
+		self.send_response(status)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def do_GET(self) -> None:  # noqa: N802 - BaseHTTPRequestHandler naming
+		if self.path == "/health":
+			self._send_json(HTTPStatus.OK, self.server.service.health())
+		elif self.path == "/stats":
+			stats = {**self.server.latency.snapshot(), **self.server.batcher.stats()}
+			self._send_json(HTTPStatus.OK, stats)
+		else:
+			self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path}"})
+
+	def do_POST(self) -> None:  # noqa: N802 - BaseHTTPRequestHandler naming
+		started = time.perf_counter()
+		if self.path != "/predict":
+			self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path}"})
+			return
+		try:
+			length = int(self.headers.get("Content-Length") or 0)
+			body = json.loads(self.rfile.read(length) or b"null")
+		except (ValueError, UnicodeDecodeError):
+			self.server.latency.record(time.perf_counter() - started, error=True)
+			self._send_json(HTTPStatus.BAD_REQUEST, {"error": "Body must be JSON"})
+			return
+
+		many = isinstance(body, dict) and isinstance(body.get("requests"), list)
+		items = body["requests"] if many else [body]
+		timeout = float(SERVICE_CONF.get("request_timeout_seconds", 10.0))
+		futures = [self.server.batcher.submit(item) for item in items]
+		results: List[Dict[str, Any]] = []
+		failed = False
+		for future in futures:
+			try:
+				results.append(future.result(timeout=timeout))
+			except ValueError as exc:
+				results.append({"error": str(exc)})
+				failed = True
+			except Exception as exc:  # noqa: BLE001 - reported to the client, logged here
+				self.server.logger.error("Prediction failed: {}", exc)
+				results.append({"error": f"Prediction failed: {exc}"})
+				failed = True
+		self.server.latency.record(time.perf_counter() - started, error=failed)
+		if many:
+			self._send_json(HTTPStatus.OK, {"results": results})
+		else:
+			self._send_json(HTTPStatus.BAD_REQUEST if failed else HTTPStatus.OK, results[0])
+
+
+# The default listen backlog of 5 resets connections under bursts of concurrent clients.
+class _TCPServer(ThreadingHTTPServer):
+	daemon_threads = True
+	request_queue_size = 128
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+	daemon_threads = True
+	request_queue_size = 128
+
+
+def build_server(
+	service: HeatIndexService,
+	logger,
+	host: str = "127.0.0.1",
+	port: int = 0,
+	unix_path: str | None = None,
+) -> socketserver.BaseServer:
+	"""Bind the HTTP server (TCP, or a Unix socket when ``unix_path`` is set) with its batcher."""
+	if unix_path:
+		if os.path.exists(unix_path):
+			os.unlink(unix_path)
+		server: socketserver.BaseServer = _UnixServer(unix_path, _Handler)
+	else:
+		server = _TCPServer((host, port), _Handler)
+	server.service = service
+	server.logger = logger
+	server.latency = LatencyTracker(int(SERVICE_CONF.get("latency_window", 10000)))
+	server.batcher = MicroBatcher(
+		service.predict_batch,
+		max_batch_size=int(SERVICE_CONF.get("max_batch_size", 256)),
+		max_wait=float(SERVICE_CONF.get("max_batch_wait_ms", 2.0)) / 1000.0,
+		name="heat-index-batcher",
+	)
+	return server
+
+
+def main(host: str | None = None, port: int | None = None, unix_path: str | None = None) -> None:
+	ensure_dirs()
+	logger = get_logger(
+		name="serve_heat_index",
+		log_dir=str(LOGS_DIR),
+		log_filename=SERVE_HEAT_INDEX_LOG_FILENAME,
+		use_case="data",
+	)
+	service = HeatIndexService(logger)
+	try:
+		service.load()
+	except (OSError, ValueError, KeyError, XGBoostError, GenerationMismatchError) as exc:
+		logger.error("Could not load the model ({}). Run predict_heat_index.py first.", exc)
+		return
+
+	host = host or str(SERVICE_CONF.get("host", "127.0.0.1"))
+	port = int(port if port is not None else SERVICE_CONF.get("port", 8765))
+	server = build_server(service, logger, host, port, unix_path)
+	where = unix_path or "http://{}:{}".format(*server.server_address[:2])
+	logger.info("Serving heat index predictions on {}", where)
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		logger.info("Prediction service stopped by user.")
+	finally:
+		server.server_close()
+		server.batcher.close(timeout=5.0)
+		if unix_path and os.path.exists(unix_path):
+			os.unlink(unix_path)
+
+
+def _parse_args() -> argparse.Namespace:
+	parser = argparse.ArgumentParser(description="Serve heat index predictions from the saved model on localhost.")
+	parser.add_argument("--host", help="TCP host to bind (default 127.0.0.1).")
+	parser.add_argument("--port", type=int, help="TCP port to bind; 0 picks a free port (default 8765).")
+	parser.add_argument("--unix", help="Listen on this Unix socket path instead of TCP.")
+	return parser.parse_args()
+
+
+if __name__ == "__main__":
+	args = _parse_args()
+	main(host=args.host, port=args.port, unix_path=args.unix)
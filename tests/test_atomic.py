@@ -0,0 +1,81 @@
+import json
+import os
+import threading
+
+import pytest
+
+from utils import atomic
+from utils.atomic import FileGeneration, GenerationMismatchError, read_generation
+
+
+def _publish(directory, names):
+    with FileGeneration(directory / "manifest.json") as generation:
+        for name in names:
+            generation.write_bytes(directory / name, json.dumps({"generation": generation.generation}).encode())
+    return generation.generation
+
+
+def _read(directory, names):
+    return [json.loads((directory / name).read_text())["generation"] for name in names]
+
+
+def test_reader_retries_until_a_publish_lands(tmp_path, monkeypatch):
+    names = ["model.json", "model.meta.json"]
+    first = _publish(tmp_path, names)
+    halfway = threading.Event()
+    resume = threading.Event()
+    replace = os.replace
+
+    def paused_replace(src, dst):
+        replace(src, dst)
+        if os.fspath(dst) == os.fspath(tmp_path / names[0]):
+            halfway.set()
+            assert resume.wait(timeout=10)
+
+    monkeypatch.setattr(atomic.os, "replace", paused_replace)
+    generation = FileGeneration(tmp_path / "manifest.json")
+    for name in names:
+        generation.write_bytes(tmp_path / name, json.dumps({"generation": generation.generation}).encode())
+    writer = threading.Thread(target=generation.publish)
+    writer.start()
+    assert halfway.wait(timeout=10)
+
+    reads = []
+
+    def read():
+        stamps = _read(tmp_path, names)
+        reads.append(stamps)
+        if len(reads) == 1:
+            resume.set()
+            writer.join(timeout=10)
+        return stamps
+
+    result = read_generation(read, lambda stamps: stamps, delay=0.0)
+
+    assert reads[0] == [generation.generation, first]
+    assert result == [generation.generation] * 2
+    assert json.loads((tmp_path / "manifest.json").read_text())["generation"] == generation.generation
+
+
+def test_mismatch_that_never_settles_raises(tmp_path):
+    _publish(tmp_path, ["a.json"])
+    _publish(tmp_path, ["b.json"])
+
+    with pytest.raises(GenerationMismatchError):
+        read_generation(lambda: _read(tmp_path, ["a.json", "b.json"]), lambda stamps: stamps, attempts=3, delay=0.0)
+
+
+def test_unstamped_artifacts_are_accepted():
+    assert read_generation(lambda: {"meta": {}}, lambda result: [None, result["meta"].get("generation")]) == {"meta": {}}
+
+
+def test_failed_publish_keeps_the_previous_generation(tmp_path):
+    first = _publish(tmp_path, ["a.json", "b.json"])
+
+    with pytest.raises(RuntimeError):
+        with FileGeneration(tmp_path / "manifest.json") as generation:
+            generation.write_bytes(tmp_path / "a.json", b"{}")
+            raise RuntimeError("writer failed")
+
+    assert _read(tmp_path, ["a.json", "b.json"]) == [first, first]
+    assert not list(tmp_path.glob("*.tmp"))
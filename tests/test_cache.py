@@ -0,0 +1,131 @@
+import json
+import os
+
+import pytest
+
+import routes.cache as cache_module
+import routes.overpass as overpass
+from constants.error import OverpassQueryError
+from routes.cache import ResponseCache, cache_key, configure_response_cache
+
+URL = "https://archive-api.open-meteo.com/v1/archive"
+OVERPASS_BODY = json.dumps(
+    {
+        "version": 0.6,
+        "elements": [{"type": "node", "id": 1, "lat": 14.4296, "lon": 120.9367, "tags": {"name": "Imus"}}],
+    }
+).encode("utf-8")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def shared_cache(monkeypatch):
+    # configure_response_cache replaces module globals; restore them after the test.
+    monkeypatch.setattr(cache_module, "_cache", None)
+    monkeypatch.setattr(cache_module, "_cache_configured", False)
+
+
+class _FakeResponse:
+    def __init__(self, body, content_type="application/json", code=200):
+        self._body = body
+        self.code = code
+        self._content_type = content_type
+
+    def read(self, size=-1):
+        chunk, self._body = (self._body, b"") if size < 0 else (self._body[:size], self._body[size:])
+        return chunk
+
+    def getheader(self, name):
+        return self._content_type if name == "Content-Type" else None
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def overpass_server(monkeypatch):
+    requests = []
+
+    def urlopen(url, data):
+        requests.append((url, data))
+        return _FakeResponse(OVERPASS_BODY)
+
+    monkeypatch.setattr(overpass.overpy, "urlopen", urlopen)
+    monkeypatch.setattr(overpass._api, "last_body", None)
+    return requests
+
+
+def test_keys_ignore_param_order_and_value_types():
+    forward = cache_key(URL, {"latitude": 14.43, "longitude": 120.94, "daily": ["a", "b"]})
+    backward = cache_key(URL, {"daily": ("a", "b"), "longitude": "120.94", "latitude": "14.43"})
+
+    assert forward == backward
+    assert cache_key(URL, {"latitude": 14.43, "longitude": 120.94, "daily": ["b", "a"]}) != forward
+    assert cache_key(URL + "?", {"latitude": 14.43}) != cache_key(URL, {"latitude": 14.43})
+
+
+def test_entries_expire_after_their_ttl(tmp_path, clock):
+    cache = ResponseCache(tmp_path, 1_000_000)
+    cache.put("ab12", b"body")
+
+    clock[0] += 59
+    assert cache.get("ab12", ttl=60) == b"body"
+    clock[0] += 2
+    assert cache.get("ab12", ttl=60) is None
+    assert cache.get("ab12") == b"body"
+    assert cache.stats() == {"hits": 2, "misses": 1, "bytes_saved": 8, "evictions": 0}
+
+
+def test_least_recently_used_entries_are_evicted_past_the_size_limit(tmp_path):
+    cache = ResponseCache(tmp_path, 1000)
+    for index, key in enumerate(["aa01", "bb02", "cc03"]):
+        cache.put(key, bytes(290))
+        os.utime(cache._path(key), (1000.0 + index, 1000.0 + index))
+    assert cache.get("aa01") is not None
+
+    cache.put("dd04", bytes(290))
+
+    assert [key for key in ["aa01", "bb02", "cc03", "dd04"] if cache.get(key) is not None] == ["aa01", "dd04"]
+    assert cache.stats()["evictions"] == 2
+
+
+def test_offline_mode_replays_stale_entries_and_stores_nothing(tmp_path, clock):
+    ResponseCache(tmp_path, 1_000_000).put("ab12", b"body")
+    clock[0] += 10 * 86400
+    offline = ResponseCache(tmp_path, 1, offline=True)
+
+    assert offline.get("ab12", ttl=60) == b"body"
+    assert offline.put_stream("cd34", [b"other"]) is None
+    assert offline.get("cd34") is None
+    assert offline.stats()["evictions"] == 0
+
+
+def test_overpass_offline_miss_raises_without_a_request(tmp_path, shared_cache, overpass_server):
+    configure_response_cache(directory=tmp_path, max_bytes=1_000_000, offline=True)
+
+    with pytest.raises(OverpassQueryError, match="Offline replay"):
+        overpass.get_coords("node[name=Imus];out;")
+    assert overpass_server == []
+
+
+def test_overpass_responses_are_recorded_and_replayed(tmp_path, shared_cache, overpass_server):
+    cache = configure_response_cache(True, directory=tmp_path, max_bytes=1_000_000, offline=False)
+    query = "node[name=Imus];out;"
+
+    fetched = overpass.get_coords(query)
+    assert overpass._api.last_body == OVERPASS_BODY
+    assert cache.get(cache_key(overpass._api.url, {"data": query})) == OVERPASS_BODY
+
+    configure_response_cache(directory=tmp_path, max_bytes=1_000_000, offline=True)
+    replayed = overpass.get_coords(query)
+
+    assert len(overpass_server) == 1
+    assert [(node.id, float(node.lat), node.tags["name"]) for node in replayed.nodes] == [
+        (node.id, float(node.lat), node.tags["name"]) for node in fetched.nodes
+    ]
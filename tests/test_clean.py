@@ -0,0 +1,178 @@
+import csv
+import random
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+import pytest
+
+from constants.weather import WEATHER_CITY_COLUMN, WEATHER_DATE_COLUMN
+from get_historical_weather_data import _merge_raw_rows
+from utils.clean import clean_weather_history, refresh_weather_history
+
+VALUE_COLUMNS = ["temperature_2m_max", "temperature_2m_min", "precipitation_sum"]
+CELLS = ["", " ", "0", "0.0", "nan", "NaN", " 12.5", "31.25", "-4.125", "7", "abc", "inf", "-inf"]
+
+
+# Reference copy of the list-based cleaner that ``_fill_frame`` replaced.
+def _reference_parse_date(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return datetime.min
+
+
+def _reference_parse_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    stripped = value.strip()
+    if not stripped or stripped.lower() == "nan":
+        return None
+    try:
+        parsed = float(stripped)
+    except ValueError:
+        return None
+    if parsed == 0.0:
+        return None
+    return parsed
+
+
+def _reference_fill_series(values: List[Optional[float]]) -> List[float]:
+    filled: List[Optional[float]] = values[:]
+    last: Optional[float] = None
+    for idx, val in enumerate(filled):
+        if val is None:
+            filled[idx] = last
+        else:
+            last = val
+    last = None
+    for idx in range(len(filled) - 1, -1, -1):
+        val = filled[idx]
+        if val is None:
+            filled[idx] = last
+        else:
+            last = val
+    for idx, val in enumerate(filled):
+        if val is None:
+            filled[idx] = 0.0
+    smoothed: List[float] = []
+    window = 3
+    for idx, _ in enumerate(filled):
+        start = max(0, idx - window + 1)
+        subset = [v for v in filled[start : idx + 1] if v is not None]
+        smoothed.append(sum(subset) / len(subset) if subset else 0.0)
+    return smoothed
+
+
+def _reference_clean(raw_path, clean_path) -> int:
+    with open(raw_path, newline="", encoding="utf-8") as rf:
+        rows = list(csv.DictReader(rf))
+    fieldnames = list(rows[0].keys())
+    value_cols = [col for col in fieldnames if col not in {WEATHER_CITY_COLUMN, WEATHER_DATE_COLUMN}]
+    grouped: Dict[str, List[Dict[str, str]]] = {}
+    for row in rows:
+        grouped.setdefault(row.get(WEATHER_CITY_COLUMN, "unknown"), []).append(row)
+    cleaned_rows: List[Dict[str, str]] = []
+    for city_rows in grouped.values():
+        city_rows.sort(key=lambda r: _reference_parse_date(r.get("date", "")))
+        for col in value_cols:
+            filled = _reference_fill_series([_reference_parse_float(r.get(col)) for r in city_rows])
+            for idx, value in enumerate(filled):
+                city_rows[idx][col] = f"{value:.2f}"
+        cleaned_rows.extend(city_rows)
+    cleaned_rows.sort(key=lambda r: (r.get(WEATHER_CITY_COLUMN, ""), r.get(WEATHER_DATE_COLUMN, "")))
+    with open(clean_path, "w", newline="", encoding="utf-8") as wf:
+        writer = csv.DictWriter(wf, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(cleaned_rows)
+    return len(cleaned_rows)
+
+
+def _raw_rows(rng: random.Random) -> List[Dict[str, str]]:
+    rows = []
+    start = date(2024, 1, 1)
+    for city in rng.sample(["Imus", "Bacoor", "Dasmarinas", "Tanza", "Silang"], rng.randint(1, 5)):
+        for offset in rng.sample(range(60), rng.randint(1, 25)):
+            row = {WEATHER_CITY_COLUMN: city, WEATHER_DATE_COLUMN: (start + timedelta(days=offset)).isoformat()}
+            for col in VALUE_COLUMNS:
+                row[col] = rng.choice(CELLS) if rng.random() < 0.4 else f"{rng.uniform(-10, 40):.3f}"
+            rows.append(row)
+    if rows and rng.random() < 0.3:
+        rows[0][WEATHER_DATE_COLUMN] = ""
+    rng.shuffle(rows)
+    return rows
+
+
+@pytest.mark.parametrize("seed", range(30))
+@pytest.mark.filterwarnings("error::RuntimeWarning")
+def test_clean_weather_history_matches_list_based_fill(tmp_path, seed):
+    rows = _raw_rows(random.Random(seed))
+    raw = tmp_path / "raw.csv"
+    with open(raw, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=[WEATHER_CITY_COLUMN, WEATHER_DATE_COLUMN, *VALUE_COLUMNS])
+        writer.writeheader()
+        writer.writerows(rows)
+
+    expected_count = _reference_clean(raw, tmp_path / "expected.csv")
+    count = clean_weather_history(str(raw), str(tmp_path / "clean" / "actual.csv"))
+
+    assert count == expected_count
+    assert (tmp_path / "clean" / "actual.csv").read_bytes() == (tmp_path / "expected.csv").read_bytes()
+
+
+@pytest.mark.filterwarnings("error::RuntimeWarning")
+def test_undefined_averages_are_written_as_nan(tmp_path):
+    # inf and -inf in one window average to NaN, which the list-based cleaner wrote as "nan"
+    # and which must not be taken for the start of the next window.
+    rows = [
+        {WEATHER_CITY_COLUMN: "Imus", WEATHER_DATE_COLUMN: f"2024-01-0{day}", **{col: cell for col in VALUE_COLUMNS}}
+        for day, cell in zip(range(1, 5), ["inf", "-inf", "12.5", "7"])
+    ]
+    _write_raw(tmp_path / "raw.csv", rows)
+
+    _reference_clean(tmp_path / "raw.csv", tmp_path / "expected.csv")
+    clean_weather_history(str(tmp_path / "raw.csv"), str(tmp_path / "actual.csv"))
+
+    assert "nan" in (tmp_path / "expected.csv").read_text(encoding="utf-8")
+    assert (tmp_path / "actual.csv").read_bytes() == (tmp_path / "expected.csv").read_bytes()
+
+
+def _daily_rows(rng: random.Random, cities: List[str], first: int, last: int) -> List[Dict[str, str]]:
+    start = date(2024, 1, 1)
+    rows = []
+    for city in cities:
+        for offset in range(first, last):
+            row = {WEATHER_CITY_COLUMN: city, WEATHER_DATE_COLUMN: (start + timedelta(days=offset)).isoformat()}
+            for col in VALUE_COLUMNS:
+                row[col] = "" if rng.random() < 0.2 else f"{rng.uniform(-10, 40):.3f}"
+            rows.append(row)
+    return rows
+
+
+def _write_raw(path, rows: List[Dict[str, str]]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=[WEATHER_CITY_COLUMN, WEATHER_DATE_COLUMN, *VALUE_COLUMNS])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@pytest.mark.parametrize("failed", [[], ["Tanza"], ["Imus", "Tanza"]])
+@pytest.mark.parametrize("seed", range(3))
+def test_refresh_matches_full_rebuild_when_the_window_moves(tmp_path, seed, failed):
+    rng = random.Random(seed)
+    cities = ["Bacoor", "Imus", "Tanza"]
+    raw = tmp_path / "raw.csv"
+    _write_raw(raw, _daily_rows(rng, cities, 0, 80))
+    clean_weather_history(str(raw), str(tmp_path / "refreshed.csv"))
+
+    # The next run starts its lookback window 5 days later and refetches the last week;
+    # the cities in ``failed`` keep their old raw rows.
+    start_date = (date(2024, 1, 1) + timedelta(days=5)).isoformat()
+    since = {city: (date(2024, 1, 1) + timedelta(days=73)).isoformat() for city in cities if city not in failed}
+    fetched = _daily_rows(rng, list(since), 73, 85)
+    _write_raw(raw, _merge_raw_rows(raw, fetched, since, start_date))
+
+    count = refresh_weather_history(str(raw), str(tmp_path / "refreshed.csv"), since)
+    expected = clean_weather_history(str(raw), str(tmp_path / "rebuilt.csv"))
+
+    assert count == expected
+    assert (tmp_path / "refreshed.csv").read_bytes() == (tmp_path / "rebuilt.csv").read_bytes()
@@ -0,0 +1,95 @@
+import csv
+import random
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import compute_heat_index
+from constants.weather import HEAT_INDEX_TEMPERATURE_COLUMNS, HUMIDITY_AVG_COLUMN
+from utils.heat_index import compute_heat_index_f
+
+COLUMNS = ["city", "date", *HEAT_INDEX_TEMPERATURE_COLUMNS, HUMIDITY_AVG_COLUMN]
+CELLS = ["", " ", "abc", "nan", " NaN ", "inf", "0", "31.5", " 28.25", "1e1", "-3.75"]
+
+
+class _Logger:
+    def __init__(self) -> None:
+        self.warnings: List[str] = []
+
+    def warning(self, message: str) -> None:
+        self.warnings.append(message)
+
+
+# The row-by-row implementation the columnar one replaced.
+def _reference_parse(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    stripped = value.strip()
+    if not stripped:
+        return None
+    try:
+        return float(stripped)
+    except ValueError:
+        return None
+
+
+def _reference_rows(rows: List[Dict[str, str]]):
+    output, skipped = [], 0
+    for row in rows:
+        city = (row.get("city") or row.get("City") or "").strip()
+        day = (row.get("date") or row.get("Date") or "").strip()
+        if not city or not day:
+            skipped += 1
+            continue
+        temps = [_reference_parse(row.get(col)) for col in HEAT_INDEX_TEMPERATURE_COLUMNS]
+        temps = [value for value in temps if value is not None]
+        humidity = _reference_parse(row.get(HUMIDITY_AVG_COLUMN))
+        if not temps or humidity is None:
+            skipped += 1
+            continue
+        output.append([city, day, f"{compute_heat_index_f(sum(temps) / len(temps), humidity):.2f}"])
+    return output, skipped
+
+
+def _write(path: Path, rows: List[Dict[str, str]]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_malformed_cells_are_skipped_like_the_row_parser(tmp_path):
+    rng = random.Random(7)
+    rows = []
+    for idx in range(400):
+        row = {col: rng.choice(CELLS) for col in COLUMNS[2:]}
+        row["city"] = rng.choice(["Imus", "Bacoor", "", " Tanza "])
+        row["date"] = f"2024-01-{idx % 28 + 1:02d}" if idx % 17 else ""
+        rows.append(row)
+    source = tmp_path / "weather.csv"
+    _write(source, rows)
+
+    logger = _Logger()
+    frame = compute_heat_index._heat_index_frame(compute_heat_index._load_weather_frame(source), logger)
+    out = tmp_path / "heat_index.csv"
+    frame.to_csv(out, index=False, float_format="%.2f", na_rep="nan")
+
+    expected, skipped = _reference_rows(rows)
+    with open(out, newline="", encoding="utf-8") as handle:
+        actual = list(csv.reader(handle))[1:]
+    assert actual == expected
+    assert logger.warnings == [f"Skipped {skipped} rows due to missing data"]
+    assert any(value == "nan" for _, _, value in expected)
+
+
+def test_text_in_value_column_does_not_abort(tmp_path):
+    rows = [dict.fromkeys(COLUMNS, "30") for _ in range(2)]
+    rows[0].update(city="Imus", date="2024-01-01")
+    rows[1].update(city="Imus", date="2024-01-02", **{HUMIDITY_AVG_COLUMN: "abc"})
+    source = tmp_path / "weather.csv"
+    _write(source, rows)
+
+    logger = _Logger()
+    frame = compute_heat_index._heat_index_frame(compute_heat_index._load_weather_frame(source), logger)
+
+    assert frame["date"].tolist() == ["2024-01-01"]
+    assert logger.warnings == ["Skipped 1 rows due to missing data"]
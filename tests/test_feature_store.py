@@ -0,0 +1,265 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from loguru import logger
+
+import predict_heat_index
+import utils.partition as partition
+from constants.weather import WEATHER_CLEAN_CONTEXT_DAYS, WEATHER_REFRESH_OVERLAP_DAYS
+from serve_heat_index import WEATHER_COLUMNS
+from utils.feature_store import FeatureStore, extend_feature_store, write_feature_store
+from utils.partition import mark_partition_source, replace_city_years, write_partitions
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+CITIES = ["Alpha", "Bravo", "Charlie"]
+
+
+def _history(days=140, seed=0, start="2024-01-01"):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days, freq="D")
+    rows = len(CITIES) * len(dates)
+    weather = pd.DataFrame(
+        {
+            "city": np.repeat(CITIES, len(dates)),
+            "date": np.tile(dates, len(CITIES)),
+            **{col: rng.uniform(10.0, 40.0, rows).round(2) for col in WEATHER_COLUMNS},
+        }
+    )
+    heat = weather[["city", "date"]].assign(heat_index=rng.uniform(70.0, 110.0, rows).round(2))
+    return weather, heat
+
+
+@pytest.fixture
+def sources(tmp_path, monkeypatch):
+    paths = {
+        "WEATHER_HISTORY_FILE": tmp_path / "weather.csv",
+        "WEATHER_HISTORY_PARQUET_FILE": tmp_path / "weather.parquet",
+        "WEATHER_HISTORY_PARTITIONS_DIR": tmp_path / "weather",
+        "WEATHER_HEAT_INDEX_FILE": tmp_path / "heat_index.csv",
+        "WEATHER_HEAT_INDEX_PARQUET_FILE": tmp_path / "heat_index.parquet",
+        "WEATHER_HEAT_INDEX_PARTITIONS_DIR": tmp_path / "heat_index",
+        "HEAT_INDEX_FEATURE_STORE_DIR": tmp_path / "store",
+    }
+    for name, path in paths.items():
+        monkeypatch.setattr(predict_heat_index, name, path)
+
+    def write(weather, heat, refreshed_years=None):
+        """Write the CSVs and partitions; with ``refreshed_years`` weather partitions are refreshed like the clean step."""
+        weather.to_csv(paths["WEATHER_HISTORY_FILE"], index=False, date_format="%Y-%m-%d")
+        heat.to_csv(paths["WEATHER_HEAT_INDEX_FILE"], index=False, date_format="%Y-%m-%d")
+        root = paths["WEATHER_HISTORY_PARTITIONS_DIR"]
+        if refreshed_years is None:
+            write_partitions(root, weather, decimals=2)
+        else:
+            for city, rows in weather.groupby("city"):
+                keep_from = rows["date"].min().strftime("%Y-%m-%d")
+                replace_city_years(root, city, rows, refreshed_years, decimals=2, keep_from=keep_from)
+        mark_partition_source(root, paths["WEATHER_HISTORY_FILE"])
+        write_partitions(paths["WEATHER_HEAT_INDEX_PARTITIONS_DIR"], heat, decimals=2)
+        mark_partition_source(paths["WEATHER_HEAT_INDEX_PARTITIONS_DIR"], paths["WEATHER_HEAT_INDEX_FILE"])
+
+    return write
+
+
+def _blocks(store):
+    frames = {}
+    for name in store.manifest["blocks"]:
+        rows = store.bounds(name)
+        frame = pd.DataFrame(np.asarray(store.features[rows]), columns=store.feature_columns)
+        frame["target"] = np.asarray(store.target[rows])
+        frame["date"] = np.asarray(store.dates[rows])
+        frame["city"] = np.asarray(store.city_codes[rows])
+        frames[name] = frame.sort_values(["city", "date"], kind="stable").reset_index(drop=True)
+    return frames
+
+
+def _refresh(weather, heat, start, end, previous_end):
+    """The rows dated ``start``..``end`` as an incremental refresh of the window ending at ``previous_end`` leaves them.
+
+    The first ``WEATHER_CLEAN_CONTEXT_DAYS`` are re-cleaned and two cities revise their overlap days.
+    """
+    keep = (heat["date"] >= start) & (heat["date"] < end)
+    weather, heat = weather[keep].copy(), heat[keep].copy()
+    recleaned = heat["date"] < start + pd.Timedelta(days=WEATHER_CLEAN_CONTEXT_DAYS)
+    overlap = (heat["date"] >= previous_end - pd.Timedelta(days=WEATHER_REFRESH_OVERLAP_DAYS)) & (heat["date"] < previous_end)
+    heat.loc[recleaned, "heat_index"] += 0.5
+    heat.loc[overlap & heat["city"].isin(CITIES[:2]), "heat_index"] += 1.5
+    return weather, heat
+
+
+def _frame(rows=12):
+    rng = np.random.default_rng(3)
+    return pd.DataFrame(
+        {
+            "a": rng.normal(size=rows),
+            "b": rng.integers(0, 5, rows).astype(float),
+            "target": rng.uniform(70.0, 110.0, rows),
+            "date": pd.date_range("2024-01-01", periods=rows, freq="D"),
+            "city": np.resize(CITIES, rows),
+        }
+    )
+
+
+def test_round_trip_lays_out_blocks_as_views(tmp_path):
+    frame = _frame()
+    blocks = {"train": np.array([0, 1, 2, 3, 4, 5, 6]), "valid": np.array([7, 8, 9]), "forecast": np.array([9, 10, 11])}
+    written = write_feature_store(
+        tmp_path, "k1", frame, ["a", "b"], blocks, target_col="target", date_col="date", city_col="city", state={"x": 1}
+    )
+
+    store = FeatureStore.open(tmp_path, "k1")
+
+    assert store is not None and written.manifest == store.manifest
+    assert store.feature_columns == ["a", "b"] and store.categories == CITIES and store.state == {"x": 1}
+    assert [store.bounds(name) for name in blocks] == [slice(0, 7), slice(7, 10), slice(10, 13)]
+    for name, rows in blocks.items():
+        features, target = store.block(name)
+        assert np.shares_memory(features, store.features) and np.shares_memory(target, store.target)
+        np.testing.assert_array_equal(features, frame[["a", "b"]].to_numpy(dtype=np.float32)[rows])
+        np.testing.assert_array_equal(target, frame["target"].to_numpy(dtype=np.float32)[rows])
+        np.testing.assert_array_equal(store.dates[store.bounds(name)], frame["date"].to_numpy()[rows])
+        assert list(store.cities(name)) == list(frame["city"].to_numpy()[rows])
+
+
+def test_open_rejects_other_keys_and_inconsistent_files(tmp_path):
+    frame = _frame()
+    store = write_feature_store(
+        tmp_path, "k1", frame, ["a", "b"], {"train": np.arange(len(frame))}, target_col="target", date_col="date", city_col="city"
+    )
+
+    assert FeatureStore.open(tmp_path, "k2") is None
+    assert FeatureStore.open(tmp_path).manifest["key"] == "k1"
+    assert FeatureStore.open(tmp_path / "missing") is None
+
+    manifest = (tmp_path / "manifest.json").read_text()
+    (tmp_path / "manifest.json").write_text(manifest.replace('"rows": 12', '"rows": 13'))
+    assert FeatureStore.open(tmp_path, "k1") is None
+    (tmp_path / "manifest.json").write_text(manifest)
+    (tmp_path / store.manifest["files"]["target"]).unlink()
+    assert FeatureStore.open(tmp_path, "k1") is None
+
+
+def test_prepared_store_is_reused_until_the_sources_change(sources, monkeypatch):
+    weather, heat = _history(days=60)
+    sources(weather, heat)
+    built = predict_heat_index._prepare_feature_store(logger)
+    rows = built.manifest["rows"]
+    assert sum(stop - start for start, stop in built.manifest["blocks"].values()) == rows
+    assert built.state["rows"] == rows
+
+    with monkeypatch.context() as patch:
+        patch.setattr(predict_heat_index, "_load_dataset", lambda: pytest.fail("cached features were rebuilt"))
+        reused = predict_heat_index._prepare_feature_store(logger)
+    assert reused.manifest == built.manifest
+
+    sources(weather.iloc[1:], heat.iloc[1:])
+    rebuilt = predict_heat_index._prepare_feature_store(logger)
+    assert rebuilt.manifest["key"] != built.manifest["key"]
+    assert rebuilt.manifest["rows"] < rows
+
+
+def test_history_state_anchors_lag_buffers_before_the_overlap_days(sources):
+    weather, heat = _history(days=30)
+    sources(weather, heat)
+    data = predict_heat_index._load_dataset()
+
+    state = predict_heat_index._history_state(data)
+
+    size = predict_heat_index._lag_buffer_size()
+    assert state["first_dates"] == {city: "2024-01-01" for city in CITIES}
+    assert state["last_dates"] == {city: "2024-01-30" for city in CITIES}
+    anchor_end = pd.Timestamp("2024-01-30") - pd.Timedelta(days=WEATHER_REFRESH_OVERLAP_DAYS)
+    for city in CITIES:
+        rows = data[(data["city"] == city) & (data["date"] <= anchor_end)]
+        assert state["anchor_buffers"][city] == rows["heat_index"].tolist()[-size:]
+        assert state["lag_buffers"][city] == data.loc[data["city"] == city, "heat_index"].tolist()[-size:]
+    assert state["partition_rebuild"] == partition.partition_rebuild_id(predict_heat_index.WEATHER_HISTORY_PARTITIONS_DIR)
+    assert state["partition_rebuild"] is not None
+
+
+def test_refresh_recomputes_only_head_and_tail_and_matches_a_full_rebuild(sources, monkeypatch, tmp_path):
+    weather, heat = _history(days=500, start="2022-11-01")
+    previous_end = pd.Timestamp("2024-03-01")
+    sources(weather[weather["date"] < previous_end], heat[heat["date"] < previous_end])
+    previous = predict_heat_index._prepare_feature_store(logger)
+    previous_files = set(previous.manifest["files"].values())
+    previous_features = np.array(previous.features)
+
+    # The window moves on a week: the head is trimmed and re-cleaned, the overlap days revised.
+    refreshed = _refresh(weather, heat, pd.Timestamp("2022-11-08"), pd.Timestamp("2024-03-08"), previous_end)
+    sources(*refreshed, refreshed_years=["2022", "2024"])
+    opened = []
+    read_table = pq.read_table
+
+    def recording_read_table(path, *args, **kwargs):
+        opened.append(path.parent.name)
+        return read_table(path, *args, **kwargs)
+
+    def no_rebuild(*args, **kwargs):
+        raise AssertionError("the store was rebuilt instead of updated")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(partition.pq, "read_table", recording_read_table)
+        patch.setattr(predict_heat_index, "_load_dataset", no_rebuild)
+        patch.setattr(predict_heat_index, "write_feature_store", no_rebuild)
+        updated = predict_heat_index._prepare_feature_store(logger)
+
+    assert set(opened) == {"year=2022", "year=2024"}
+    # The old files are unlinked, not rewritten, so an open mapping still reads the old rows.
+    np.testing.assert_array_equal(np.asarray(previous.features), previous_features)
+    assert not previous_files & set(updated.manifest["files"].values())
+    assert {path.name for path in (tmp_path / "store").glob("*.npy")} == set(updated.manifest["files"].values())
+
+    monkeypatch.setattr(predict_heat_index, "HEAT_INDEX_FEATURE_STORE_DIR", tmp_path / "rebuilt")
+    rebuilt = predict_heat_index._prepare_feature_store(logger)
+
+    assert updated.manifest["blocks"] == rebuilt.manifest["blocks"]
+    assert updated.state == rebuilt.state
+    for name, frame in _blocks(rebuilt).items():
+        pd.testing.assert_frame_equal(_blocks(updated)[name], frame)
+
+
+def test_full_partition_rewrites_and_stale_partitions_force_a_rebuild(sources):
+    weather, heat = _history()
+    cutoff = pd.Timestamp("2024-04-30")
+    sources(weather[weather["date"] < cutoff - pd.Timedelta(days=5)], heat[heat["date"] < cutoff - pd.Timedelta(days=5)])
+    store = predict_heat_index._prepare_feature_store(logger)
+
+    # A full clean rewrites every partition, so rows anywhere in the history may have changed.
+    sources(weather[weather["date"] < cutoff], heat[heat["date"] < cutoff])
+    assert predict_heat_index._update_features(store, "other", logger) is None
+
+    store = predict_heat_index._prepare_feature_store(logger)
+    sources(weather, heat, refreshed_years=["2024"])
+    heat_csv = predict_heat_index.WEATHER_HEAT_INDEX_FILE
+    stat = heat_csv.stat()
+    os.utime(heat_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert predict_heat_index._update_features(store, "other", logger) is None
+
+    mark_partition_source(predict_heat_index.WEATHER_HEAT_INDEX_PARTITIONS_DIR, heat_csv)
+    assert predict_heat_index._update_features(store, "other", logger) is not None
+
+
+def test_extend_rejects_the_current_key_and_unknown_cities(sources):
+    weather, heat = _history(days=60)
+    sources(weather, heat)
+    store = predict_heat_index._prepare_feature_store(logger)
+    frame = pd.DataFrame(
+        {
+            **{col: [0.0] for col in store.feature_columns},
+            "heat_index": [90.0],
+            "date": [pd.Timestamp("2024-03-01")],
+            "city": ["Delta"],
+        }
+    )
+    blocks = {"train": np.arange(store.manifest["rows"] + 1)}
+    options = {"target_col": "heat_index", "date_col": "date", "city_col": "city"}
+
+    with pytest.raises(ValueError, match="key"):
+        extend_feature_store(store, store.manifest["key"], frame, blocks, **options)
+    with pytest.raises(ValueError, match="cities"):
+        extend_feature_store(store, "other", frame, blocks, **options)
+    assert FeatureStore.open(store.directory, store.manifest["key"]) is not None
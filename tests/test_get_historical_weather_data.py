@@ -0,0 +1,106 @@
+import io
+import json
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+from loguru import logger
+
+import get_historical_weather_data as weather
+from constants.error import OpenMeteoRequestError
+from constants.params import DEFAULT_DAILY
+from constants.weather import WEATHER_CITY_COLUMN, WEATHER_DATE_COLUMN
+from routes.openmeteo import _validate_archive
+from utils.stream import read_archive_summary
+
+CITIES = [("Bacoor", 14.46, 120.94), ("Imus", 14.43, 120.94), ("Tanza", 14.39, 120.85)]
+
+
+def _payload(params):
+    """An archive body for ``params`` whose values depend on the day, so refetches agree."""
+    first, last = date.fromisoformat(params["start_date"]), date.fromisoformat(params["end_date"])
+    days = [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+    hours = [f"{day.isoformat()}T{hour:02d}:00" for day in days for hour in range(24)]
+    daily = {"time": [day.isoformat() for day in days]}
+    for idx, metric in enumerate(DEFAULT_DAILY):
+        daily[metric] = [round(20.0 + idx + day.toordinal() % 11 + params["latitude"], 2) for day in days]
+    hourly = {"time": hours}
+    for metric in params["hourly"]:
+        hourly[metric] = [50.0 + (stamp_idx % 24) for stamp_idx in range(len(hours))]
+    return {"latitude": params["latitude"], "longitude": params["longitude"], "daily": daily, "hourly": hourly}
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    coords = tmp_path / "coords.csv"
+    pd.DataFrame(CITIES, columns=["city", "latitude", "longitude"]).to_csv(coords, index=False)
+    paths = {
+        "CITY_COORDS_FILE": coords,
+        "WEATHER_HISTORY_RAW_FILE": tmp_path / "raw.csv",
+        "WEATHER_HISTORY_FILE": tmp_path / "clean.csv",
+        "WEATHER_HISTORY_PARQUET_FILE": tmp_path / "clean.parquet",
+        "WEATHER_HISTORY_PARTITIONS_DIR": tmp_path / "partitions",
+    }
+    for name, path in paths.items():
+        monkeypatch.setattr(weather, name, path)
+    monkeypatch.setattr(weather, "ensure_dirs", lambda: None)
+    monkeypatch.setattr(weather, "get_logger", lambda **kwargs: logger)
+    # City -> how its next 200 response body is rewritten.
+    overrides = {}
+
+    def fetch_many(params_list, **kwargs):
+        for params in params_list:
+            body = _payload(params)
+            for name, lat, _ in CITIES:
+                if params["latitude"] == lat and name in overrides:
+                    body = overrides[name](body)
+            handle = io.BytesIO(json.dumps(body).encode())
+            location = read_archive_summary(handle, kwargs["summarize_hourly"], kwargs["hourly_stats"])
+            try:
+                yield _validate_archive(location)
+            except OpenMeteoRequestError as exc:
+                yield exc
+
+    monkeypatch.setattr(weather, "fetch_weather_archive_many", fetch_many)
+    return tmp_path, overrides
+
+
+def _run(monkeypatch, end):
+    monkeypatch.setattr(weather, "_get_date_window", lambda: ("2024-01-01", end))
+    weather.main()
+
+
+def _city_rows(path, city):
+    frame = pd.read_csv(path, dtype=str, keep_default_na=False)
+    return frame[frame[WEATHER_CITY_COLUMN] == city].reset_index(drop=True)
+
+
+def test_empty_streamed_payload_is_rejected():
+    location = read_archive_summary(io.BytesIO(b'{"latitude":1,"longitude":2}'), ["temperature_2m"])
+
+    with pytest.raises(OpenMeteoRequestError):
+        _validate_archive(location)
+
+
+@pytest.mark.parametrize(
+    "rewrite",
+    [
+        lambda body: {"latitude": body["latitude"], "longitude": body["longitude"]},
+        # Hourly data alone passes validation but yields no daily rows.
+        lambda body: {**body, "daily": {"time": []}},
+    ],
+    ids=["empty", "no-daily"],
+)
+def test_empty_response_keeps_the_stored_overlap_window(history, monkeypatch, rewrite):
+    tmp_path, overrides = history
+    _run(monkeypatch, "2024-03-31")
+    raw_before = _city_rows(tmp_path / "raw.csv", "Tanza")
+    clean_before = _city_rows(tmp_path / "clean.csv", "Tanza")
+    assert raw_before[WEATHER_DATE_COLUMN].iloc[-1] == "2024-03-31"
+
+    overrides["Tanza"] = rewrite
+    _run(monkeypatch, "2024-04-05")
+
+    pd.testing.assert_frame_equal(_city_rows(tmp_path / "raw.csv", "Tanza"), raw_before)
+    pd.testing.assert_frame_equal(_city_rows(tmp_path / "clean.csv", "Tanza"), clean_before)
+    assert _city_rows(tmp_path / "clean.csv", "Imus")[WEATHER_DATE_COLUMN].iloc[-1] == "2024-04-05"
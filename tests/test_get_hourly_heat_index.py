@@ -0,0 +1,273 @@
+import csv
+import gzip
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from zoneinfo import ZoneInfo
+
+import get_hourly_heat_index as hourly
+from constants.params import DEFAULT_DAILY
+from constants.weather import DEFAULT_TIMEZONE
+from utils.heat_index import compute_heat_index_f
+from utils.units import fahrenheit_to_celsius
+
+CITIES = [("Imus", 14.4296, 120.9367), ("Tanza", 14.3944, 120.8531)]
+
+
+def _payload(params, today):
+    start = today - timedelta(days=params["past_days"])
+    days = params["past_days"] + params["forecast_days"]
+    times = [(start + timedelta(hours=hour)).strftime("%Y-%m-%dT%H:%M") for hour in range(24 * days)]
+    payload = {
+        "latitude": params["latitude"],
+        "longitude": params["longitude"],
+        "timezone": params["timezone"],
+        "hourly": {"time": times, **{metric: [30.0 + (idx % 24) / 4 for idx in range(len(times))] for metric in params["hourly"]}},
+    }
+    if "daily" in params:
+        payload["daily"] = {"time": times[::24], **{metric: [31.5] * days for metric in params["daily"]}}
+    return payload
+
+
+@pytest.fixture
+def published(tmp_path, monkeypatch):
+    coords = tmp_path / "coords.csv"
+    coords.write_text("city,latitude,longitude\n" + "".join(f"{name},{lat},{lon}\n" for name, lat, lon in CITIES))
+    paths = {
+        "CITY_COORDS_FILE": coords,
+        "HOURLY_HEAT_INDEX_FILE": tmp_path / "hourly_heat_index.csv",
+        "HOURLY_HEAT_INDEX_PUBLIC_FILE": tmp_path / "hourly_heat_index.json",
+        "HOURLY_HEAT_INDEX_COLUMNAR_PUBLIC_FILE": tmp_path / "hourly_heat_index.v2.json",
+        "HOURLY_HEAT_INDEX_GENERATION_FILE": tmp_path / "hourly_heat_index.generation.json",
+        "WEATHER_FORECAST_FILE": tmp_path / "forecast.csv",
+        "LOGS_DIR": tmp_path / "logs",
+    }
+    for name, path in paths.items():
+        monkeypatch.setattr(hourly, name, path)
+    monkeypatch.setattr(hourly, "ensure_dirs", lambda: None)
+    today = datetime.now(ZoneInfo(DEFAULT_TIMEZONE)).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    requests = []
+
+    async def fetch(params_list, **kwargs):
+        requests.extend(params_list)
+        for idx, params in enumerate(params_list):
+            yield idx, _payload(params, today), 0.01
+
+    monkeypatch.setattr(hourly, "fetch_weather_forecast_async", fetch)
+    hourly.main()
+    return tmp_path, today, requests
+
+
+def _covariate_requests(requests):
+    return [params for params in requests if "daily" in params]
+
+
+def test_published_hourly_files_keep_the_export_window(published):
+    directory, today, requests = published
+    first = (today - timedelta(days=hourly.PAST_DAYS)).date().isoformat()
+    last = (today + timedelta(days=hourly.FORECAST_DAYS - 1)).date().isoformat()
+    window_hours = 24 * (hourly.PAST_DAYS + hourly.FORECAST_DAYS)
+
+    hourly_requests = [params for params in requests if "daily" not in params]
+    assert len(hourly_requests) == len(CITIES)
+    assert all((params["past_days"], params["forecast_days"]) == (hourly.PAST_DAYS, hourly.FORECAST_DAYS) for params in hourly_requests)
+    with open(directory / "hourly_heat_index.csv", newline="", encoding="utf-8") as handle:
+        rows = list(csv.DictReader(handle))
+    assert len(rows) == len(CITIES) * window_hours
+    assert min(row["timestamp"][:10] for row in rows) == first
+    assert max(row["timestamp"][:10] for row in rows) == last
+
+    payload = json.loads((directory / "hourly_heat_index.json").read_text())
+    columnar = json.loads((directory / "hourly_heat_index.v2.json").read_text())
+    manifest = json.loads((directory / "hourly_heat_index.generation.json").read_text())
+    assert [len(city["hourly"]) for city in payload["cities"]] == [window_hours] * len(CITIES)
+    assert [len(city["values"]["heat_index_c"]) for city in columnar["cities"]] == [window_hours] * len(CITIES)
+    assert payload["generation"] == columnar["generation"] == manifest["generation"]
+
+
+def test_forecast_covariates_use_the_wider_window(published):
+    directory, _, requests = published
+
+    with open(directory / "forecast.csv", newline="", encoding="utf-8") as handle:
+        rows = list(csv.DictReader(handle))
+
+    covariate_requests = _covariate_requests(requests)
+    assert len(covariate_requests) == len(CITIES)
+    days = covariate_requests[0]["past_days"] + covariate_requests[0]["forecast_days"]
+    assert days == hourly.COVARIATE_PAST_DAYS + hourly.COVARIATE_FORECAST_DAYS
+    assert hourly.COVARIATE_FORECAST_DAYS > hourly.HEAT_INDEX_FEATURE_CONFIG["future_horizon_days"]
+    assert len(rows) == len(CITIES) * days
+    assert {row[DEFAULT_DAILY[0]] for row in rows} == {"31.5"}
+
+
+def test_recent_covariates_are_not_refetched(published):
+    directory, _, requests = published
+    written = (directory / "forecast.csv").read_bytes()
+    requests.clear()
+
+    hourly.main()
+
+    assert len(requests) == len(CITIES) and not _covariate_requests(requests)
+    assert (directory / "forecast.csv").read_bytes() == written
+
+
+def test_stale_covariates_are_refetched(published):
+    directory, _, requests = published
+    stale = time.time() - 3600 * hourly.COVARIATE_REFRESH_HOURS - 60
+    os.utime(directory / "forecast.csv", (stale, stale))
+    requests.clear()
+
+    hourly.main()
+
+    assert len(_covariate_requests(requests)) == len(CITIES)
+    assert (directory / "forecast.csv").stat().st_mtime > stale
+
+
+def _decode_columnar(payload, entry):
+    """Python copy of ``decodeColumnarCity`` in web/lib/server/insights.ts."""
+    fields = payload["fields"]
+    start = datetime.fromisoformat(entry["start"])
+
+    def point(step, values):
+        stamp = start + timedelta(seconds=step * payload["step_seconds"])
+        known = {field: value / payload["scale"] for field, value in zip(fields, values) if value is not None}
+        return {"city": entry["city"], "timestamp": stamp.isoformat(), **known}
+
+    size = len(entry["values"]["heat_index_c"])
+    offsets = entry.get("offsets", list(range(size)))
+    hourly = [point(offsets[idx], [entry["values"][field][idx] for field in fields]) for idx in range(size)]
+    return hourly, point(entry["current"]["offset"], entry["current"]["values"])
+
+
+def test_columnar_payload_decodes_to_the_legacy_records(published):
+    directory, _, _ = published
+    legacy = json.loads((directory / "hourly_heat_index.json").read_text())
+    body = (directory / "hourly_heat_index.v2.json").read_bytes()
+    columnar = json.loads(body)
+
+    assert (columnar["schema"], columnar["version"]) == ("hourly_heat_index", 2)
+    assert columnar["fields"] == list(hourly.COLUMNAR_FIELDS)
+    assert (columnar["scale"], columnar["step_seconds"]) == (100, 3600)
+    assert [entry["city"] for entry in columnar["cities"]] == [city["city"] for city in legacy["cities"]]
+    for entry, city in zip(columnar["cities"], legacy["cities"]):
+        assert (entry["latitude"], entry["longitude"]) == (city["latitude"], city["longitude"])
+        assert "offsets" not in entry
+        assert _decode_columnar(columnar, entry) == (city["hourly"], city["current"])
+    assert gzip.decompress((directory / "hourly_heat_index.v2.json.gz").read_bytes()) == body
+    if hourly.brotli is not None:
+        assert hourly.brotli.decompress((directory / "hourly_heat_index.v2.json.br").read_bytes()) == body
+
+
+def test_columnar_points_keep_gaps_and_unknown_values():
+    tz = ZoneInfo(DEFAULT_TIMEZONE)
+    times = [f"2024-05-0{1 + hour // 24}T{hour % 24:02d}:00" for hour in range(48) if hour not in (5, 6, 30)]
+    apparent = [None if idx % 7 == 0 else 33.125 + idx for idx in range(len(times))]
+    series = {
+        "time": times,
+        "temperature_2m": [28.0 + idx / 8 for idx in range(len(times))],
+        "relative_humidity_2m": [60.0 + idx % 20 for idx in range(len(times))],
+        "apparent_temperature": apparent,
+    }
+    points = hourly._hourly_points("Imus", series, tz, datetime(2024, 5, 2, 12, tzinfo=tz), {})
+    current = points.current_index(datetime(2024, 5, 2, 12, 30, tzinfo=tz))
+    header = {"fields": list(hourly.COLUMNAR_FIELDS), "scale": hourly.COLUMNAR_SCALE, "step_seconds": hourly.COLUMNAR_STEP_SECONDS}
+
+    entry = {"city": "Imus", **points.columnar(slice(None), current)}
+
+    assert entry["offsets"][:7] == [0, 1, 2, 3, 4, 7, 8]
+    assert _decode_columnar(header, entry) == (points.records(slice(None)), points.records([current])[0])
+    assert "apparent_temperature_c" not in points.records([0])[0]
+
+
+# Reference copy of the per-point builder that ``_hourly_points`` replaced.
+def _reference_points(city, hourly_section, tz):
+    times = [str(ts) for ts in (hourly_section.get("time") or [])]
+    temps = hourly_section.get("temperature_2m") or []
+    humidity = hourly_section.get("relative_humidity_2m") or []
+    apparent = hourly_section.get("apparent_temperature") or []
+    points = []
+    for idx, stamp in enumerate(times):
+        temp_c = hourly._safe_float(temps, idx)
+        rh = hourly._safe_float(humidity, idx)
+        if temp_c is None or rh is None:
+            continue
+        apparent_c = hourly._safe_float(apparent, idx)
+        try:
+            dt_local = datetime.fromisoformat(stamp).replace(tzinfo=tz)
+        except ValueError:
+            continue
+        hi_f = compute_heat_index_f(temp_c, rh)
+        point = {
+            "city": city,
+            "timestamp": dt_local.isoformat(),
+            "temperature_c": round(temp_c, 2),
+            "relative_humidity": round(rh, 2),
+            "heat_index_f": round(hi_f, 2),
+            "heat_index_c": round(float(fahrenheit_to_celsius(hi_f)), 2),
+            "_dt": dt_local,
+        }
+        if apparent_c is not None:
+            point["apparent_temperature_c"] = round(apparent_c, 2)
+        points.append(point)
+    points.sort(key=lambda item: item["_dt"])
+    return points
+
+
+def _reference_current(points, now_local):
+    past = [point for point in points if point["_dt"] <= now_local]
+    return past[-1] if past else points[0]
+
+
+def _strip(point):
+    return {key: value for key, value in point.items() if key != "_dt"}
+
+
+def _random_cell(rng, low, high):
+    roll = rng.random()
+    if roll < 0.08:
+        return None
+    if roll < 0.12:
+        return rng.choice(["", "abc", "n/a", "1,5"])
+    if roll < 0.2:
+        return f"{rng.uniform(low, high):.3f}"
+    if roll < 0.3:
+        # Exact halves at the rounding digit.
+        return rng.randint(low * 8, high * 8) / 8
+    return rng.uniform(low, high)
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_hourly_points_match_the_per_point_builder(seed):
+    rng = random.Random(seed)
+    tz = ZoneInfo(DEFAULT_TIMEZONE)
+    today = datetime(2024, 5, 2, tzinfo=tz)
+    # The response covers yesterday and today, like the PAST_DAYS/FORECAST_DAYS request.
+    times = [(today - timedelta(days=1) + timedelta(hours=hour)).strftime("%Y-%m-%dT%H:%M") for hour in range(48)]
+    for _ in range(rng.randint(0, 3)):
+        times[rng.randrange(len(times))] = rng.choice(["garbage", "2024-05-02T25:00", "2024-13-01T00:00", ""])
+    if rng.random() < 0.3:
+        times.append(times[rng.randrange(len(times))])
+    rng.shuffle(times)
+    series = {
+        "time": times,
+        "temperature_2m": [_random_cell(rng, 20, 40) for _ in times],
+        "relative_humidity_2m": [_random_cell(rng, 30, 100) for _ in times],
+        "apparent_temperature": [_random_cell(rng, 20, 50) for _ in times],
+    }
+    # Shorter value lists leave the last hours without data.
+    short = rng.choice(list(series)[1:])
+    series[short] = series[short][: rng.randint(30, len(times))]
+    now_local = today - timedelta(days=rng.choice([2, 0]), hours=-rng.uniform(0, 24))
+
+    expected = _reference_points("Imus", series, tz)
+    points = hourly._hourly_points("Imus", series, tz, today, {})
+    assert len(expected) > 10
+
+    records = points.records(slice(None))
+    assert json.dumps(records) == json.dumps([_strip(point) for point in expected])
+    current = points.records([points.current_index(now_local)])[0]
+    assert json.dumps(current) == json.dumps(_strip(_reference_current(expected, now_local)))
@@ -0,0 +1,39 @@
+import math
+
+import numpy as np
+
+from utils.heat_index import compute_heat_index_f, compute_heat_index_f_array
+
+
+def _scalar(temps, humidity):
+    return np.array([compute_heat_index_f(float(t), float(h)) for t, h in zip(temps, humidity)])
+
+
+def test_array_matches_scalar_on_dense_grid():
+    temps, humidity = np.meshgrid(np.arange(-10.0, 60.0, 0.25), np.arange(-5.0, 105.5, 0.5))
+    temps, humidity = temps.ravel(), humidity.ravel()
+
+    np.testing.assert_array_equal(compute_heat_index_f_array(temps, humidity), _scalar(temps, humidity))
+
+
+def test_array_matches_scalar_at_branch_edges():
+    # Around the 80 °F switch to the regression and the dry/humid adjustment bounds.
+    temps = np.array([26.6, 26.67, 26.7, 27.0, 30.5, 30.56, 44.4, 44.45, 35.0, 35.0, 35.0, 35.0])
+    humidity = np.array([12.99, 13.0, 85.0, 85.01, 90.0, 12.0, 5.0, 5.0, 0.0, 100.0, 13.0, 85.0])
+
+    np.testing.assert_array_equal(compute_heat_index_f_array(temps, humidity), _scalar(temps, humidity))
+
+
+def test_nan_humidity_is_clamped_like_scalar():
+    result = compute_heat_index_f_array(np.array([35.0, 20.0]), np.array([np.nan, np.nan]))
+
+    assert result[0] == compute_heat_index_f(35.0, math.nan)
+    assert result[1] == compute_heat_index_f(20.0, math.nan)
+    assert round(result[0], 3) == 87.316
+
+
+def test_nan_temperature_stays_nan():
+    result = compute_heat_index_f_array(np.array([np.nan]), np.array([50.0]))
+
+    assert np.isnan(result[0])
+    assert math.isnan(compute_heat_index_f(math.nan, 50.0))
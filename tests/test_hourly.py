@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from constants.weather import hourly_stat_name
+from utils.hourly import HourlySummary, _iso_days, parse_days, summarize_hourly
+
+METRICS = ["temperature_2m", "relative_humidity_2m"]
+STATS = ["mean", "min", "max", "count"]
+
+
+def _pandas_days(values):
+    stamps = pd.to_datetime(pd.Series(values, dtype=object), format="ISO8601", errors="coerce")
+    if isinstance(stamps.dtype, pd.DatetimeTZDtype):
+        stamps = stamps.dt.tz_localize(None)
+    return stamps.dt.normalize().to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+
+
+def _hours(start, hours, fmt):
+    return [fmt(stamp) for stamp in pd.date_range(start, periods=hours, freq="h")]
+
+
+FORMATS = {
+    "daily": lambda stamp: stamp.strftime("%Y-%m-%d"),
+    "hourly": lambda stamp: stamp.strftime("%Y-%m-%dT%H:%M"),
+    "seconds": lambda stamp: stamp.strftime("%Y-%m-%dT%H:%M:%S"),
+    "utc": lambda stamp: stamp.strftime("%Y-%m-%dT%H:%MZ"),
+    "offset": lambda stamp: stamp.strftime("%Y-%m-%dT%H:%M+08:00"),
+}
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+@pytest.mark.parametrize("start", ["2024-02-27T20:00", "2023-12-31T00:00", "1999-12-31T23:00"])
+def test_iso_days_match_pandas(fmt, start):
+    values = _hours(start, 80, FORMATS[fmt])
+
+    days = _iso_days(np.asarray(values, dtype=str))
+
+    assert days is not None
+    np.testing.assert_array_equal(days, _pandas_days(values))
+    np.testing.assert_array_equal(parse_days(values), _pandas_days(values))
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        ["2024-02-30", "2024-03-01"],
+        ["2023-02-29T00:00"],
+        ["2024-13-01"],
+        ["2024-05-01", ""],
+        ["2024-05-01 12:00", "not a date"],
+    ],
+)
+def test_malformed_values_fall_back_and_become_nat(values):
+    assert _iso_days(np.asarray(values, dtype=str)) is None
+    np.testing.assert_array_equal(parse_days(values), _pandas_days(values))
+
+
+@pytest.mark.parametrize("value", ["+024-05-01", " 024-05-01", "2024-5-1", "today"])
+def test_iso_days_reject_what_numpy_reads_loosely(value):
+    assert _iso_days(np.asarray(["2024-05-01", value], dtype=str)) is None
+
+
+def test_empty_input():
+    assert _iso_days(np.asarray([], dtype=str)) is None
+    assert parse_days([]).dtype == np.dtype("datetime64[D]") and len(parse_days([])) == 0
+
+    summary = summarize_hourly({"time": []}, METRICS, STATS)
+    assert len(summary.days) == 0 and summary.columns == {}
+    assert summarize_hourly(None, METRICS, STATS).columns == {}
+    np.testing.assert_array_equal(summary.positions(["2024-05-01"]), [-1])
+
+
+@pytest.mark.parametrize("fmt", ["hourly", "offset"])
+@pytest.mark.parametrize("seed", range(3))
+def test_summary_matches_pandas_groupby(fmt, seed):
+    rng = np.random.default_rng(seed)
+    times = _hours("2024-05-01T00:00", 24 * 4, FORMATS[fmt])
+    order = rng.permutation(len(times)) if seed else np.arange(len(times))
+    times = [times[index] for index in order]
+    hourly = {"time": times}
+    for metric in METRICS:
+        values = rng.uniform(20.0, 95.0, len(times)).round(1)
+        hourly[metric] = [None if rng.random() < 0.2 else float(value) for value in values]
+
+    summary = summarize_hourly(hourly, METRICS, STATS)
+
+    frame = pd.DataFrame({metric: pd.to_numeric(pd.Series(hourly[metric], dtype=object)) for metric in METRICS})
+    grouped = frame.groupby(_pandas_days(times))
+    np.testing.assert_array_equal(summary.days, np.array(sorted(set(_pandas_days(times)))))
+    for metric in METRICS:
+        for stat in STATS:
+            expected = getattr(grouped[metric], stat)().to_numpy(dtype="float64")
+            np.testing.assert_allclose(summary.columns[hourly_stat_name(metric, stat)], expected, rtol=1e-12)
+
+    positions = summary.positions(["2024-04-30", "2024-05-02", "2024-05-02T13:00", "2024-05-09"])
+    np.testing.assert_array_equal(positions, [-1, 1, 1, -1])
+
+
+def test_repeated_day_totals_fold_together():
+    days = parse_days(["2024-05-02", "2024-05-01", "2024-05-02"])
+    sums = np.array([[3.0], [5.0], [4.0]])
+    counts = np.array([[1], [2], [2]])
+
+    summary = HourlySummary.from_totals(days, ["x"], sums, counts, sums, sums, ["mean", "count", "max"])
+
+    np.testing.assert_array_equal(summary.days, parse_days(["2024-05-01", "2024-05-02"]))
+    np.testing.assert_allclose(summary.columns[hourly_stat_name("x", "mean")], [2.5, 7.0 / 3.0])
+    np.testing.assert_array_equal(summary.columns[hourly_stat_name("x", "count")], [2, 3])
+    np.testing.assert_array_equal(summary.columns[hourly_stat_name("x", "max")], [5.0, 4.0])
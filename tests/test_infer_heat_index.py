@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from loguru import logger
+
+import infer_heat_index
+import predict_heat_index
+from tests.test_predict_heat_index import saved_model  # noqa: F401 - fixture
+from tests.test_serve_heat_index import CITIES
+
+
+@pytest.fixture
+def infer(saved_model, monkeypatch):  # noqa: F811 - fixture
+    monkeypatch.setattr(infer_heat_index, "HEAT_INDEX_MODEL_FILE", saved_model / "model.json")
+    monkeypatch.setattr(infer_heat_index, "ensure_dirs", lambda: None)
+    monkeypatch.setattr(infer_heat_index, "get_logger", lambda **kwargs: logger)
+    monkeypatch.setattr(predict_heat_index, "HEAT_INDEX_PREDICTIONS_FILE", saved_model / "predictions.csv")
+    monkeypatch.setattr(predict_heat_index, "HEAT_INDEX_PREDICTIONS_PARQUET_FILE", saved_model / "predictions.parquet")
+    monkeypatch.setattr(predict_heat_index, "WEATHER_FORECAST_FILE", saved_model / "forecast.csv")
+    return saved_model
+
+
+def test_infer_uses_the_saved_city_categories(infer):
+    infer_heat_index.main()
+
+    predictions = pd.read_csv(infer / "predictions.csv")
+    assert sorted(predictions["city"].unique()) == CITIES
+
+
+def test_infer_refuses_cities_the_model_was_not_trained_on(infer):
+    # A new city sorting first would shift every other city's code by one.
+    for name in ("weather.csv", "heat_index.csv"):
+        frame = pd.read_csv(infer / name)
+        extra = frame[frame["city"] == "Alpha"].assign(city="Aardvark")
+        pd.concat([extra, frame], ignore_index=True).to_csv(infer / name, index=False)
+
+    infer_heat_index.main()
+
+    assert not (infer / "predictions.csv").exists()
+
+
+def test_horizon_city_ids_follow_the_saved_order(infer):
+    data = predict_heat_index._load_dataset()
+    order = ["Charlie", "Alpha", "Bravo"]
+    data["city"] = pd.Categorical(data["city"].astype(str), categories=order)
+    data.sort_values(["city", "date"], kind="stable", inplace=True, ignore_index=True)
+
+    forecast, _ = predict_heat_index._horizon_features(data)
+
+    codes = forecast["city"].astype(str).map({city: code for code, city in enumerate(order)})
+    np.testing.assert_array_equal(forecast["city_id"].to_numpy(), codes.to_numpy(dtype="float32"))
@@ -0,0 +1,248 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import routes.cache
+import routes.openmeteo as openmeteo
+import routes.session
+from constants.error import OpenMeteoRequestError
+from routes.session import configure_session, connection_stats, reset_connection_stats
+from utils.rate_limit import TokenBucket
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.arrivals: List[float] = []
+        # (status, headers) to answer with before the normal payload, consumed in order.
+        self.failures: List[Tuple[int, dict]] = []
+        self.queries: List[dict] = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return "http://127.0.0.1:{}/v1/archive".format(self.server_address[1])
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002 - BaseHTTPRequestHandler signature
+        pass
+
+    def _send(self, status: int, body: bytes, headers: Optional[dict] = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:  # noqa: N802 - BaseHTTPRequestHandler naming
+        query = parse_qs(urlparse(self.path).query)
+        with self.server.lock:
+            self.server.arrivals.append(time.monotonic())
+            self.server.queries.append(query)
+            failure = self.server.failures.pop(0) if self.server.failures else None
+        if failure is not None:
+            self._send(failure[0], b"{}", failure[1])
+            return
+        # Like Open-Meteo, comma-separated coordinates get a list with one entry per location.
+        latitudes = [float(value) for value in query["latitude"][0].split(",")]
+        locations = [
+            {"latitude": latitude, "daily": {"time": ["2024-01-01"]}, "hourly": {"time": ["2024-01-01T00:00"]}}
+            for latitude in latitudes
+        ]
+        self._send(200, json.dumps(locations if len(locations) > 1 else locations[0]).encode())
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setattr(routes.cache, "_cache", None)
+    monkeypatch.setattr(routes.cache, "_cache_configured", True)
+    monkeypatch.setattr(routes.session, "_session", None)
+    server = _StubServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    configure_session(pool_size=4, retries=0)
+    reset_connection_stats()
+    yield server
+    routes.session.get_session().close()
+    server.shutdown()
+    server.server_close()
+
+
+def _params(count: int) -> List[dict]:
+    return [{"latitude": 14.0 + idx, "longitude": 121.0, "daily": "temperature_2m_max"} for idx in range(count)]
+
+
+def _fake_sleep(monkeypatch) -> List[float]:
+    sleeps: List[float] = []
+    monkeypatch.setattr(openmeteo, "time", SimpleNamespace(sleep=sleeps.append, perf_counter=time.perf_counter, monotonic=time.monotonic))
+    return sleeps
+
+
+def test_results_keep_input_order_and_reuse_connections(stub):
+    results = list(openmeteo.fetch_weather_archive_many(_params(12), max_workers=1, url=stub.url))
+
+    assert [result["latitude"] for result in results] == [14.0 + idx for idx in range(12)]
+    stats = connection_stats()
+    assert stats["requests"] == 12
+    assert stats["new"] == 1
+    assert stats["reused"] == 11
+
+
+def test_concurrent_fetch_keeps_input_order(stub):
+    results = list(openmeteo.fetch_weather_archive_many(_params(20), max_workers=4, url=stub.url))
+
+    assert [result["latitude"] for result in results] == [14.0 + idx for idx in range(20)]
+    assert connection_stats()["new"] <= 4
+
+
+def test_chunks_split_by_batch_size_and_shared_params():
+    params = _params(5)
+    params[3] = {**params[3], "daily": "temperature_2m_min"}
+
+    chunks = openmeteo._chunk_params(params, 2)
+
+    assert chunks == [params[0:2], params[2:3], params[3:4], params[4:5]]
+    assert [len(chunk) for chunk in openmeteo._chunk_params(_params(5), 2)] == [2, 2, 1]
+    merged = openmeteo._merge_batch_params(params[0:2])
+    assert merged == {"latitude": "14.0,15.0", "longitude": "121.0,121.0", "daily": "temperature_2m_max"}
+
+
+def test_batched_response_is_mapped_back_in_input_order(stub):
+    results = list(openmeteo.fetch_weather_archive_many(_params(5), max_workers=2, batch_size=2, url=stub.url))
+
+    assert [result["latitude"] for result in results] == [14.0, 15.0, 16.0, 17.0, 18.0]
+    assert sorted(query["latitude"][0] for query in stub.queries) == ["14.0,15.0", "16.0,17.0", "18.0"]
+
+
+def test_failed_batch_falls_back_to_single_locations(stub):
+    stub.failures = [(500, {})]
+
+    results = list(openmeteo.fetch_weather_archive_many(_params(3), max_workers=1, batch_size=3, retries=0, url=stub.url))
+
+    assert [result["latitude"] for result in results] == [14.0, 15.0, 16.0]
+    assert [query["latitude"][0] for query in stub.queries] == ["14.0,15.0,16.0", "14.0", "15.0", "16.0"]
+
+
+def test_short_batched_response_falls_back_to_single_locations(stub, monkeypatch):
+    perform = openmeteo._perform_request
+
+    def drop_last_location(url, params, **kwargs):
+        data = perform(url, params, **kwargs)
+        return data[:-1] if isinstance(data, list) else data
+
+    monkeypatch.setattr(openmeteo, "_perform_request", drop_last_location)
+
+    results = list(openmeteo.fetch_weather_archive_many(_params(3), max_workers=1, batch_size=3, url=stub.url))
+
+    assert [result["latitude"] for result in results] == [14.0, 15.0, 16.0]
+    assert len(stub.queries) == 4
+
+
+def test_429_backs_off_five_seconds_per_attempt(stub, monkeypatch):
+    sleeps = _fake_sleep(monkeypatch)
+    stub.failures = [(429, {"Retry-After": "2"}), (429, {})]
+
+    result = openmeteo.fetch_weather_archive(_params(1)[0], retries=2, cooldown=0.0, url=stub.url)
+
+    assert result["latitude"] == 14.0
+    assert sleeps == [5.0, 10.0]
+    assert len(stub.arrivals) == 3
+
+
+def test_429_after_last_retry_raises_with_status(stub, monkeypatch):
+    sleeps = _fake_sleep(monkeypatch)
+    stub.failures = [(429, {"Retry-After": "120"})] * 3
+
+    with pytest.raises(OpenMeteoRequestError) as excinfo:
+        openmeteo.fetch_weather_archive(_params(1)[0], retries=2, cooldown=0.0, url=stub.url)
+
+    assert excinfo.value.status_code == 429
+    assert sleeps == [5.0, 10.0]
+
+
+def test_failed_location_is_returned_in_place(stub):
+    stub.failures = [(500, {})]
+
+    results = list(openmeteo.fetch_weather_archive_many(_params(3), max_workers=1, retries=0, url=stub.url))
+
+    assert isinstance(results[0], OpenMeteoRequestError)
+    assert [result["latitude"] for result in results[1:]] == [15.0, 16.0]
+
+
+def test_rate_limiter_paces_concurrent_requests(stub):
+    rate = 20.0
+    limiter = TokenBucket(rate, capacity=1)
+
+    results = list(openmeteo.fetch_weather_archive_many(_params(8), max_workers=4, rate_limiter=limiter, url=stub.url))
+
+    assert len(results) == 8
+    arrivals = sorted(stub.arrivals)
+    # One token is banked, so the remaining seven requests wait at least 1 / rate each.
+    assert arrivals[-1] - arrivals[0] >= 7 / rate * 0.9
+
+
+def test_retry_wait_past_the_deadline_fails_without_sleeping(stub, monkeypatch):
+    sleeps = _fake_sleep(monkeypatch)
+    stub.failures = [(429, {})]
+
+    with pytest.raises(OpenMeteoRequestError, match="deadline"):
+        openmeteo._perform_request(
+            stub.url, _params(1)[0], timeout=30, retries=2, cooldown=0.0, deadline=time.monotonic() + 2.0
+        )
+
+    assert sleeps == []
+    assert len(stub.arrivals) == 1
+
+
+def test_async_deadline_is_enforced_on_the_worker(stub):
+    stub.failures = [(429, {})]
+
+    async def collect():
+        return [
+            item
+            async for item in openmeteo.fetch_weather_forecast_async(
+                _params(2), max_concurrency=1, retries=2, deadline=2.0, url=stub.url
+            )
+        ]
+
+    started = time.monotonic()
+    results = sorted(asyncio.run(collect()))
+
+    assert time.monotonic() - started < 2.0
+    assert isinstance(results[0][1], OpenMeteoRequestError)
+    assert "deadline" in str(results[0][1])
+    assert results[1][1]["latitude"] == 15.0
+    assert all(0.0 <= seconds < 2.0 for _, _, seconds in results)
+
+
+def test_stalled_consumer_pauses_fetching(stub):
+    async def stall():
+        responses = openmeteo.fetch_weather_forecast_async(
+            _params(40), max_concurrency=2, queue_size=2, url=stub.url
+        )
+        first = await responses.__anext__()
+        await asyncio.sleep(0.5)
+        in_flight = len(stub.arrivals)
+        rest = [item async for item in responses]
+        return first, in_flight, rest
+
+    first, in_flight, rest = asyncio.run(stall())
+
+    # The consumed result, a full queue and one blocked result per worker.
+    assert in_flight <= 1 + 2 + 2
+    assert sorted(idx for idx, _, _ in [first, *rest]) == list(range(40))
+    assert len(stub.arrivals) == 40
@@ -0,0 +1,198 @@
+import json
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from constants.weather import WEATHER_CITY_COLUMN, WEATHER_DATE_COLUMN
+import utils.partition as partition
+from utils.clean import clean_weather_history, refresh_weather_history
+from utils.partition import (
+    drop_city_partitions,
+    first_partition_dates,
+    last_partition_dates,
+    load_partitions,
+    mark_partition_source,
+    partition_cities,
+    partition_rebuild_id,
+    partitions_match_source,
+    replace_city_years,
+    write_partitions,
+)
+
+
+def _frame(cities=("Imus", "San Pedro"), start="2023-12-20", days=30, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days, freq="D").strftime("%Y-%m-%d")
+    return pd.DataFrame(
+        {
+            WEATHER_CITY_COLUMN: np.repeat(cities, days),
+            WEATHER_DATE_COLUMN: np.tile(dates, len(cities)),
+            "temperature_2m_max": rng.uniform(20.0, 40.0, days * len(cities)).round(2),
+        }
+    )
+
+
+def _manifest(root, city):
+    matches = [path for path in root.glob("city=*/_manifest.json") if json.loads(path.read_text())["city"] == city]
+    return matches[0].parent, json.loads(matches[0].read_text())
+
+
+def _read_city(root, city):
+    city_dir, manifest = _manifest(root, city)
+    frames = [pq.read_table(city_dir / entry["file"]).to_pandas() for entry in manifest["years"].values()]
+    frame = pd.concat(frames, ignore_index=True)
+    frame[WEATHER_DATE_COLUMN] = frame[WEATHER_DATE_COLUMN].dt.strftime("%Y-%m-%d")
+    return frame[[WEATHER_DATE_COLUMN, "temperature_2m_max"]]
+
+
+def _city_rows(frame, city):
+    return frame.loc[frame[WEATHER_CITY_COLUMN] == city, [WEATHER_DATE_COLUMN, "temperature_2m_max"]].reset_index(drop=True)
+
+
+def test_written_partitions_split_cities_by_year(tmp_path):
+    frame = _frame()
+
+    assert write_partitions(tmp_path, frame, decimals=2) == 2
+
+    assert partition_cities(tmp_path) == ["Imus", "San Pedro"]
+    city_dir, manifest = _manifest(tmp_path, "San Pedro")
+    assert city_dir.name == "city=San%20Pedro"
+    assert {year: (entry["rows"], entry["min_date"], entry["max_date"]) for year, entry in manifest["years"].items()} == {
+        "2023": (12, "2023-12-20", "2023-12-31"),
+        "2024": (18, "2024-01-01", "2024-01-18"),
+    }
+    for city in ("Imus", "San Pedro"):
+        pd.testing.assert_frame_equal(_read_city(tmp_path, city), _city_rows(frame, city))
+
+    write_partitions(tmp_path, frame[frame[WEATHER_CITY_COLUMN] == "Imus"], decimals=2)
+    assert partition_cities(tmp_path) == ["Imus"]
+
+
+def test_replacing_years_leaves_other_years_untouched(tmp_path):
+    frame = _frame(cities=("Imus",))
+    write_partitions(tmp_path, frame, decimals=2)
+    city_dir, before = _manifest(tmp_path, "Imus")
+    rebuild = partition_rebuild_id(tmp_path)
+
+    revised = frame.copy()
+    revised.loc[revised[WEATHER_DATE_COLUMN] >= "2024-01-10", "temperature_2m_max"] += 1.0
+    written = replace_city_years(tmp_path, "Imus", revised, ["2024"], decimals=2)
+
+    _, after = _manifest(tmp_path, "Imus")
+    assert written == 18
+    assert partition_rebuild_id(tmp_path) == rebuild is not None
+    assert after["years"]["2023"] == before["years"]["2023"]
+    assert after["years"]["2024"]["file"] != before["years"]["2024"]["file"]
+    assert not (city_dir / before["years"]["2024"]["file"]).exists()
+    pd.testing.assert_frame_equal(_read_city(tmp_path, "Imus"), _city_rows(revised, "Imus"))
+
+    replace_city_years(tmp_path, "Imus", revised, [], decimals=2, keep_from="2024-01-05")
+    _, trimmed = _manifest(tmp_path, "Imus")
+    assert list(trimmed["years"]) == ["2024"]
+    assert trimmed["years"]["2024"]["min_date"] == "2024-01-05"
+    assert sorted(path.name for path in city_dir.iterdir()) == ["_manifest.json", "year=2024"]
+
+    write_partitions(tmp_path, revised, decimals=2)
+    assert partition_rebuild_id(tmp_path) != rebuild
+
+
+def test_loading_opens_only_the_filtered_cities_and_years(tmp_path, monkeypatch):
+    frame = _frame(cities=("Imus", "San Pedro", "Tanza"))
+    write_partitions(tmp_path, frame, decimals=2)
+    opened = []
+    read_table = pq.read_table
+
+    def _recording_read_table(path, *args, **kwargs):
+        opened.append(path.relative_to(tmp_path).parent.as_posix())
+        return read_table(path, *args, **kwargs)
+
+    monkeypatch.setattr(partition.pq, "read_table", _recording_read_table)
+    loaded = load_partitions(tmp_path, cities=["San Pedro"], start="2024-01-03", end="2024-01-07", columns=["temperature_2m_max"])
+
+    assert opened == ["city=San%20Pedro/year=2024"]
+    assert list(loaded.columns) == [WEATHER_CITY_COLUMN, WEATHER_DATE_COLUMN, "temperature_2m_max"]
+    assert loaded[WEATHER_CITY_COLUMN].astype(str).unique().tolist() == ["San Pedro"]
+    assert loaded[WEATHER_DATE_COLUMN].dt.strftime("%Y-%m-%d").tolist() == [f"2024-01-0{day}" for day in range(3, 8)]
+    expected = _city_rows(frame, "San Pedro")
+    expected = expected[expected[WEATHER_DATE_COLUMN].between("2024-01-03", "2024-01-07")]
+    np.testing.assert_array_equal(loaded["temperature_2m_max"].to_numpy(), expected["temperature_2m_max"].to_numpy())
+
+    opened.clear()
+    everything = load_partitions(tmp_path)
+    assert len(opened) == 6
+    assert len(everything) == len(frame)
+
+
+def test_last_dates_come_from_the_manifests_alone(tmp_path):
+    write_partitions(tmp_path, _frame(), decimals=2)
+    for part in tmp_path.glob("city=*/year=*/*.parquet"):
+        part.unlink()
+
+    assert last_partition_dates(tmp_path) == {"Imus": "2024-01-18", "San Pedro": "2024-01-18"}
+    assert first_partition_dates(tmp_path) == {"Imus": "2023-12-20", "San Pedro": "2023-12-20"}
+
+    drop_city_partitions(tmp_path, keep={"Imus"})
+    assert last_partition_dates(tmp_path) == {"Imus": "2024-01-18"}
+
+
+def test_partitions_match_only_the_source_they_were_marked_with(tmp_path):
+    source = tmp_path / "weather.csv"
+    source.write_text("city,date\n")
+    root = tmp_path / "partitions"
+
+    assert not partitions_match_source(root, source)
+    mark_partition_source(root, source)
+    assert partitions_match_source(root, source)
+
+    source.write_text("city,date\nImus,2024-01-01\n")
+    assert not partitions_match_source(root, source)
+    mark_partition_source(root, source)
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not partitions_match_source(root, source)
+
+
+def test_refresh_keeps_partitions_equal_to_a_full_rebuild(tmp_path):
+    rng = np.random.default_rng(4)
+    start = date(2023, 11, 1)
+
+    def raw_rows(cities, first, last):
+        days = [(start + timedelta(days=offset)).isoformat() for offset in range(first, last)]
+        return pd.DataFrame(
+            {
+                WEATHER_CITY_COLUMN: np.repeat(cities, len(days)),
+                WEATHER_DATE_COLUMN: np.tile(days, len(cities)),
+                "temperature_2m_max": rng.uniform(20.0, 40.0, len(days) * len(cities)).round(3).astype(str),
+            }
+        )
+
+    raw = tmp_path / "raw.csv"
+    raw_rows(["Imus", "Tanza"], 0, 80).to_csv(raw, index=False)
+    clean_weather_history(str(raw), str(tmp_path / "clean.csv"), partition_root=tmp_path / "refreshed")
+
+    # The window moves on by 5 days; only Imus is refetched and gains new days past New Year.
+    previous = pd.read_csv(raw, dtype=str)
+    kept = previous[(previous[WEATHER_DATE_COLUMN] >= (start + timedelta(days=5)).isoformat())]
+    kept = kept[~((kept[WEATHER_CITY_COLUMN] == "Imus") & (kept[WEATHER_DATE_COLUMN] >= (start + timedelta(days=73)).isoformat()))]
+    pd.concat([kept, raw_rows(["Imus"], 73, 85)]).to_csv(raw, index=False)
+    refresh_weather_history(
+        str(raw),
+        str(tmp_path / "clean.csv"),
+        {"Imus": (start + timedelta(days=73)).isoformat()},
+        partition_root=tmp_path / "refreshed",
+    )
+    clean_weather_history(str(raw), str(tmp_path / "rebuilt.csv"), partition_root=tmp_path / "rebuilt")
+
+    assert partitions_match_source(tmp_path / "refreshed", tmp_path / "clean.csv")
+    for city in ("Imus", "Tanza"):
+        _, refreshed = _manifest(tmp_path / "refreshed", city)
+        _, rebuilt = _manifest(tmp_path / "rebuilt", city)
+        assert {year: entry["rows"] for year, entry in refreshed["years"].items()} == {
+            year: entry["rows"] for year, entry in rebuilt["years"].items()
+        }
+        pd.testing.assert_frame_equal(_read_city(tmp_path / "refreshed", city), _read_city(tmp_path / "rebuilt", city))
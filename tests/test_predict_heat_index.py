@@ -0,0 +1,267 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+from loguru import logger
+
+import predict_heat_index
+from constants.files import METRICS_LOG_FILENAME
+from tests.test_serve_heat_index import CITIES, _save_model, _write_history
+from utils.lag_buffers import LagBuffers
+
+
+@pytest.fixture
+def saved_model(tmp_path, monkeypatch):
+    _write_history(tmp_path)
+    paths = {
+        "WEATHER_HISTORY_FILE": tmp_path / "weather.csv",
+        "WEATHER_HISTORY_PARQUET_FILE": tmp_path / "weather.parquet",
+        "WEATHER_HEAT_INDEX_FILE": tmp_path / "heat_index.csv",
+        "WEATHER_HEAT_INDEX_PARQUET_FILE": tmp_path / "heat_index.parquet",
+        "HEAT_INDEX_MODEL_FILE": tmp_path / "model.json",
+        "HEAT_INDEX_MODEL_META_FILE": tmp_path / "model.meta.json",
+        "HEAT_INDEX_TUNING_PROFILE_FILE": tmp_path / "tuning.json",
+    }
+    for name, path in paths.items():
+        monkeypatch.setattr(predict_heat_index, name, path)
+    _save_model(
+        paths["HEAT_INDEX_MODEL_FILE"],
+        paths["HEAT_INDEX_MODEL_META_FILE"],
+        0.0,
+        "first",
+        full_trained_at=datetime.now(timezone.utc).isoformat(),
+        full_valid_rmse=1e6,
+    )
+    return tmp_path
+
+
+def _valid_block():
+    features, feature_cols = predict_heat_index._build_feature_matrix(predict_heat_index._load_dataset())
+    return feature_cols, features[feature_cols].to_numpy(), features["heat_index"].to_numpy()
+
+
+def test_warm_start_requires_the_saved_city_categories(saved_model, monkeypatch):
+    monkeypatch.setitem(predict_heat_index.TRAIN_LIMITS, "warm_start", True)
+    feature_cols, X_valid, y_valid = _valid_block()
+
+    assert predict_heat_index._warm_start_base(feature_cols, CITIES, X_valid, y_valid, logger) is not None
+    # Adding a city that sorts first would shift every saved city_id by one.
+    assert predict_heat_index._warm_start_base(feature_cols, ["Aardvark", *CITIES], X_valid, y_valid, logger) is None
+    assert predict_heat_index._warm_start_base(feature_cols, CITIES[:2], X_valid, y_valid, logger) is None
+
+
+def _resave(saved_model, **meta):
+    meta = {"full_trained_at": datetime.now(timezone.utc).isoformat(), "full_valid_rmse": 1e6, **meta}
+    _save_model(saved_model / "model.json", saved_model / "model.meta.json", 0.0, "again", **meta)
+
+
+def test_warm_start_continues_only_a_current_model(saved_model, monkeypatch):
+    monkeypatch.setitem(predict_heat_index.TRAIN_LIMITS, "warm_start", True)
+    monkeypatch.setitem(predict_heat_index.TRAIN_LIMITS, "full_retrain_days", 7)
+    monkeypatch.setitem(predict_heat_index.TRAIN_LIMITS, "warm_start_max_drift", 0.05)
+    feature_cols, X_valid, y_valid = _valid_block()
+
+    def base():
+        return predict_heat_index._warm_start_base(feature_cols, CITIES, X_valid, y_valid, logger)
+
+    assert base() is not None
+    assert predict_heat_index._warm_start_base(feature_cols[:-1], CITIES, X_valid, y_valid, logger) is None
+    _resave(saved_model, feature_columns=["temperature_2m_max"])
+    assert base() is None
+
+    _resave(saved_model, full_trained_at=(datetime.now(timezone.utc) - timedelta(days=8)).isoformat())
+    assert base() is None
+    _resave(saved_model, full_trained_at=(datetime.now(timezone.utc) - timedelta(days=6)).isoformat())
+    assert base() is not None
+
+    # Four trees are far from fitting the target, so the RMSE sits well above 0.01.
+    _resave(saved_model, full_valid_rmse=0.01)
+    assert base() is None
+    monkeypatch.setitem(predict_heat_index.TRAIN_LIMITS, "warm_start_max_drift", 1e9)
+    assert base() is not None
+
+    (saved_model / "model.meta.json").unlink()
+    assert base() is None
+    _resave(saved_model)
+    monkeypatch.setitem(predict_heat_index.TRAIN_LIMITS, "warm_start", False)
+    assert base() is None
+
+
+class _LagPlusOne:
+    """Booster stand-in predicting the day before's heat index plus one."""
+
+    def __init__(self, feature_cols):
+        self.lag_1 = feature_cols.index("heat_index_lag_1")
+        self.lag_2 = feature_cols.index("heat_index_lag_2")
+        self.steps = []
+
+    def attr(self, name):
+        return "0" if name == "best_iteration" else None
+
+    def inplace_predict(self, features, iteration_range):
+        self.steps.append(features.copy())
+        return features[:, self.lag_1] + 1.0
+
+
+@pytest.fixture
+def future(saved_model):
+    data = predict_heat_index._load_dataset()
+    _, feature_cols = predict_heat_index._build_feature_matrix(data.copy())
+    buffers = LagBuffers.from_frame(data, "city", "heat_index", predict_heat_index._lag_buffer_size())
+    last_dates = {city: group["date"].max().strftime("%Y-%m-%d") for city, group in data.groupby("city", observed=True)}
+    last_values = {city: float(group["heat_index"].iloc[-1]) for city, group in data.groupby("city", observed=True)}
+    # Ten days of weather after the history, more than the forecast horizon.
+    weather = pd.read_csv(saved_model / "weather.csv")
+    weather["date"] = (pd.to_datetime(weather["date"]) + pd.Timedelta(days=60)).dt.strftime("%Y-%m-%d")
+    covariates = weather.groupby("city").head(10).reset_index(drop=True)
+    return buffers, last_dates, last_values, covariates, feature_cols
+
+
+def test_recursive_forecast_feeds_predictions_back_as_lags(future):
+    buffers, last_dates, last_values, covariates, feature_cols = future
+    booster = _LagPlusOne(feature_cols)
+    horizon = int(predict_heat_index.FEATURE_CONF["future_horizon_days"])
+
+    forecast = predict_heat_index._recursive_forecast(booster, buffers, last_dates, CITIES, covariates, feature_cols)
+
+    assert len(forecast) == len(CITIES) * horizon and len(booster.steps) == horizon
+    for city, rows in forecast.groupby("city"):
+        assert rows["lead_days"].tolist() == list(range(1, horizon + 1))
+        np.testing.assert_allclose(rows["heat_index_pred_f"], last_values[city] + np.arange(1, horizon + 1), rtol=1e-5)
+    # Step two sees step one's prediction as lag 1 and the last observed day as lag 2.
+    np.testing.assert_allclose(booster.steps[1][:, booster.lag_2], [last_values[city] for city in CITIES], rtol=1e-5)
+    np.testing.assert_allclose(buffers.window(CITIES)[:, -1], [last_values[city] + horizon for city in CITIES], rtol=1e-5)
+
+
+def test_recursive_forecast_stops_a_city_at_missing_covariates(future):
+    buffers, last_dates, _, covariates, feature_cols = future
+    gap = (pd.Timestamp(last_dates["Bravo"]) + pd.Timedelta(days=3)).strftime("%Y-%m-%d")
+    covariates.loc[(covariates["city"] == "Bravo") & (covariates["date"] == gap), "temperature_2m_max"] = np.nan
+
+    forecast = predict_heat_index._recursive_forecast(
+        _LagPlusOne(feature_cols), buffers, last_dates, CITIES, covariates, feature_cols
+    )
+
+    assert forecast.groupby("city")["lead_days"].max().to_dict() == {"Alpha": 7, "Bravo": 2, "Charlie": 7}
+
+
+def test_future_features_follow_the_history_and_require_every_input(future):
+    _, _, _, covariates, feature_cols = future
+    history = np.tile(np.arange(80.0, 87.0), (3, 1))
+
+    features = predict_heat_index._future_features(covariates.head(3).copy(), history, CITIES, feature_cols)
+
+    assert features.shape == (3, len(feature_cols))
+    np.testing.assert_array_equal(features[:, feature_cols.index("heat_index_lag_1")], [86.0] * 3)
+    np.testing.assert_array_equal(features[:, feature_cols.index("heat_index_lag_7")], [80.0] * 3)
+    with pytest.raises(ValueError, match="precipitation_sum"):
+        predict_heat_index._future_features(covariates.head(3).copy(), history, CITIES, [*feature_cols, "precipitation_sum"])
+
+
+def _arrays(seed=0, rows=200):
+    rng = np.random.default_rng(seed)
+    features = rng.normal(size=(rows, 3)).astype(np.float32)
+    # Pure noise: validation RMSE stops improving after a few rounds.
+    target = rng.normal(90.0, 5.0, rows).astype(np.float32)
+    return features[:150], target[:150], features[150:], target[150:]
+
+
+def _fit(**params):
+    fit_params = {"n_estimators": 300, "max_depth": 3, "learning_rate": 0.3, "tree_method": "hist", "device": "cpu"}
+    return predict_heat_index._fit_model({**fit_params, **params}, *_arrays(), logger)
+
+
+def test_spent_time_budget_stops_training(monkeypatch):
+    monkeypatch.setitem(predict_heat_index.TRAIN_LIMITS, "time_budget_seconds", 1e-9)
+
+    model, _, stopped = _fit(early_stopping_rounds=None)
+
+    assert stopped == "budget"
+    assert model.get_booster().num_boosted_rounds() == 1
+    budget = predict_heat_index._TimeBudget(0.0)
+    X_train, y_train, _, _ = _arrays()
+    booster = xgb.train({"max_depth": 2}, xgb.DMatrix(X_train, y_train), num_boost_round=50, callbacks=[budget])
+    assert budget.exhausted and booster.num_boosted_rounds() == 1
+
+
+def test_early_stopping_records_the_best_iteration(monkeypatch):
+    monkeypatch.setitem(predict_heat_index.TRAIN_LIMITS, "time_budget_seconds", None)
+
+    model, _, stopped = _fit(early_stopping_rounds=5)
+
+    booster = model.get_booster()
+    best = predict_heat_index._best_iteration(booster)
+    assert stopped == "early"
+    assert booster.attr("best_iteration") == str(best)
+    assert booster.num_boosted_rounds() == best + 1 + 5
+
+
+def test_predict_uses_trees_up_to_the_best_iteration(monkeypatch):
+    monkeypatch.setitem(predict_heat_index.TRAIN_LIMITS, "time_budget_seconds", None)
+    model, _, _ = _fit(early_stopping_rounds=5)
+    _, _, X_valid, _ = _arrays()
+    booster = model.get_booster()
+    best = predict_heat_index._best_iteration(booster)
+
+    pred = predict_heat_index._predict(model, X_valid)
+
+    np.testing.assert_array_equal(pred, booster[: best + 1].inplace_predict(X_valid))
+    assert not np.allclose(pred, model.predict(X_valid, iteration_range=(0, booster.num_boosted_rounds())))
+
+
+@pytest.fixture
+def trained(saved_model, monkeypatch):
+    """``predict_heat_index.main`` on the saved model's history, with small training limits."""
+    paths = {
+        "WEATHER_HISTORY_PARTITIONS_DIR": saved_model / "weather",
+        "WEATHER_HEAT_INDEX_PARTITIONS_DIR": saved_model / "heat_index",
+        "HEAT_INDEX_FEATURE_STORE_DIR": saved_model / "store",
+        "HEAT_INDEX_PREDICTIONS_FILE": saved_model / "predictions.csv",
+        "HEAT_INDEX_PREDICTIONS_PARQUET_FILE": saved_model / "predictions.parquet",
+        "HEAT_INDEX_FORECAST_FILE": saved_model / "heat_index_forecast.csv",
+        "HEAT_INDEX_FORECAST_PARQUET_FILE": saved_model / "heat_index_forecast.parquet",
+        "WEATHER_FORECAST_FILE": saved_model / "forecast.csv",
+        "LOGS_DIR": saved_model / "logs",
+    }
+    for name, path in paths.items():
+        monkeypatch.setattr(predict_heat_index, name, path)
+    monkeypatch.setattr(predict_heat_index, "ensure_dirs", lambda: None)
+    monkeypatch.setattr(predict_heat_index, "get_logger", lambda **kwargs: logger)
+    monkeypatch.setattr(predict_heat_index, "_system_stats", lambda: {"logical_cpus": 2, "gpu": None})
+    monkeypatch.setattr(predict_heat_index, "BASE_PARAMS", {**predict_heat_index.BASE_PARAMS, "device": "cpu"})
+    limits = {"min_estimators": 40, "max_estimators": 40, "early_stopping_rounds": 5, "warm_start_rounds": 10}
+    for name, value in limits.items():
+        monkeypatch.setitem(predict_heat_index.TRAIN_LIMITS, name, value)
+    monkeypatch.setitem(predict_heat_index.TRAIN_LIMITS, "time_budget_seconds", None)
+    return saved_model
+
+
+def test_metrics_log_records_the_best_iteration_and_stop(trained, monkeypatch):
+    monkeypatch.setitem(predict_heat_index.TRAIN_LIMITS, "warm_start", False)
+
+    predict_heat_index.main()
+
+    meta = predict_heat_index._read_model_meta()
+    line = (trained / "logs" / METRICS_LOG_FILENAME).read_text().splitlines()[-1]
+    fields = dict(item.split("=", 1) for item in line.split(",")[1:])
+    assert meta["mode"] == "full"
+    assert int(fields["best_iteration"]) == meta["best_iteration"]
+    assert int(fields["trees"]) == meta["rounds"]
+    assert fields["stopped"] in {"early", "complete"}
+    assert (fields["stopped"] == "early") == (meta["rounds"] < 40)
+
+
+def test_warm_start_boosts_on_top_of_the_saved_trees(trained, monkeypatch):
+    monkeypatch.setitem(predict_heat_index.TRAIN_LIMITS, "warm_start", True)
+    monkeypatch.setitem(predict_heat_index.TRAIN_LIMITS, "early_stopping_rounds", None)
+    saved = xgb.Booster(model_file=str(trained / "model.json")).get_dump()
+
+    predict_heat_index.main()
+
+    meta = predict_heat_index._read_model_meta()
+    booster, _ = predict_heat_index._load_saved_model()
+    assert meta["mode"] == "warm"
+    assert meta["rounds"] == len(saved) + 10
+    assert booster.get_dump()[: len(saved)] == saved
@@ -0,0 +1,176 @@
+import http.client
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from loguru import logger
+from xgboost import XGBRegressor
+
+import predict_heat_index
+import serve_heat_index
+from serve_heat_index import WEATHER_COLUMNS, HeatIndexService, build_server
+
+CITIES = ["Alpha", "Bravo", "Charlie"]
+
+
+def _write_history(directory):
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2024-01-01", periods=60, freq="D")
+    rows = len(CITIES) * len(dates)
+    weather = pd.DataFrame(
+        {
+            "city": np.repeat(CITIES, len(dates)),
+            "date": np.tile(dates.strftime("%Y-%m-%d"), len(CITIES)),
+            **{col: rng.uniform(10.0, 40.0, rows).round(2) for col in WEATHER_COLUMNS},
+        }
+    )
+    heat = weather[["city", "date"]].assign(heat_index=rng.uniform(70.0, 110.0, rows).round(2))
+    weather.to_csv(directory / "weather.csv", index=False)
+    heat.to_csv(directory / "heat_index.csv", index=False)
+
+
+def _save_model(path, meta_path, shift, trained_at, **meta):
+    features, feature_cols = predict_heat_index._build_feature_matrix(predict_heat_index._load_dataset())
+    model = XGBRegressor(n_estimators=4, max_depth=2, tree_method="hist", device="cpu")
+    model.fit(features[feature_cols].to_numpy(), features["heat_index"].to_numpy() + shift)
+    previous = os.stat(path).st_mtime_ns if path.exists() else 0
+    model.save_model(path)
+    # Make the change visible to the mtime check even on coarse-grained filesystems.
+    stamp = max(os.stat(path).st_mtime_ns, previous + 1_000_000_000)
+    os.utime(path, ns=(stamp, stamp))
+    meta = {"feature_columns": feature_cols, "categories": CITIES, "trained_at": trained_at, "mode": "full", **meta}
+    meta_path.write_text(json.dumps(meta))
+
+
+@pytest.fixture
+def served(tmp_path, monkeypatch):
+    _write_history(tmp_path)
+    paths = {
+        "WEATHER_HISTORY_FILE": tmp_path / "weather.csv",
+        "WEATHER_HISTORY_PARQUET_FILE": tmp_path / "weather.parquet",
+        "WEATHER_HEAT_INDEX_FILE": tmp_path / "heat_index.csv",
+        "WEATHER_HEAT_INDEX_PARQUET_FILE": tmp_path / "heat_index.parquet",
+        "HEAT_INDEX_MODEL_FILE": tmp_path / "model.json",
+        "HEAT_INDEX_MODEL_META_FILE": tmp_path / "model.meta.json",
+    }
+    for name, path in paths.items():
+        monkeypatch.setattr(predict_heat_index, name, path)
+    monkeypatch.setattr(serve_heat_index, "HEAT_INDEX_MODEL_FILE", tmp_path / "model.json")
+    monkeypatch.setattr(serve_heat_index, "WEATHER_FORECAST_FILE", tmp_path / "forecast.csv")
+    monkeypatch.setattr(
+        serve_heat_index,
+        "_SOURCES",
+        (tmp_path / "model.json", paths["HEAT_INDEX_MODEL_META_FILE"], paths["WEATHER_HISTORY_FILE"], paths["WEATHER_HEAT_INDEX_FILE"]),
+    )
+    monkeypatch.setitem(serve_heat_index.SERVICE_CONF, "max_batch_wait_ms", 100.0)
+    _save_model(tmp_path / "model.json", paths["HEAT_INDEX_MODEL_META_FILE"], 0.0, "first")
+
+    service = HeatIndexService(logger)
+    service.load()
+    server = build_server(service, logger, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield SimpleNamespace(port=server.server_address[1], directory=tmp_path)
+    server.shutdown()
+    server.server_close()
+    server.batcher.close(timeout=5.0)
+
+
+def _request(port, method, path, payload=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def _weather(value=25.0):
+    return {col: value for col in WEATHER_COLUMNS}
+
+
+def test_concurrent_requests_share_predict_calls(served):
+    barrier = threading.Barrier(12)
+    responses = []
+
+    def client(idx):
+        barrier.wait()
+        responses.append(_request(served.port, "POST", "/predict", {"city": CITIES[idx % 3], "weather": _weather()}))
+
+    threads = [threading.Thread(target=client, args=(idx,)) for idx in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [status for status, _ in responses] == [200] * 12
+    assert {body["date"] for _, body in responses} == {"2024-03-01"}
+    _, stats = _request(served.port, "GET", "/stats")
+    assert stats["items"] == 12
+    assert stats["batches"] < 12
+    assert stats["mean_batch_size"] > 1
+
+
+def test_unknown_city_is_rejected(served):
+    status, body = _request(served.port, "POST", "/predict", {"city": "Atlantis", "weather": _weather()})
+    assert status == 400
+    assert body["error"] == "Unknown city: 'Atlantis'"
+
+    status, body = _request(
+        served.port,
+        "POST",
+        "/predict",
+        {"requests": [{"city": "Atlantis", "weather": _weather()}, {"city": "Alpha", "weather": _weather()}]},
+    )
+    assert status == 200
+    assert "Unknown city" in body["results"][0]["error"]
+    assert body["results"][1]["city"] == "Alpha"
+
+
+def test_model_reloads_when_its_file_changes(served, monkeypatch):
+    request = {"city": "Bravo", "weather": _weather()}
+    _, before = _request(served.port, "POST", "/predict", request)
+
+    monkeypatch.setitem(serve_heat_index.SERVICE_CONF, "refresh_check_seconds", 0.0)
+    _save_model(served.directory / "model.json", served.directory / "model.meta.json", 50.0, "second")
+    _, after = _request(served.port, "POST", "/predict", request)
+    _, health = _request(served.port, "GET", "/health")
+
+    assert health["model_trained_at"] == "second"
+    assert after["heat_index_f"] > before["heat_index_f"] + 25.0
+
+
+def test_model_and_meta_from_different_generations_are_not_paired(served):
+    booster = predict_heat_index.Booster()
+    booster.load_model(served.directory / "model.json")
+    booster.set_attr(generation="20240101T000000000000Z")
+    booster.save_model(served.directory / "model.json")
+    meta_path = served.directory / "model.meta.json"
+    meta = json.loads(meta_path.read_text())
+    meta_path.write_text(json.dumps({**meta, "generation": "20240102T000000000000Z"}))
+
+    with pytest.raises(predict_heat_index.GenerationMismatchError):
+        predict_heat_index._load_saved_model()
+
+    meta_path.write_text(json.dumps({**meta, "generation": "20240101T000000000000Z"}))
+    loaded, loaded_meta = predict_heat_index._load_saved_model()
+    assert loaded.attr("generation") == loaded_meta["generation"]
+
+
+def test_cities_missing_from_the_saved_model_are_rejected(served, monkeypatch):
+    monkeypatch.setitem(serve_heat_index.SERVICE_CONF, "refresh_check_seconds", 0.0)
+    _save_model(served.directory / "model.json", served.directory / "model.meta.json", 0.0, "second", categories=CITIES[1:])
+
+    status, body = _request(served.port, "POST", "/predict", {"city": "Alpha", "weather": _weather()})
+    assert status == 400
+    assert "not trained on 'Alpha'" in body["error"]
+
+    status, body = _request(served.port, "POST", "/predict", {"city": "Bravo", "weather": _weather()})
+    assert status == 200
+    assert body["city"] == "Bravo"
@@ -0,0 +1,100 @@
+import io
+import json
+
+import numpy as np
+import pytest
+
+import utils.stream as stream
+from constants.weather import hourly_stat_name
+from utils.hourly import summarize_hourly
+from utils.stream import read_archive_summary
+
+METRICS = ["temperature_2m", "relative_humidity_2m"]
+STATS = ["mean", "min", "max", "count"]
+
+
+def _location(seed, days=3, latitude=14.43):
+    """An archive payload shaped like Open-Meteo's, with missing hours and one empty day."""
+    rng = np.random.default_rng(seed)
+    hours = days * 24
+    times = [f"2024-05-{1 + hour // 24:02d}T{hour % 24:02d}:00" for hour in range(hours)]
+    hourly = {"time": times}
+    for metric in METRICS:
+        values = [round(float(value), 1) for value in rng.uniform(20.0, 95.0, hours)]
+        hourly[metric] = [None if rng.random() < 0.2 else value for value in values]
+    hourly[METRICS[0]][24:48] = [None] * 24
+    return {
+        "latitude": latitude,
+        "longitude": 120.94,
+        "generationtime_ms": 0.41,
+        "utc_offset_seconds": 28800,
+        "timezone": "Asia/Manila",
+        "hourly_units": {"time": "iso8601", **{metric: "unit" for metric in METRICS}},
+        "hourly": hourly,
+        "daily_units": {"time": "iso8601", "temperature_2m_max": "°C"},
+        "daily": {"time": times[::24], "temperature_2m_max": [31.2, None, 33.0][:days]},
+    }
+
+
+@pytest.fixture(params=["ijson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "ijson":
+        if stream.ijson is None:
+            pytest.skip("ijson is not installed")
+    else:
+        monkeypatch.setattr(stream, "ijson", None)
+    return request.param
+
+
+def _read(payload):
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+    return read_archive_summary(io.BytesIO(body), METRICS, STATS)
+
+
+def _assert_matches_summarizer(location, payload):
+    expected = summarize_hourly(payload["hourly"], METRICS, STATS)
+    summary = location["hourly_summary"]
+    np.testing.assert_array_equal(summary.days, expected.days)
+    assert summary.columns.keys() == expected.columns.keys()
+    for name, values in expected.columns.items():
+        np.testing.assert_array_equal(summary.columns[name], values, err_msg=name)
+    assert location["daily"] == payload["daily"]
+    assert location["latitude"] == payload["latitude"] and location["timezone"] == payload["timezone"]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_daily_totals_match_the_in_memory_summarizer(backend, seed):
+    payload = _location(seed)
+
+    location = _read(payload)
+
+    _assert_matches_summarizer(location, payload)
+    columns = location["hourly_summary"].columns
+    assert columns[hourly_stat_name(METRICS[0], "count")][1] == 0
+    assert np.isnan(columns[hourly_stat_name(METRICS[0], "mean")][1])
+
+
+def test_values_before_the_time_axis_are_held_back(backend):
+    payload = _location(5)
+    hourly = payload["hourly"]
+    payload["hourly"] = {**{metric: hourly[metric] for metric in METRICS}, "time": hourly["time"]}
+
+    _assert_matches_summarizer(_read(payload), payload)
+
+
+def test_multi_location_payloads_decode_each_location(backend):
+    payloads = [_location(1), _location(2, days=2, latitude=14.2)]
+
+    locations = _read(payloads)
+
+    assert len(locations) == 2
+    for location, payload in zip(locations, payloads):
+        _assert_matches_summarizer(location, payload)
+
+
+@pytest.mark.parametrize("fraction", [0.3, 0.7, 0.999])
+def test_truncated_streams_raise_instead_of_returning_partial_totals(backend, fraction):
+    body = json.dumps([_location(3), _location(4)]).encode("utf-8")
+
+    with pytest.raises(ValueError):
+        _read(body[: int(len(body) * fraction)])
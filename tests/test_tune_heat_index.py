@@ -0,0 +1,130 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import predict_heat_index
+import tune_heat_index as tune
+from utils.feature_store import write_feature_store
+
+STATS = {"logical_cpus": 2}
+
+
+def _days(count, start="2024-01-01"):
+    return np.arange(np.datetime64(start, "D"), np.datetime64(start, "D") + count).astype("datetime64[ns]")
+
+
+@pytest.fixture
+def conf(monkeypatch):
+    for name, value in {"folds": 3, "fold_days": 30, "max_rounds": 200, "early_stopping_rounds": 5, "max_bin": 32}.items():
+        monkeypatch.setitem(tune.TUNE_CONF, name, value)
+    return tune.TUNE_CONF
+
+
+def test_fold_windows_train_only_on_earlier_days(conf):
+    dates = np.repeat(_days(100), 2)
+
+    windows = tune._fold_windows(dates)
+
+    assert len(windows) == 3
+    assert windows == sorted(windows)
+    assert windows[-1][1] == dates.max() + np.timedelta64(1, "D")
+    for (start, stop), (next_start, _) in zip(windows, windows[1:]):
+        assert stop == next_start
+    for start, stop in windows:
+        train = dates[dates < start]
+        valid = dates[(dates >= start) & (dates < stop)]
+        assert len(train) and len(valid)
+        assert train.max() < valid.min()
+
+
+def test_folds_without_prior_history_are_dropped(conf):
+    # 70 days leave no history before the oldest of three 30-day windows.
+    dates = _days(70)
+
+    windows = tune._fold_windows(dates)
+
+    assert len(windows) == 2
+    assert all(np.any(dates < start) for start, _ in windows)
+    assert tune._fold_windows(_days(30)) == []
+
+
+def test_candidates_start_with_the_baseline_and_skip_its_grid_copy(monkeypatch):
+    space = {"max_depth": [4, 6], "learning_rate": [0.05, 0.1], "subsample": [0.8, 1.0]}
+    monkeypatch.setitem(tune.TUNE_CONF, "search_space", space)
+    baseline = {"max_depth": 6, "learning_rate": 0.1, "subsample": 1.0}
+
+    candidates = tune._candidates(baseline, 100)
+
+    assert candidates[0] == baseline
+    assert len(candidates) == 8
+    assert sum(candidate == baseline for candidate in candidates) == 1
+    assert len({tuple(sorted(candidate.items())) for candidate in candidates}) == 8
+    assert tune._candidates(baseline, 3) == candidates[:3]
+    # Off the grid, the baseline is tried on top of every grid point.
+    assert len(tune._candidates({**baseline, "max_depth": 9}, 100)) == 9
+
+
+@pytest.fixture
+def folds(tmp_path, conf, monkeypatch):
+    rng = np.random.default_rng(0)
+    days = 120
+    frame = pd.DataFrame(
+        {
+            "x": rng.uniform(0.0, 10.0, days * 2),
+            "noise": rng.normal(size=days * 2),
+            "date": np.repeat(_days(days), 2),
+            "city": np.tile(["Imus", "Tanza"], days),
+        }
+    )
+    frame["target"] = 80.0 + 3.0 * frame["x"] + rng.normal(scale=0.5, size=len(frame))
+    store = write_feature_store(
+        tmp_path,
+        "k1",
+        frame,
+        ["x", "noise"],
+        {"train": np.arange(len(frame))},
+        target_col="target",
+        date_col="date",
+        city_col="city",
+    )
+    windows = tune._fold_windows(np.asarray(store.dates))
+    monkeypatch.setattr(tune, "_FOLDS", [])
+    tune._init_worker(str(tmp_path), "k1", len(frame), [(str(start), str(stop)) for start, stop in windows], 1)
+    return windows
+
+
+def test_trial_scores_every_fold_and_stops_early(folds):
+    params = {"max_depth": 3, "learning_rate": 0.3, "subsample": 1.0}
+
+    result = tune._run_trial(params, time.time() + 60)
+
+    assert len(tune._FOLDS) == len(folds) == 3
+    assert result["params"] == params
+    assert isinstance(result["rmse"], float) and 0.0 < result["rmse"] < 3.0
+    assert len(result["rounds"]) == 3
+    assert all(1 <= rounds < tune.TUNE_CONF["max_rounds"] for rounds in result["rounds"])
+
+
+def test_trial_past_its_deadline_has_no_score(folds):
+    result = tune._run_trial({"max_depth": 3, "learning_rate": 0.3, "subsample": 1.0}, time.time() - 1)
+
+    assert result["rmse"] is None and result["rounds"] == []
+
+
+def test_saved_profile_overrides_the_training_params(tmp_path, monkeypatch):
+    profile_file = tmp_path / "tuning.json"
+    monkeypatch.setattr(tune, "HEAT_INDEX_TUNING_PROFILE_FILE", profile_file)
+    monkeypatch.setattr(predict_heat_index, "HEAT_INDEX_TUNING_PROFILE_FILE", profile_file)
+    default = predict_heat_index._training_params(STATS, 1000)
+    tuned = {"max_depth": 4, "learning_rate": 0.12, "subsample": 0.7}
+    assert {name: default[name] for name in tune.TUNED_PARAMS} != tuned
+
+    tune._write_profile({"tuned_at": "2024-05-01T00:00:00+00:00", "params": tuned})
+    params = predict_heat_index._training_params(STATS, 1000)
+
+    assert {name: params[name] for name in tune.TUNED_PARAMS} == tuned
+    assert {name: value for name, value in params.items() if name not in tune.TUNED_PARAMS} == {
+        name: value for name, value in default.items() if name not in tune.TUNED_PARAMS
+    }
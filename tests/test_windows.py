@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.windows import iter_window_history, lag_values, window_history, window_stats
+
+
+def _series(seed, rows=400, groups=7):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(30.0, 5.0, rows)
+    values[rng.random(rows) < 0.15] = np.nan
+    codes = rng.integers(0, groups, rows)
+    return values, codes
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_lags_and_stats_match_pandas(seed):
+    values, codes = _series(seed)
+    history = window_history(values, codes, 10)
+    grouped = pd.Series(values).groupby(codes)
+
+    for lag in (1, 4, 10):
+        np.testing.assert_array_equal(lag_values(history, lag), grouped.shift(lag).to_numpy())
+    shifted = pd.Series(values).groupby(codes).shift(1)
+    for stat, result in window_stats(history, 7, ("mean", "std", "min", "max")).items():
+        expected = getattr(shifted.groupby(codes).rolling(7, min_periods=1), stat)()
+        np.testing.assert_allclose(result, expected.droplevel(0).sort_index().to_numpy(), rtol=1e-12)
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 3, 64, 10_000])
+def test_chunks_cover_every_row_once(chunk_rows):
+    values, codes = _series(11, rows=250)
+    full = window_history(values, codes, 6)
+    seen = np.zeros(len(values), dtype=int)
+    for positions, history in iter_window_history(values, codes, 6, chunk_rows=chunk_rows):
+        assert len(history) <= chunk_rows
+        np.testing.assert_array_equal(history, full[positions])
+        seen[positions] += 1
+
+    assert (seen == 1).all()
+
+
+def test_empty_input_yields_one_empty_chunk():
+    chunks = list(iter_window_history(np.empty(0), np.empty(0, dtype=int), 4))
+
+    assert len(chunks) == 1
+    assert chunks[0][1].shape == (0, 4)
+    assert window_history(np.empty(0), np.empty(0, dtype=int), 4).shape == (0, 4)
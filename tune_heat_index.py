@@ -0,0 +1,232 @@
+"""Search the heat index model's depth, learning rate and subsample with time-series CV.
+
+Run as ``python predict_heat_index.py tune``. Trials run in a process pool; every worker
+quantizes the fold matrices once from the memory-mapped feature store and reuses them for
+all of its trials. The best configuration is saved as the tuning profile that
+``predict_heat_index._training_params`` applies to later training runs.
+"""
+from __future__ import annotations
+
+import itertools
+import json
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import xgboost as xgb
+
+from constants.files import TUNE_HEAT_INDEX_LOG_FILENAME
+from constants.model import HEAT_INDEX_TUNING_CONFIG
+from constants.path import HEAT_INDEX_TUNING_PROFILE_FILE, LOGS_DIR, ensure_dirs
+from predict_heat_index import (
+	BASE_PARAMS,
+	_TimeBudget,
+	_prepare_feature_store,
+	_system_stats,
+	_training_params,
+)
+from utils.atomic import atomic_write
+from utils.feature_store import FeatureStore
+from utils.logger import get_logger
+
+TUNE_CONF = HEAT_INDEX_TUNING_CONFIG
+TUNED_PARAMS = ("max_depth", "learning_rate", "subsample")
+
+# Per-worker (train, valid) matrices of every fold, built once by ``_init_worker``.
+_FOLDS: List[Tuple[xgb.QuantileDMatrix, xgb.QuantileDMatrix]] = []
+_NTHREAD = 1
+
+
+def _fold_windows(dates: np.ndarray) -> List[Tuple[np.datetime64, np.datetime64]]:
+	"""Trailing (start, end) validation windows, oldest first; each fold trains on the days before its start."""
+	folds = int(TUNE_CONF.get("folds", 3))
+	span = np.timedelta64(int(TUNE_CONF.get("fold_days", 90)), "D")
+	end = dates.max() + np.timedelta64(1, "D")
+	windows = [(end - span * (idx + 1), end - span * idx) for idx in range(folds)]
+	return [(start, stop) for start, stop in reversed(windows) if np.any(dates < start)]
+
+
+def _init_worker(directory: str, key: str, rows: int, windows: List[Tuple[str, str]], nthread: int) -> None:
+	global _NTHREAD
+	_NTHREAD = nthread
+	store = FeatureStore.open(Path(directory), key)
+	if store is None:
+		raise RuntimeError(f"Feature store at {directory} changed while tuning")
+	features, target, dates = store.features[:rows], store.target[:rows], store.dates[:rows]
+	max_bin = int(TUNE_CONF.get("max_bin", 256))
+	for start, stop in windows:
+		train = dates < np.datetime64(start)
+		valid = (dates >= np.datetime64(start)) & (dates < np.datetime64(stop))
+		dtrain = xgb.QuantileDMatrix(features[train], target[train], max_bin=max_bin, nthread=nthread)
+		dvalid = xgb.QuantileDMatrix(features[valid], target[valid], ref=dtrain, max_bin=max_bin, nthread=nthread)
+		_FOLDS.append((dtrain, dvalid))
+
+
+def _run_trial(params: Dict[str, Any], deadline: float) -> Dict[str, Any]:
+	"""Mean validation RMSE of ``params`` over the worker's folds at each fold's best round."""
+	train_params = {
+		**{name: value for name, value in BASE_PARAMS.items() if name != "device"},
+		**params,
+		"device": "cpu",
+		"nthread": _NTHREAD,
+		"eval_metric": "rmse",
+		# Must match the bins the fold matrices were quantized with in ``_init_worker``.
+		"max_bin": int(TUNE_CONF.get("max_bin", 256)),
+	}
+	started = time.perf_counter()
+	scores: List[float] = []
+	rounds: List[int] = []
+	for dtrain, dvalid in _FOLDS:
+		remaining = deadline - time.time()
+		if remaining <= 0:
+			return {"params": params, "rmse": None, "rounds": rounds, "seconds": time.perf_counter() - started}
+		budget = _TimeBudget(remaining)
+		history: Dict[str, Any] = {}
+		booster = xgb.train(
+			train_params,
+			dtrain,
+			num_boost_round=int(TUNE_CONF.get("max_rounds", 2000)),
+			evals=[(dvalid, "valid")],
+			early_stopping_rounds=int(TUNE_CONF.get("early_stopping_rounds", 50)),
+			evals_result=history,
+			verbose_eval=False,
+			callbacks=[budget],
+		)
+		if budget.exhausted:
+			return {"params": params, "rmse": None, "rounds": rounds, "seconds": time.perf_counter() - started}
+		best = booster.best_iteration
+		scores.append(float(history["valid"]["rmse"][best]))
+		rounds.append(best + 1)
+	return {
+		"params": params,
+		"rmse": float(np.mean(scores)) if scores else None,
+		"rounds": rounds,
+		"seconds": time.perf_counter() - started,
+	}
+
+
+def _candidates(baseline: Dict[str, Any], max_trials: int) -> List[Dict[str, Any]]:
+	"""The current configuration first, then a seeded shuffle of the search grid."""
+	space = TUNE_CONF.get("search_space", {})
+	grid = [dict(zip(TUNED_PARAMS, values)) for values in itertools.product(*(space[name] for name in TUNED_PARAMS))]
+	order = np.random.default_rng(int(TUNE_CONF.get("seed", 42))).permutation(len(grid))
+	candidates = [baseline]
+	for idx in order:
+		if grid[idx] != baseline:
+			candidates.append(grid[idx])
+	return candidates[:max_trials]
+
+
+def _write_profile(profile: Dict[str, Any]) -> None:
+	with atomic_write(HEAT_INDEX_TUNING_PROFILE_FILE, encoding="utf-8") as handle:
+		json.dump(profile, handle, indent=2)
+
+
+def main(budget_seconds: float | None = None, max_trials: int | None = None, workers: int | None = None) -> None:
+	ensure_dirs()
+	logger = get_logger(
+		name="tune_heat_index",
+		log_dir=str(LOGS_DIR),
+		log_filename=TUNE_HEAT_INDEX_LOG_FILENAME,
+		use_case="data",
+	)
+	budget_seconds = float(budget_seconds if budget_seconds is not None else TUNE_CONF.get("budget_seconds", 900))
+	max_trials = int(max_trials if max_trials is not None else TUNE_CONF.get("max_trials", 40))
+	deadline = time.time() + budget_seconds
+
+	store = _prepare_feature_store(logger)
+	rows = store.bounds("valid").stop
+	dates = np.asarray(store.dates[:rows])
+	windows = _fold_windows(dates)
+	if not windows:
+		logger.error("Not enough history for {} folds of {} days; nothing to tune.", TUNE_CONF.get("folds"), TUNE_CONF.get("fold_days"))
+		return
+
+	stats = _system_stats()
+	cpus = int(stats.get("logical_cpus") or 1)
+	baseline_params = _training_params(stats, int(np.count_nonzero(dates < windows[-1][0])))
+	baseline = {name: baseline_params[name] for name in TUNED_PARAMS}
+	candidates = _candidates(baseline, max_trials)
+	workers = int(workers or TUNE_CONF.get("max_workers") or cpus)
+	workers = max(1, min(workers, len(candidates)))
+	nthread = int(TUNE_CONF.get("threads_per_trial") or max(1, cpus // workers))
+	logger.info(
+		"Tuning {} configurations over {} folds with {} workers x {} threads within {:.0f}s",
+		len(candidates),
+		len(windows),
+		workers,
+		nthread,
+		budget_seconds,
+	)
+
+	results: List[Dict[str, Any]] = []
+	queue = iter(candidates)
+	pending: set[Future] = set()
+	# Spawned workers start with fresh OpenMP state; forking after the parent used it can hang.
+	with ProcessPoolExecutor(
+		max_workers=workers,
+		mp_context=multiprocessing.get_context("spawn"),
+		initializer=_init_worker,
+		initargs=(
+			str(store.directory),
+			store.manifest["key"],
+			rows,
+			[(str(start), str(stop)) for start, stop in windows],
+			nthread,
+		),
+	) as pool:
+		for params in itertools.islice(queue, workers):
+			pending.add(pool.submit(_run_trial, params, deadline))
+		while pending:
+			done, pending = wait(pending, return_when=FIRST_COMPLETED)
+			for future in done:
+				result = future.result()
+				results.append(result)
+				if result["rmse"] is None:
+					logger.info("Trial {} ran out of budget after {:.1f}s", result["params"], result["seconds"])
+				else:
+					logger.info(
+						"Trial {} | CV RMSE={:.4f} | rounds={} | {:.1f}s",
+						result["params"],
+						result["rmse"],
+						result["rounds"],
+						result["seconds"],
+					)
+				if time.time() < deadline:
+					params = next(queue, None)
+					if params is not None:
+						pending.add(pool.submit(_run_trial, params, deadline))
+
+	scored = [result for result in results if result["rmse"] is not None]
+	if not scored:
+		logger.error("No trial finished within {:.0f}s; tuning profile left unchanged.", budget_seconds)
+		return
+	best = min(scored, key=lambda result: result["rmse"])
+	baseline_rmse = next((result["rmse"] for result in scored if result["params"] == baseline), None)
+	profile = {
+		"tuned_at": datetime.now(timezone.utc).isoformat(),
+		"params": best["params"],
+		"cv_rmse": best["rmse"],
+		"baseline_params": baseline,
+		"baseline_cv_rmse": baseline_rmse,
+		"best_rounds": best["rounds"],
+		"folds": [[str(start), str(stop)] for start, stop in windows],
+		"trials": len(scored),
+		"feature_columns": store.feature_columns,
+	}
+	_write_profile(profile)
+	logger.info(
+		"Best {} | CV RMSE={:.4f} (current settings {}) | {}/{} trials in {:.0f}s; saved profile to {}",
+		best["params"],
+		best["rmse"],
+		"n/a" if baseline_rmse is None else f"{baseline_rmse:.4f}",
+		len(scored),
+		len(candidates),
+		budget_seconds - max(0.0, deadline - time.time()),
+		HEAT_INDEX_TUNING_PROFILE_FILE,
+	)
+
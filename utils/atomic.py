@@ -0,0 +1,208 @@
+"""Atomic file writes: readers see either the previous file or the complete new one.
+
+Data is written to a temporary file in the destination's directory, fsynced and renamed
+over the destination. ``FileGeneration`` stages several such files and publishes them
+together, followed by a manifest naming the generation. The renames are atomic one at a
+time only, so writers stamp the generation id into each artifact and readers load them
+through ``read_generation``, which retries until every stamp agrees.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar, Union
+
+PathLike = Union[str, "os.PathLike[str]"]
+T = TypeVar("T")
+
+
+class GenerationMismatchError(RuntimeError):
+    """Artifacts kept carrying different generation ids after every retry."""
+
+
+def _temp_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def _discard(path: Path) -> None:
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+def _fsync_file(path: Path) -> None:
+    with open(path, "rb") as handle:
+        os.fsync(handle.fileno())
+
+
+def _fsync_dir(directory: Path) -> None:
+    # Makes the rename itself durable; directories cannot be opened this way on Windows.
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_path(path: PathLike) -> Iterator[Path]:
+    """Yield a temporary path for a writer that takes a path; it replaces ``path`` on success.
+
+    When the block raises, the temporary file is removed and ``path`` is left untouched.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = _temp_path(path)
+    try:
+        yield tmp_path
+        _fsync_file(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        _discard(tmp_path)
+        raise
+    _fsync_dir(path.parent)
+
+
+@contextmanager
+def atomic_write(
+    path: PathLike,
+    mode: str = "w",
+    *,
+    encoding: Optional[str] = None,
+    newline: Optional[str] = None,
+) -> Iterator[IO[Any]]:
+    """``open(path, mode)`` that only replaces ``path`` once the block completes."""
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, mode, encoding=encoding, newline=newline) as handle:
+            yield handle
+
+
+def atomic_write_bytes(path: PathLike, data: bytes) -> None:
+    with atomic_write(path, "wb") as handle:
+        handle.write(data)
+
+
+class FileGeneration:
+    """Files staged together and published as one generation.
+
+    Use ``path``/``open``/``write_bytes`` to stage each file; nothing is visible until
+    ``publish``, which fsyncs every staged file before renaming any of them, so a failed
+    write leaves the whole previous generation in place. Each rename is atomic on its own
+    but a reader can land between two of them, so writers put ``generation`` inside every
+    artifact and readers compare the ids with ``read_generation``. ``manifest``, replaced
+    last, records the generation id and the published files' sizes and mtimes. Used as a
+    context manager it publishes on success and discards the staged files on error.
+    """
+
+    def __init__(self, manifest: Optional[PathLike] = None) -> None:
+        self.manifest = Path(manifest) if manifest is not None else None
+        self.generation = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        self._staged: List[Tuple[Path, Path]] = []
+
+    def path(self, target: PathLike) -> Path:
+        """The staging path for ``target``, for writers that take a path."""
+        target = Path(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = _temp_path(target)
+        self._staged.append((tmp_path, target))
+        return tmp_path
+
+    @contextmanager
+    def open(
+        self,
+        target: PathLike,
+        mode: str = "w",
+        *,
+        encoding: Optional[str] = None,
+        newline: Optional[str] = None,
+    ) -> Iterator[IO[Any]]:
+        with open(self.path(target), mode, encoding=encoding, newline=newline) as handle:
+            yield handle
+
+    def write_bytes(self, target: PathLike, data: bytes) -> None:
+        self.path(target).write_bytes(data)
+
+    def discard(self) -> None:
+        for tmp_path, _ in self._staged:
+            _discard(tmp_path)
+        self._staged = []
+
+    def publish(self) -> str:
+        """Rename every staged file into place, then write the manifest; returns the generation id."""
+        try:
+            for tmp_path, _ in self._staged:
+                _fsync_file(tmp_path)
+        except BaseException:
+            self.discard()
+            raise
+        files: Dict[str, Dict[str, int]] = {}
+        for tmp_path, target in self._staged:
+            os.replace(tmp_path, target)
+            stat = target.stat()
+            name = os.path.relpath(target, self.manifest.parent) if self.manifest is not None else str(target)
+            files[name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        for directory in {target.parent for _, target in self._staged}:
+            _fsync_dir(directory)
+        self._staged = []
+        if self.manifest is not None:
+            payload = {
+                "generation": self.generation,
+                "published_at": datetime.now(timezone.utc).isoformat(),
+                "files": files,
+            }
+            with atomic_write(self.manifest, encoding="utf-8") as handle:
+                json.dump(payload, handle, indent=2)
+        return self.generation
+
+    def __enter__(self) -> "FileGeneration":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.publish()
+        else:
+            self.discard()
+
+
+def read_generation(
+    read: Callable[[], T],
+    stamps: Callable[[T], Iterable[Optional[str]]],
+    *,
+    attempts: int = 20,
+    delay: float = 0.05,
+) -> T:
+    """Call ``read`` until every generation id ``stamps`` finds in its result agrees.
+
+    Artifacts written before generations were stamped carry no id; when none of them has
+    one the result is accepted as is. Raises ``GenerationMismatchError`` when the ids still
+    differ after ``attempts`` reads, e.g. because a writer died between two renames.
+    """
+    for attempt in range(attempts):
+        result = read()
+        seen = set(stamps(result))
+        if len(seen) <= 1:
+            return result
+        if attempt + 1 < attempts:
+            time.sleep(delay)
+    raise GenerationMismatchError(f"Artifacts still span generations {sorted(map(str, seen))} after {attempts} reads")
+
+
+__all__ = [
+    "FileGeneration",
+    "GenerationMismatchError",
+    "atomic_path",
+    "atomic_write",
+    "atomic_write_bytes",
+    "read_generation",
+]
@@ -0,0 +1,123 @@
+"""Micro-batching of concurrent requests and rolling latency percentiles."""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Sequence
+
+import numpy as np
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """Run items submitted from many threads through ``handler`` in batches on one thread.
+
+    A batch starts with the first waiting item and takes whatever else arrives within
+    ``max_wait`` seconds, up to ``max_batch_size`` items. ``handler`` returns one result per
+    item; an exception instance in that list fails only its own item, while an exception
+    raised by ``handler`` fails the whole batch.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = 256,
+        max_wait: float = 0.005,
+        name: str = "micro-batcher",
+    ) -> None:
+        self.handler = handler
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait))
+        self.batches = 0
+        self.items = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def close(self, timeout: float | None = None) -> None:
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _collect(self, first: Any) -> tuple[List[Any], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                entry = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch, stopping = self._collect(first)
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+            self.batches += 1
+            self.items += len(batch)
+            try:
+                results = list(self.handler(items))
+                if len(results) != len(items):
+                    raise RuntimeError(f"Batch handler returned {len(results)} results for {len(items)} items")
+            except Exception as exc:  # noqa: BLE001 - surfaced through every future of the batch
+                for future in futures:
+                    future.set_exception(exc)
+                continue
+            for future, result in zip(futures, results):
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
+
+
+class LatencyTracker:
+    """Thread-safe counters plus p50/p99 over the most recent ``window`` latencies."""
+
+    def __init__(self, window: int = 10000) -> None:
+        self._samples: Deque[float] = deque(maxlen=max(1, int(window)))
+        self._lock = threading.Lock()
+        self.count = 0
+        self.errors = 0
+
+    def record(self, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.errors += int(error)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = np.fromiter(self._samples, dtype="float64", count=len(self._samples))
+            count, errors = self.count, self.errors
+        if len(samples):
+            p50, p99 = np.percentile(samples, [50, 99]) * 1000.0
+            latency = {"p50_ms": round(float(p50), 3), "p99_ms": round(float(p99), 3), "max_ms": round(float(samples.max()) * 1000.0, 3)}
+        else:
+            latency = {"p50_ms": None, "p99_ms": None, "max_ms": None}
+        return {"requests": count, "errors": errors, "window": len(samples), **latency}
+
+
+__all__ = ["LatencyTracker", "MicroBatcher"]
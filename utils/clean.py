@@ -2,10 +2,26 @@ import csv
 import os
 import re
 import unicodedata
-from datetime import datetime
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import List, Mapping, Optional
 
-from constants.weather import WEATHER_CITY_COLUMN, WEATHER_DATE_COLUMN
+import numpy as np
+import pandas as pd
+
+from constants.weather import (
+    WEATHER_CITY_COLUMN,
+    WEATHER_CLEAN_CONTEXT_DAYS,
+    WEATHER_DATE_COLUMN,
+)
+from utils.atomic import atomic_path, atomic_write
+from utils.columnar import write_columnar
+from utils.partition import (
+    drop_city_partitions,
+    mark_partition_source,
+    partitions_match_source,
+    replace_city_years,
+    write_partitions,
+)
 
 
 def _open_with_fallback(path: str):
@@ -55,7 +71,7 @@ def clean_city_coords(raw_path: str, clean_path: str) -> int:
 
     written = 0
     rf = _open_with_fallback(raw_path)
-    with rf, open(clean_path, "w", newline="", encoding="utf-8") as wf:
+    with rf, atomic_write(clean_path, "w", newline="", encoding="utf-8") as wf:
         reader = csv.reader(rf)
         writer = csv.writer(wf)
         header = next(reader, None)
@@ -78,13 +94,6 @@ def clean_city_coords(raw_path: str, clean_path: str) -> int:
     return written
 
 
-def _parse_date(value: str) -> datetime:
-    try:
-        return datetime.fromisoformat(value)
-    except ValueError:
-        return datetime.min
-
-
 def _parse_float(value: Optional[str]) -> Optional[float]:
     if value is None:
         return None
@@ -100,73 +109,205 @@ def _parse_float(value: Optional[str]) -> Optional[float]:
     return parsed
 
 
-def _fill_series(values: List[Optional[float]]) -> List[float]:
-    filled: List[Optional[float]] = values[:]
-    last: Optional[float] = None
-    for idx, val in enumerate(filled):
-        if val is None:
-            filled[idx] = last
-        else:
-            last = val
+def _parse_float_column(values: pd.Series) -> np.ndarray:
+    stripped = values.str.strip()
+    try:
+        parsed = stripped.where(stripped != "", "nan").astype(object).to_numpy().astype("float64")
+    except ValueError:
+        parsed = np.array([_parse_float(value) for value in stripped], dtype="float64")
+    parsed[parsed == 0.0] = np.nan
+    return parsed
 
-    last = None
-    for idx in range(len(filled) - 1, -1, -1):
-        val = filled[idx]
-        if val is None:
-            filled[idx] = last
-        else:
-            last = val
-
-    for idx, val in enumerate(filled):
-        if val is None:
-            filled[idx] = 0.0
-
-    smoothed: List[float] = []
-    window = 3
-    for idx, _ in enumerate(filled):
-        start = max(0, idx - window + 1)
-        subset = [v for v in filled[start : idx + 1] if v is not None]
-        if subset:
-            smoothed.append(sum(subset) / len(subset))
+
+def _shift_within_groups(values: np.ndarray, positions: np.ndarray, periods: int) -> np.ndarray:
+    shifted = np.full_like(values, np.nan)
+    if periods < len(values):
+        shifted[periods:] = values[: len(values) - periods]
+    shifted[positions < periods] = np.nan
+    return shifted
+
+
+def _fill_frame(frame: pd.DataFrame, group_col: str, value_cols: List[str], window: int = 3) -> None:
+    grouped = frame.groupby(group_col, sort=False)
+    filled = grouped[value_cols].ffill()
+    filled = filled.groupby(frame[group_col], sort=False).bfill().fillna(0.0)
+    positions = grouped.cumcount().to_numpy()
+
+    for col in value_cols:
+        values = filled[col].to_numpy(dtype="float64")
+        # Add the window oldest-first so each mean matches the trailing list-slice average.
+        total = np.zeros_like(values)
+        count = np.zeros(len(values), dtype="int64")
+        # inf + -inf is NaN like the list-based sum; don't warn about it.
+        with np.errstate(invalid="ignore"):
+            for periods in range(window - 1, -1, -1):
+                shifted = _shift_within_groups(values, positions, periods)
+                present = ~np.isnan(shifted)
+                total = np.where(present, total + shifted, total)
+                count += present
+            frame[col] = total / count
+
+
+def _read_raw_frame(path: str) -> pd.DataFrame:
+    handle = _open_with_fallback(path)
+    with handle:
+        frame = pd.read_csv(handle, dtype=str, keep_default_na=False, na_filter=False)
+    return frame.fillna("")
+
+
+def _clean_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    fieldnames = list(frame.columns)
+    meta_cols = {WEATHER_CITY_COLUMN, WEATHER_DATE_COLUMN}
+    value_cols = [col for col in fieldnames if col not in meta_cols]
+
+    city_key = frame[WEATHER_CITY_COLUMN] if WEATHER_CITY_COLUMN in frame else pd.Series("", index=frame.index)
+    date_key = frame[WEATHER_DATE_COLUMN] if WEATHER_DATE_COLUMN in frame else pd.Series("", index=frame.index)
+    order = pd.DataFrame(
+        {
+            "_city": city_key,
+            "_parsed": pd.to_datetime(date_key, format="ISO8601", errors="coerce"),
+        }
+    ).sort_values(["_city", "_parsed"], kind="stable", na_position="first").index
+    frame = frame.loc[order].reset_index(drop=True)
+    frame["_city"] = city_key.loc[order].to_numpy()
+
+    for col in value_cols:
+        frame[col] = _parse_float_column(frame[col])
+    _fill_frame(frame, "_city", value_cols)
+
+    frame["_date"] = date_key.loc[order].to_numpy()
+    frame.sort_values(["_city", "_date"], kind="stable", inplace=True)
+    frame.drop(columns=["_city", "_date"], inplace=True)
+    return frame
+
+
+def _write_clean_frame(frame: pd.DataFrame, clean_path: str, columnar_path: Optional[Path] = None) -> None:
+    with atomic_path(clean_path) as tmp_path:
+        frame.to_csv(
+            tmp_path,
+            index=False,
+            float_format="%.2f",
+            na_rep="nan",
+            lineterminator="\r\n",
+            encoding="utf-8",
+        )
+    if columnar_path is not None:
+        write_columnar(frame, columnar_path, decimals=2)
+
+
+def _sync_partitions(
+    root: Path,
+    clean_path: str,
+    frame: pd.DataFrame,
+    refreshed: Optional[pd.DataFrame] = None,
+    keep_from: Optional[pd.Series] = None,
+) -> None:
+    # With ``refreshed`` only the years it touches (and years trimmed by ``keep_from``) are
+    # rewritten; otherwise every partition is rebuilt from ``frame``.
+    try:
+        if refreshed is None:
+            write_partitions(root, frame, decimals=2)
         else:
-            smoothed.append(0.0)
-    return smoothed
+            cities = refreshed[WEATHER_CITY_COLUMN]
+            refreshed_years = refreshed[WEATHER_DATE_COLUMN].str[:4].groupby(cities).unique()
+            for city, rows in frame.groupby(WEATHER_CITY_COLUMN, sort=True):
+                years = refreshed_years.get(city, ())
+                replace_city_years(root, city, rows, years, decimals=2, keep_from=keep_from.get(city))
+            drop_city_partitions(root, keep=set(frame[WEATHER_CITY_COLUMN]))
+    except ValueError:
+        drop_city_partitions(root, keep=())
+        return
+    mark_partition_source(root, clean_path)
 
 
-def clean_weather_history(raw_path: str, clean_path: str) -> int:
+def clean_weather_history(
+    raw_path: str,
+    clean_path: str,
+    columnar_path: Optional[Path] = None,
+    partition_root: Optional[Path] = None,
+) -> int:
     os.makedirs(os.path.dirname(clean_path), exist_ok=True)
-    rf = _open_with_fallback(raw_path)
-    with rf:
-        rows = list(csv.DictReader(rf))
-    if not rows:
+    frame = _read_raw_frame(raw_path)
+    if frame.empty:
         return 0
 
-    fieldnames = list(rows[0].keys())
-    meta_cols = {WEATHER_CITY_COLUMN, WEATHER_DATE_COLUMN}
-    value_cols = [col for col in fieldnames if col not in meta_cols]
+    cleaned = _clean_frame(frame)
+    del frame
+    _write_clean_frame(cleaned, clean_path, columnar_path)
+    if partition_root is not None:
+        _sync_partitions(partition_root, clean_path, cleaned)
+    return len(cleaned)
 
-    grouped: Dict[str, List[Dict[str, str]]] = {}
-    for row in rows:
-        key = row.get(WEATHER_CITY_COLUMN, "unknown")
-        grouped.setdefault(key, []).append(row)
-
-    cleaned_rows: List[Dict[str, str]] = []
-    for city, city_rows in grouped.items():
-        city_rows.sort(key=lambda r: _parse_date(r.get("date", "")))
-        for col in value_cols:
-            series = [_parse_float(r.get(col)) for r in city_rows]
-            filled = _fill_series(series)
-            for idx, value in enumerate(filled):
-                city_rows[idx][col] = f"{value:.2f}"
-        cleaned_rows.extend(city_rows)
-
-    cleaned_rows.sort(
-        key=lambda r: (r.get(WEATHER_CITY_COLUMN, ""), r.get(WEATHER_DATE_COLUMN, ""))
-    )
 
-    with open(clean_path, "w", newline="", encoding="utf-8") as wf:
-        writer = csv.DictWriter(wf, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(cleaned_rows)
+def refresh_weather_history(
+    raw_path: str,
+    clean_path: str,
+    since: Mapping[str, str],
+    context_days: int = WEATHER_CLEAN_CONTEXT_DAYS,
+    columnar_path: Optional[Path] = None,
+    partition_root: Optional[Path] = None,
+) -> int:
+    """Re-clean only the affected rows of the cities in ``since`` and keep the rest of ``clean_path``.
+
+    Filling and smoothing only look backwards (except for a series' leading gap), so rows
+    dated ``since[city]`` or later are cleaned from ``context_days`` of raw history before
+    the cutoff. The raw lookback window is trimmed for every city, including those missing
+    from ``since`` because their fetch failed, so the first ``context_days`` of each city
+    are re-cleaned to match a full rebuild. Rows outside the raw data are dropped.
+    When ``columnar_path`` is given a Parquet copy of the result is written alongside; with
+    ``partition_root`` only the affected years of each city partition are rewritten.
+    """
+    if not since or not os.path.exists(clean_path):
+        return clean_weather_history(raw_path, clean_path, columnar_path, partition_root)
+
+    raw = _read_raw_frame(raw_path)
+    if raw.empty:
+        return 0
+    previous = pd.read_csv(clean_path, dtype=str, keep_default_na=False, na_filter=False).fillna("")
+    if list(previous.columns) != list(raw.columns):
+        return clean_weather_history(raw_path, clean_path, columnar_path, partition_root)
+
+    def _shift_days(dates: pd.Series, days: int) -> pd.Series:
+        shifted = pd.to_datetime(dates, format="ISO8601") + pd.Timedelta(days=days)
+        return shifted.dt.strftime("%Y-%m-%d")
 
-    return len(cleaned_rows)
+    raw_city = raw[WEATHER_CITY_COLUMN]
+    raw_date = raw[WEATHER_DATE_COLUMN]
+    refreshed_cities = raw_city.isin(list(since))
+    cutoffs = pd.Series(dict(since), dtype="string")
+    context_starts = _shift_days(cutoffs, -context_days)
+    first_raw_dates = raw_date.groupby(raw_city).min()
+    head_ends = _shift_days(first_raw_dates, context_days)
+
+    in_head = raw_date < raw_city.map(head_ends).fillna("")
+    in_context = refreshed_cities & (raw_date >= raw_city.map(context_starts).fillna(""))
+    head = _clean_frame(raw.loc[in_head])
+    tail = _clean_frame(raw.loc[in_context])
+    tail_city = tail[WEATHER_CITY_COLUMN]
+    tail_date = tail[WEATHER_DATE_COLUMN]
+    tail = tail.loc[
+        (tail_date >= tail_city.map(cutoffs).fillna("")) & (tail_date >= tail_city.map(head_ends).fillna(""))
+    ]
+    refreshed = pd.concat([head, tail], ignore_index=True)
+    value_cols = [col for col in refreshed.columns if col not in {WEATHER_CITY_COLUMN, WEATHER_DATE_COLUMN}]
+    for col in value_cols:
+        refreshed[col] = refreshed[col].map("{:.2f}".format)
+
+    prev_city = previous[WEATHER_CITY_COLUMN]
+    prev_date = previous[WEATHER_DATE_COLUMN]
+    unaffected = (prev_date >= prev_city.map(head_ends).fillna("")) & (
+        ~prev_city.isin(cutoffs.index) | (prev_date < prev_city.map(cutoffs).fillna(""))
+    )
+    within_raw = prev_city.isin(first_raw_dates.index) & (prev_date >= prev_city.map(first_raw_dates).fillna(""))
+    kept = previous.loc[unaffected & within_raw]
+
+    combined = pd.concat([kept, refreshed], ignore_index=True)
+    combined.sort_values([WEATHER_CITY_COLUMN, WEATHER_DATE_COLUMN], kind="stable", inplace=True)
+    partitions_in_sync = partition_root is not None and partitions_match_source(partition_root, clean_path)
+    _write_clean_frame(combined, clean_path, columnar_path)
+    if partition_root is not None:
+        if partitions_in_sync:
+            _sync_partitions(partition_root, clean_path, combined, refreshed, first_raw_dates)
+        else:
+            _sync_partitions(partition_root, clean_path, combined)
+    return len(combined)
@@ -0,0 +1,191 @@
+"""Typed Parquet copies of the CSV datasets, with CSV fallback on read."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from constants.weather import WEATHER_CITY_COLUMN, WEATHER_DATE_COLUMN
+from utils.atomic import atomic_path
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+COLUMNAR_COMPRESSION = "zstd"
+_DATE_FORMAT = "%Y-%m-%d"
+
+
+def columnar_available() -> bool:
+    return pq is not None
+
+
+def round_like_format(values: np.ndarray, decimals: int) -> np.ndarray:
+    """Round like ``float(f"{value:.{decimals}f}")``, i.e. to what a CSV reader would load.
+
+    ``np.round`` only disagrees with string formatting on near-ties, so just those values
+    go through Python formatting.
+    """
+    values = np.asarray(values, dtype="float64")
+    rounded = np.round(values, decimals)
+    scaled = values * 10.0 ** decimals
+    with np.errstate(invalid="ignore"):
+        near_tie = np.abs(scaled - np.floor(scaled) - 0.5) <= 1e-9 * np.maximum(1.0, np.abs(scaled))
+    for idx in np.flatnonzero(near_tie & np.isfinite(values)):
+        rounded[idx] = float(f"{values[idx]:.{decimals}f}")
+    return rounded
+
+
+def _float_column(series: pd.Series) -> np.ndarray:
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series.to_numpy(dtype="float64", na_value=np.nan)
+    values = series.astype(object).to_numpy(copy=True)
+    values[pd.isna(values) | (values == "")] = None
+    # Object-to-float conversion goes through float(), so text parses exactly as csv would.
+    return values.astype("float64")
+
+
+def _discard(path: Path) -> None:
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+def columnar_frame(
+    frame: pd.DataFrame,
+    *,
+    decimals: Optional[int] = None,
+    categories: Sequence[str] = (WEATHER_CITY_COLUMN,),
+    dates: Sequence[str] = (WEATHER_DATE_COLUMN,),
+) -> pd.DataFrame:
+    """Return the typed copy of ``frame`` that is stored in Parquet.
+
+    ``categories`` become dictionary columns, ``dates`` become ``datetime64[ns]`` and every
+    other column float64, rounded to ``decimals`` when the CSV is written with a matching
+    float format. Raises ``ValueError`` when a column cannot be converted losslessly.
+    """
+    columns = {}
+    try:
+        for col in frame.columns:
+            series = frame[col]
+            if col in categories:
+                columns[col] = series.astype("category")
+            elif col in dates:
+                parsed = pd.to_datetime(series, format=_DATE_FORMAT, errors="coerce")
+                if (parsed.isna() & series.notna() & (series.astype(str) != "")).any():
+                    raise ValueError(f"Unparseable dates in column {col}")
+                columns[col] = parsed.astype("datetime64[ns]")
+            else:
+                values = _float_column(series)
+                columns[col] = round_like_format(values, decimals) if decimals is not None else values
+    except TypeError as exc:
+        raise ValueError(str(exc)) from exc
+    return pd.DataFrame(columns, columns=list(frame.columns), index=frame.index)
+
+
+def write_parquet(frame: pd.DataFrame, path: Path) -> None:
+    """Write an already typed frame to ``path`` through a temporary file and rename."""
+    path = Path(path)
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    with atomic_path(path) as tmp_path:
+        pq.write_table(table, tmp_path, compression=COLUMNAR_COMPRESSION)
+
+
+def write_columnar(
+    frame: pd.DataFrame,
+    path: Path,
+    *,
+    decimals: Optional[int] = None,
+    categories: Sequence[str] = (WEATHER_CITY_COLUMN,),
+    dates: Sequence[str] = (WEATHER_DATE_COLUMN,),
+) -> bool:
+    """Write ``frame`` as compressed Parquet next to its CSV twin (see ``columnar_frame``).
+
+    If a column cannot be converted losslessly, or pyarrow is not installed, any existing
+    copy is removed so readers fall back to the CSV.
+    """
+    path = Path(path)
+    if pq is None:
+        _discard(path)
+        return False
+    try:
+        typed = columnar_frame(frame, decimals=decimals, categories=categories, dates=dates)
+    except ValueError:
+        _discard(path)
+        return False
+    write_parquet(typed, path)
+    return True
+
+
+def columnar_is_current(csv_path: Path, columnar_path: Path) -> bool:
+    """True when ``columnar_path`` exists and is not older than ``csv_path``."""
+    if pq is None:
+        return False
+    try:
+        columnar_mtime = Path(columnar_path).stat().st_mtime_ns
+    except OSError:
+        return False
+    try:
+        return columnar_mtime >= Path(csv_path).stat().st_mtime_ns
+    except OSError:
+        return True
+
+
+def read_columnar(path: Path, columns: Optional[Iterable[str]] = None) -> Optional[pd.DataFrame]:
+    """Read a Parquet copy, keeping only the requested ``columns`` that exist; None on failure."""
+    if pq is None:
+        return None
+    try:
+        if columns is not None:
+            available = set(pq.read_schema(path).names)
+            columns = [col for col in columns if col in available]
+        return pd.read_parquet(path, columns=columns)
+    except Exception:
+        return None
+
+
+def read_table(
+    csv_path: Path,
+    columnar_path: Path,
+    *,
+    dates: Sequence[str] = (WEATHER_DATE_COLUMN,),
+    categories: Sequence[str] = (),
+) -> pd.DataFrame:
+    """Load a dataset from its Parquet copy when current, otherwise from the CSV.
+
+    Both paths return the same dtypes: ``dates`` as ``datetime64[ns]``, ``categories`` as
+    pandas categoricals and dictionary columns not listed there as plain strings.
+    """
+    frame = read_columnar(columnar_path) if columnar_is_current(csv_path, columnar_path) else None
+    if frame is None:
+        frame = pd.read_csv(csv_path, parse_dates=list(dates))
+
+    for col in frame.columns:
+        series = frame[col]
+        if col in dates:
+            frame[col] = series.astype("datetime64[ns]")
+        elif col in categories:
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                frame[col] = series.astype("category")
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            frame[col] = series.astype(series.cat.categories.dtype)
+    return frame
+
+
+__all__ = [
+    "COLUMNAR_COMPRESSION",
+    "columnar_available",
+    "columnar_frame",
+    "columnar_is_current",
+    "read_columnar",
+    "read_table",
+    "round_like_format",
+    "write_columnar",
+    "write_parquet",
+]
@@ -0,0 +1,272 @@
+"""Memory-mapped on-disk cache of an engineered feature matrix."""
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.atomic import atomic_write
+
+_MANIFEST_FILENAME = "manifest.json"
+_ARRAYS = ("features", "target", "dates", "city_codes")
+_HASH_CHUNK_BYTES = 1024 * 1024
+_COPY_CHUNK_ROWS = 65536
+
+
+def source_fingerprint(paths: Iterable[Path]) -> str:
+    """Hash the contents of ``paths`` (missing files hash as absent)."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(str(Path(path).name).encode("utf-8") + b"\0")
+        try:
+            with open(path, "rb") as handle:
+                for chunk in iter(lambda: handle.read(_HASH_CHUNK_BYTES), b""):
+                    digest.update(chunk)
+        except OSError:
+            digest.update(b"<missing>")
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def config_fingerprint(config: Mapping[str, Any]) -> str:
+    canonical = json.dumps(config, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class FeatureStore:
+    """A float32 feature matrix plus target, dates and city codes, opened memory-mapped.
+
+    Rows are stored in named contiguous blocks (e.g. train/valid/forecast), so ``block``
+    returns views into the mapping rather than copies.
+    """
+
+    def __init__(self, directory: Path, manifest: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> None:
+        self.directory = Path(directory)
+        self.manifest = manifest
+        self.features = arrays["features"]
+        self.target = arrays["target"]
+        self.dates = arrays["dates"]
+        self.city_codes = arrays["city_codes"]
+
+    @property
+    def feature_columns(self) -> List[str]:
+        return list(self.manifest["feature_columns"])
+
+    @property
+    def categories(self) -> List[str]:
+        return list(self.manifest["categories"])
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        """Caller-defined metadata saved alongside the arrays."""
+        return dict(self.manifest.get("state") or {})
+
+    def bounds(self, name: str) -> slice:
+        start, stop = self.manifest["blocks"][name]
+        return slice(int(start), int(stop))
+
+    def block(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the (features, target) views of block ``name``."""
+        rows = self.bounds(name)
+        return self.features[rows], self.target[rows]
+
+    def cities(self, name: str) -> pd.Categorical:
+        return pd.Categorical.from_codes(np.asarray(self.city_codes[self.bounds(name)]), self.categories)
+
+    @classmethod
+    def open(cls, directory: Path, key: Optional[str] = None) -> Optional["FeatureStore"]:
+        """Open the store in ``directory`` if it was built for ``key`` (any key when None)."""
+        directory = Path(directory)
+        try:
+            with open(directory / _MANIFEST_FILENAME, encoding="utf-8") as handle:
+                manifest = json.load(handle)
+            if key is not None and manifest.get("key") != key:
+                return None
+            arrays = {name: np.load(directory / manifest["files"][name], mmap_mode="r") for name in _ARRAYS}
+        except (OSError, ValueError, KeyError):
+            return None
+        if any(len(array) != manifest.get("rows") for array in arrays.values()):
+            return None
+        return cls(directory, manifest, arrays)
+
+
+def _block_bounds(sizes: Mapping[str, int]) -> Dict[str, List[int]]:
+    bounds: Dict[str, List[int]] = {}
+    start = 0
+    for name, size in sizes.items():
+        bounds[name] = [start, start + int(size)]
+        start += int(size)
+    return bounds
+
+
+def _write_manifest(
+    directory: Path,
+    key: str,
+    rows: int,
+    feature_cols: Sequence[str],
+    categories: Sequence[str],
+    bounds: Mapping[str, List[int]],
+    files: Mapping[str, str],
+    state: Optional[Dict[str, Any]],
+) -> None:
+    manifest = {
+        "key": key,
+        "rows": int(rows),
+        "feature_columns": list(feature_cols),
+        "categories": [str(value) for value in categories],
+        "blocks": dict(bounds),
+        "files": dict(files),
+        "state": state or {},
+    }
+    with atomic_write(directory / _MANIFEST_FILENAME, encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2)
+
+
+def _write_store(
+    directory: Path,
+    key: str,
+    feature_cols: Sequence[str],
+    categories: Sequence[str],
+    sizes: Mapping[str, int],
+    state: Optional[Dict[str, Any]],
+    fill: Callable[[Dict[str, np.ndarray]], None],
+) -> FeatureStore:
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    bounds = _block_bounds(sizes)
+    start = sum(int(size) for size in sizes.values())
+
+    prefix = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    files = {name: f"{prefix}-{name}.npy" for name in _ARRAYS}
+    shapes = {
+        "features": ((start, len(feature_cols)), np.float32),
+        "target": ((start,), np.float32),
+        "dates": ((start,), "datetime64[ns]"),
+        "city_codes": ((start,), np.int32),
+    }
+    arrays = {
+        name: np.lib.format.open_memmap(directory / files[name], mode="w+", dtype=dtype, shape=shape)
+        for name, (shape, dtype) in shapes.items()
+    }
+    fill(arrays)
+    for array in arrays.values():
+        array.flush()
+    del arrays
+
+    _write_manifest(directory, key, start, feature_cols, categories, bounds, files, state)
+
+    live = set(files.values())
+    for stale in directory.glob("*.npy"):
+        if stale.name not in live:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+
+    store = FeatureStore.open(directory, key)
+    if store is None:
+        raise OSError(f"Feature store at {directory} could not be reopened")
+    return store
+
+
+def write_feature_store(
+    directory: Path,
+    key: str,
+    frame: pd.DataFrame,
+    feature_cols: Sequence[str],
+    blocks: Mapping[str, np.ndarray],
+    *,
+    target_col: str,
+    date_col: str,
+    city_col: str,
+    state: Optional[Dict[str, Any]] = None,
+) -> FeatureStore:
+    """Write ``frame`` rows, regrouped into ``blocks`` of row positions, as a new store.
+
+    Each block is laid out contiguously in the given order; a row may appear in more than
+    one block. The feature matrix is filled column by column straight into the mapped file,
+    and the manifest is replaced last so readers never see a half-written store. ``state``
+    is kept in the manifest for the caller (see ``FeatureStore.state``).
+    """
+    order = np.concatenate([np.asarray(rows, dtype=np.intp) for rows in blocks.values()]) if blocks else np.empty(0, np.intp)
+    cities = frame[city_col].astype("category")
+
+    def fill(arrays: Dict[str, np.ndarray]) -> None:
+        for idx, col in enumerate(feature_cols):
+            arrays["features"][:, idx] = frame[col].to_numpy(dtype=np.float32)[order]
+        arrays["target"][:] = frame[target_col].to_numpy(dtype=np.float32)[order]
+        arrays["dates"][:] = frame[date_col].to_numpy(dtype="datetime64[ns]")[order]
+        arrays["city_codes"][:] = cities.cat.codes.to_numpy(dtype=np.int32)[order]
+
+    sizes = {name: len(rows) for name, rows in blocks.items()}
+    return _write_store(directory, key, feature_cols, cities.cat.categories, sizes, state, fill)
+
+
+def extend_feature_store(
+    store: FeatureStore,
+    key: str,
+    frame: pd.DataFrame,
+    blocks: Mapping[str, np.ndarray],
+    *,
+    target_col: str,
+    date_col: str,
+    city_col: str,
+    state: Optional[Dict[str, Any]] = None,
+) -> FeatureStore:
+    """Write a new store under ``key`` holding ``blocks`` of ``store``'s rows plus the rows in ``frame``.
+
+    ``blocks`` hold positions into the stored rows followed by the rows of ``frame`` (so
+    ``store.manifest["rows"] + i`` is row ``i`` of ``frame``); stored rows left out of every
+    block are dropped. Stored rows are copied from the mapping in chunks rather than
+    recomputed, so ``frame`` must use the store's feature columns and cities. The arrays go
+    to new files named after ``key`` and the manifest is replaced last, so readers still
+    mapping the old files keep a consistent view until they reopen. ``store`` must not be
+    used afterwards.
+    """
+    if key == store.manifest.get("key"):
+        raise ValueError("The extended feature store needs a key other than the one it replaces")
+    feature_cols = store.feature_columns
+    stored = int(store.manifest["rows"])
+    new_codes = pd.Index(store.categories).get_indexer(frame[city_col].astype(str))
+    if (new_codes < 0).any():
+        raise ValueError("New rows reference cities that are not in the feature store")
+    new_arrays = {
+        "features": frame[feature_cols].to_numpy(dtype=np.float32),
+        "target": frame[target_col].to_numpy(dtype=np.float32),
+        "dates": frame[date_col].to_numpy(dtype="datetime64[ns]"),
+        "city_codes": np.asarray(new_codes, dtype=np.int32),
+    }
+    old_arrays = {name: getattr(store, name) for name in _ARRAYS}
+    order = np.concatenate([np.asarray(rows, dtype=np.intp) for rows in blocks.values()]) if blocks else np.empty(0, np.intp)
+    sizes = {name: len(rows) for name, rows in blocks.items()}
+
+    def fill(arrays: Dict[str, np.ndarray]) -> None:
+        for begin in range(0, len(order), _COPY_CHUNK_ROWS):
+            rows = order[begin : begin + _COPY_CHUNK_ROWS]
+            stop = begin + len(rows)
+            old = rows < stored
+            # Runs of stored rows that keep their order are sliced rather than gathered.
+            contiguous = old.all() and rows[-1] - rows[0] == len(rows) - 1 and (np.diff(rows) == 1).all()
+            for name in _ARRAYS:
+                if contiguous:
+                    arrays[name][begin:stop] = old_arrays[name][rows[0] : rows[-1] + 1]
+                    continue
+                chunk = np.empty((len(rows), *old_arrays[name].shape[1:]), dtype=old_arrays[name].dtype)
+                chunk[old] = old_arrays[name][rows[old]]
+                chunk[~old] = new_arrays[name][rows[~old] - stored]
+                arrays[name][begin:stop] = chunk
+
+    return _write_store(store.directory, key, feature_cols, store.categories, sizes, state, fill)
+
+
+__all__ = [
+    "FeatureStore",
+    "config_fingerprint",
+    "extend_feature_store",
+    "source_fingerprint",
+    "write_feature_store",
+]
@@ -2,9 +2,17 @@
 from __future__ import annotations
 
 import math
+from typing import TYPE_CHECKING, Union
+
+import numpy as np
 
 from utils.units import celsius_to_fahrenheit
 
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import pandas as pd
+
+ArrayLike = Union[np.ndarray, "pd.Series"]
+
 
 def compute_heat_index_f(temp_c: float, relative_humidity: float) -> float:
     """Compute the heat index (in Fahrenheit) from Celsius temperature and relative humidity."""
@@ -39,4 +47,39 @@ def compute_heat_index_f(temp_c: float, relative_humidity: float) -> float:
     return hi
 
 
-__all__ = ["compute_heat_index_f"]
+def compute_heat_index_f_array(temp_c: ArrayLike, relative_humidity: ArrayLike) -> np.ndarray:
+    """Vectorized ``compute_heat_index_f`` over arrays of Celsius temperature and humidity.
+
+    Every element matches the scalar function exactly; the branches are applied with masks.
+    Like the scalar ``max(0.0, min(rh, 100.0))``, NaN humidity is clamped to 0.
+    """
+    temp_f = celsius_to_fahrenheit(np.asarray(temp_c, dtype="float64"))
+    rh = np.clip(np.asarray(relative_humidity, dtype="float64"), 0.0, 100.0)
+    rh = np.where(np.isnan(rh), 0.0, rh)
+
+    simple = 0.5 * (temp_f + 61.0 + ((temp_f - 68.0) * 1.2) + (rh * 0.094))
+    hi = (simple + temp_f) / 2.0
+
+    regression = (
+        -42.379
+        + 2.04901523 * temp_f
+        + 10.14333127 * rh
+        - 0.22475541 * temp_f * rh
+        - 0.00683783 * temp_f * temp_f
+        - 0.05481717 * rh * rh
+        + 0.00122874 * temp_f * temp_f * rh
+        + 0.00085282 * temp_f * rh * rh
+        - 0.00000199 * temp_f * temp_f * rh * rh
+    )
+
+    dry = (rh < 13.0) & (temp_f >= 80.0) & (temp_f <= 112.0)
+    humid = ~dry & (rh > 85.0) & (temp_f >= 80.0) & (temp_f <= 87.0)
+    dry_adjustment = ((13.0 - rh) / 4.0) * np.sqrt(np.maximum(0.0, (17.0 - np.abs(temp_f - 95.0)) / 17.0))
+    humid_adjustment = ((rh - 85.0) / 10.0) * ((87.0 - temp_f) / 5.0)
+    regression = np.where(dry, regression - dry_adjustment, regression)
+    regression = np.where(humid, regression + humid_adjustment, regression)
+
+    return np.where(hi < 80.0, hi, regression)
+
+
+__all__ = ["compute_heat_index_f", "compute_heat_index_f_array"]
@@ -0,0 +1,186 @@
+"""Vectorized per-day aggregation of Open-Meteo hourly series."""
+from __future__ import annotations
+
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+import numpy as np
+
+from constants.weather import HOURLY_STAT_SUFFIXES, WEATHER_HOURLY_STATS, hourly_stat_name
+
+
+def _parse_day(value: Any) -> np.datetime64:
+    day = str(value).split("T", 1)[0]
+    try:
+        return np.datetime64(day, "D")
+    except ValueError:
+        return np.datetime64("NaT", "D")
+
+
+_ISO_DAY_WIDTH = 10
+
+
+def _iso_days(text: np.ndarray) -> Optional[np.ndarray]:
+    # Parse the YYYY-MM-DD prefix with numpy; None when any value deviates from that shape.
+    # Hourly axes repeat each day 24 times, so only the first row of every run is parsed.
+    width = text.dtype.itemsize // 4
+    if not len(text) or width < _ISO_DAY_WIDTH:
+        return None
+    chars = np.ascontiguousarray(text).view(np.uint32).reshape(len(text), width)
+    # numpy also reads signed or space-padded years, which are not ISO dates.
+    leading = chars[:, 0]
+    if np.any((leading < ord("0")) | (leading > ord("9"))) or np.any(chars[:, [4, 7]] != ord("-")):
+        return None
+    if np.any(chars[:, _ISO_DAY_WIDTH - 1] == 0):
+        return None
+    if width > _ISO_DAY_WIDTH and np.any((chars[:, _ISO_DAY_WIDTH] != 0) & (chars[:, _ISO_DAY_WIDTH] != ord("T"))):
+        return None
+    prefix = text.astype(f"<U{_ISO_DAY_WIDTH}")
+    starts = np.flatnonzero(np.concatenate(([True], prefix[1:] != prefix[:-1])))
+    try:
+        days = np.asarray(prefix[starts], dtype="datetime64[D]")
+    except ValueError:
+        return None
+    return np.repeat(days, np.diff(np.append(starts, len(text))))
+
+
+def parse_days(values: Sequence[Any]) -> np.ndarray:
+    """Parse ISO dates or timestamps into a ``datetime64[D]`` array; malformed values become NaT."""
+    text = np.asarray(values, dtype=str)
+    days = _iso_days(text)
+    if days is not None:
+        return days
+    try:
+        return text.astype("datetime64[m]").astype("datetime64[D]")
+    except ValueError:
+        return np.array([_parse_day(value) for value in text], dtype="datetime64[D]")
+
+
+class HourlySummary:
+    """Per-day statistics of hourly metrics, one array per output column.
+
+    ``days`` is a sorted, unique ``datetime64[D]`` array and every array in ``columns`` is
+    aligned with it. Days on the time axis without a sample hold NaN (or 0 for counts).
+    """
+
+    def __init__(self, days: np.ndarray, columns: Dict[str, np.ndarray]) -> None:
+        self.days = days
+        self.columns = columns
+
+    @classmethod
+    def empty(cls) -> "HourlySummary":
+        return cls(np.empty(0, dtype="datetime64[D]"), {})
+
+    @classmethod
+    def from_totals(
+        cls,
+        days: np.ndarray,
+        metrics: Sequence[str],
+        sums: np.ndarray,
+        counts: np.ndarray,
+        mins: Optional[np.ndarray] = None,
+        maxs: Optional[np.ndarray] = None,
+        stats: Sequence[str] = WEATHER_HOURLY_STATS,
+    ) -> "HourlySummary":
+        """Build a summary from per-day totals shaped ``(len(days), len(metrics))``.
+
+        Repeated or unsorted days are folded together first.
+        """
+        unknown = [stat for stat in stats if stat not in HOURLY_STAT_SUFFIXES]
+        if unknown:
+            raise ValueError(f"Unsupported hourly statistics: {unknown}")
+        keep = ~np.isnat(days)
+        days, sums, counts = days[keep], sums[keep], counts[keep]
+        mins = mins[keep] if mins is not None else None
+        maxs = maxs[keep] if maxs is not None else None
+        if len(days) > 1 and not np.all(days[1:] > days[:-1]):
+            unique, codes = np.unique(days, return_inverse=True)
+            sums, counts, mins, maxs = _reduce_by_day(len(unique), codes, sums, counts, mins, maxs)
+            days = unique
+
+        columns: Dict[str, np.ndarray] = {}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for idx, metric in enumerate(metrics):
+                present = counts[:, idx] > 0
+                for stat in stats:
+                    if stat == "mean":
+                        values = np.where(present, sums[:, idx] / counts[:, idx], np.nan)
+                    elif stat == "min":
+                        values = np.where(present, mins[:, idx], np.nan)
+                    elif stat == "max":
+                        values = np.where(present, maxs[:, idx], np.nan)
+                    else:
+                        values = counts[:, idx].astype("float64")
+                    columns[hourly_stat_name(metric, stat)] = values
+        return cls(days, columns)
+
+    def positions(self, days: Sequence[Any]) -> np.ndarray:
+        """Return the summary row for each of ``days``, or -1 where there is none."""
+        wanted = parse_days(days)
+        if not len(self.days):
+            return np.full(len(wanted), -1, dtype=np.intp)
+        index = np.minimum(np.searchsorted(self.days, wanted), len(self.days) - 1)
+        return np.where(self.days[index] == wanted, index, -1)
+
+
+def _reduce_by_day(
+    size: int,
+    codes: np.ndarray,
+    sums: np.ndarray,
+    counts: np.ndarray,
+    mins: Optional[np.ndarray],
+    maxs: Optional[np.ndarray],
+):
+    # bincount accumulates in input order, so each day's sum matches a left-to-right Python sum.
+    width = sums.shape[1]
+    day_sums = np.zeros((size, width), dtype="float64")
+    day_counts = np.zeros((size, width), dtype=np.int64)
+    for idx in range(width):
+        day_sums[:, idx] = np.bincount(codes, weights=sums[:, idx], minlength=size)
+        day_counts[:, idx] = np.bincount(codes, weights=counts[:, idx], minlength=size)
+    day_mins = day_maxs = None
+    if size and (mins is not None or maxs is not None):
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(size))
+        if mins is not None:
+            day_mins = np.minimum.reduceat(mins[order], bounds, axis=0)
+        if maxs is not None:
+            day_maxs = np.maximum.reduceat(maxs[order], bounds, axis=0)
+    return day_sums, day_counts, day_mins, day_maxs
+
+
+def summarize_hourly(
+    hourly: Optional[Mapping[str, Sequence[Any]]],
+    metrics: Sequence[str],
+    stats: Sequence[str] = WEATHER_HOURLY_STATS,
+) -> HourlySummary:
+    """Reduce the hourly section of a payload to per-day ``stats`` for every metric at once.
+
+    The time axis is parsed once into ``datetime64[D]``; missing values are skipped.
+    """
+    times = (hourly or {}).get("time") or []
+    if not times:
+        return HourlySummary.empty()
+    stamps = parse_days(times)
+    matrix = np.full((len(stamps), len(metrics)), np.nan)
+    for idx, metric in enumerate(metrics):
+        values = hourly.get(metric) or []
+        size = min(len(stamps), len(values))
+        if size:
+            matrix[:size, idx] = np.array(values[:size], dtype="float64")
+
+    keep = ~np.isnat(stamps)
+    days, codes = np.unique(stamps[keep], return_inverse=True)
+    matrix = matrix[keep]
+    present = ~np.isnan(matrix)
+    sums, counts, mins, maxs = _reduce_by_day(
+        len(days),
+        codes,
+        np.where(present, matrix, 0.0),
+        present,
+        np.where(present, matrix, np.inf) if "min" in stats else None,
+        np.where(present, matrix, -np.inf) if "max" in stats else None,
+    )
+    return HourlySummary.from_totals(days, metrics, sums, counts, mins, maxs, stats)
+
+
+__all__ = ["HourlySummary", "parse_days", "summarize_hourly"]
@@ -0,0 +1,91 @@
+"""Per-city buffers of recent values for computing lag features on newly appended rows."""
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class LagBuffers:
+    """The last ``size`` values of a series for every key, oldest first.
+
+    Keys with a shorter history are padded with NaN at the front, which is what ``shift``
+    yields for the first rows of a group, so lags computed from a buffer match lags
+    computed over the full history.
+    """
+
+    def __init__(self, size: int, buffers: Optional[Dict[str, np.ndarray]] = None) -> None:
+        self.size = int(size)
+        self.buffers: Dict[str, np.ndarray] = dict(buffers or {})
+
+    def _buffer(self, key: str) -> np.ndarray:
+        buffer = self.buffers.get(key)
+        return buffer if buffer is not None else np.full(self.size, np.nan)
+
+    def _tail(self, values: np.ndarray) -> np.ndarray:
+        tail = np.full(self.size, np.nan)
+        if self.size:
+            kept = values[-self.size:]
+            tail[self.size - len(kept):] = kept
+        return tail
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, key_col: str, value_col: str, size: int) -> "LagBuffers":
+        """Fill the buffers from ``frame``, whose rows must be in time order within each key."""
+        buffers = cls(size)
+        keys = frame[key_col].astype(str).to_numpy()
+        values = frame[value_col].to_numpy(dtype="float64", na_value=np.nan)
+        for key, rows in pd.Series(np.arange(len(keys))).groupby(keys, sort=False).indices.items():
+            buffers.buffers[str(key)] = buffers._tail(values[rows])
+        return buffers
+
+    def window(self, keys: Sequence[str]) -> np.ndarray:
+        """Return the buffered values for each of ``keys``, oldest first, shaped ``(len(keys), size)``.
+
+        The layout matches ``utils.windows.window_history``.
+        """
+        keys = np.asarray(keys).astype(str)
+        history = np.full((len(keys), self.size), np.nan)
+        for idx, key in enumerate(keys):
+            history[idx] = self._buffer(str(key))
+        return history
+
+    def push(self, keys: Sequence[str], values: Sequence[float]) -> np.ndarray:
+        """Append rows and return, for each, the ``size`` values before it (oldest first).
+
+        Rows of the same key must be in time order. The result has shape ``(len(values), size)``
+        and the layout of ``utils.windows.window_history``.
+        """
+        keys = np.asarray(keys).astype(str)
+        values = np.asarray(values, dtype="float64")
+        previous = np.full((len(values), self.size), np.nan)
+        if not self.size:
+            return previous
+        for key, rows in pd.Series(np.arange(len(keys))).groupby(keys, sort=False).indices.items():
+            context = np.concatenate([self._buffer(str(key)), values[rows]])
+            # Window j spans the ``size`` values just before row j.
+            previous[rows] = sliding_window_view(context, self.size)[: len(rows)]
+            self.buffers[str(key)] = context[-self.size:].copy()
+        return previous
+
+    def to_state(self) -> Dict[str, List[Optional[float]]]:
+        return {
+            key: [None if math.isnan(value) else float(value) for value in buffer]
+            for key, buffer in sorted(self.buffers.items())
+        }
+
+    @classmethod
+    def from_state(cls, size: int, state: Dict[str, List[Optional[float]]]) -> Optional["LagBuffers"]:
+        """Rebuild buffers saved by ``to_state``; None when they were saved with another size."""
+        buffers = {}
+        for key, items in state.items():
+            if len(items) != size:
+                return None
+            buffers[key] = np.array([np.nan if item is None else item for item in items], dtype="float64")
+        return cls(size, buffers)
+
+
+__all__ = ["LagBuffers"]
@@ -0,0 +1,297 @@
+"""City/year partitioned Parquet layout for the clean datasets.
+
+Each city lives in ``<root>/city=<name>/`` with one ``year=<YYYY>/part-<token>.parquet``
+file per year and a ``_manifest.json`` naming the current file of every year together with
+its row count and date range. Writers add new part files first and then replace the
+manifest, so a city is swapped to its new content in a single rename. Incremental
+refreshes rewrite only the years they touch, each city's newest date is read from the
+manifests alone, and readers only open the files of the cities and years they ask for.
+Full rewrites stamp a new rebuild id, so a reader can tell that rows outside the years
+an incremental refresh touches may have changed too.
+"""
+from __future__ import annotations
+
+import json
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+from constants.weather import WEATHER_CITY_COLUMN, WEATHER_DATE_COLUMN
+from utils.atomic import atomic_write
+from utils.columnar import columnar_available, columnar_frame, pq, write_parquet
+
+_CITY_PREFIX = "city="
+_MANIFEST_FILENAME = "_manifest.json"
+_SOURCE_FILENAME = "_source.json"
+_REBUILD_FILENAME = "_rebuild.json"
+_DATE_FORMAT = "%Y-%m-%d"
+
+
+def _city_dir(root: Path, city: str) -> Path:
+    return Path(root) / f"{_CITY_PREFIX}{quote(city, safe='')}"
+
+
+def _write_json(path: Path, payload: Dict[str, Any]) -> None:
+    with atomic_write(path, encoding="utf-8") as handle:
+        json.dump(payload, handle, indent=2, sort_keys=True)
+
+
+def _read_manifest(city_dir: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(city_dir / _MANIFEST_FILENAME, encoding="utf-8") as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest.get("years"), dict) else None
+
+
+def partition_cities(root: Path) -> List[str]:
+    """Return the cities that have a committed partition under ``root``."""
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    cities = []
+    for entry in root.iterdir():
+        if entry.name.startswith(_CITY_PREFIX) and (entry / _MANIFEST_FILENAME).exists():
+            cities.append(unquote(entry.name[len(_CITY_PREFIX):]))
+    return sorted(cities)
+
+
+def _split_years(frame: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    years = frame[WEATHER_DATE_COLUMN].dt.year.astype(str)
+    return {year: part for year, part in frame.groupby(years, sort=True)}
+
+
+def _commit_city(
+    root: Path,
+    city: str,
+    updates: Dict[str, Optional[pd.DataFrame]],
+    manifest: Optional[Dict[str, Any]],
+) -> None:
+    city_dir = _city_dir(root, city)
+    token = uuid.uuid4().hex[:12]
+    years = dict((manifest or {}).get("years") or {})
+    for year, frame in updates.items():
+        if frame is None or frame.empty:
+            years.pop(year, None)
+            continue
+        frame = frame.sort_values(WEATHER_DATE_COLUMN, kind="stable").reset_index(drop=True)
+        relative = f"year={year}/part-{token}.parquet"
+        write_parquet(frame, city_dir / relative)
+        dates = frame[WEATHER_DATE_COLUMN]
+        years[year] = {
+            "file": relative,
+            "rows": int(len(frame)),
+            "min_date": dates.min().strftime(_DATE_FORMAT),
+            "max_date": dates.max().strftime(_DATE_FORMAT),
+        }
+    city_dir.mkdir(parents=True, exist_ok=True)
+    _write_json(city_dir / _MANIFEST_FILENAME, {"city": city, "years": dict(sorted(years.items()))})
+    _collect_garbage(city_dir, years)
+
+
+def _collect_garbage(city_dir: Path, years: Dict[str, Dict[str, Any]]) -> None:
+    live = {entry["file"] for entry in years.values()}
+    for part in city_dir.glob("year=*/*.parquet"):
+        if part.relative_to(city_dir).as_posix() in live:
+            continue
+        try:
+            part.unlink()
+        except OSError:
+            continue
+    for year_dir in city_dir.glob("year=*"):
+        try:
+            year_dir.rmdir()
+        except OSError:
+            pass
+
+
+def _typed_city_frames(frame: pd.DataFrame, decimals: Optional[int]) -> Iterable[Tuple[str, pd.DataFrame]]:
+    typed = columnar_frame(frame, decimals=decimals)
+    cities = typed.pop(WEATHER_CITY_COLUMN).astype(str)
+    for city, part in typed.groupby(cities, sort=True):
+        yield city, part
+
+
+def write_partitions(root: Path, frame: pd.DataFrame, *, decimals: Optional[int] = None) -> int:
+    """Replace the whole partitioned dataset with ``frame``; returns the number of cities.
+
+    Cities that no longer appear in ``frame`` are removed.
+    """
+    if not columnar_available():
+        return 0
+    root = Path(root)
+    written = set()
+    for city, part in _typed_city_frames(frame, decimals):
+        manifest = _read_manifest(_city_dir(root, city))
+        updates: Dict[str, Optional[pd.DataFrame]] = {year: None for year in (manifest or {}).get("years", {})}
+        updates.update(_split_years(part))
+        _commit_city(root, city, updates, manifest)
+        written.add(city)
+    drop_city_partitions(root, keep=written)
+    _write_json(root / _REBUILD_FILENAME, {"rebuild": uuid.uuid4().hex})
+    return len(written)
+
+
+def replace_city_years(
+    root: Path,
+    city: str,
+    frame: pd.DataFrame,
+    years: Iterable[str],
+    *,
+    decimals: Optional[int] = None,
+    keep_from: Optional[str] = None,
+) -> int:
+    """Rewrite only ``years`` (plus years trimmed by ``keep_from``) of a city's partition.
+
+    ``frame`` holds the city's complete current rows for at least those years; stored
+    rows of a rewritten year that are missing from ``frame`` are dropped, as are rows dated
+    before ``keep_from``. The new state becomes visible atomically when the city manifest
+    is replaced. Returns the number of rows written.
+    """
+    if not columnar_available():
+        return 0
+    root = Path(root)
+    manifest = _read_manifest(_city_dir(root, city))
+    stored = (manifest or {}).get("years", {})
+    typed = dict(_typed_city_frames(frame, decimals)).get(city)
+    new_frames = _split_years(typed) if typed is not None else {}
+
+    touched = {str(year) for year in years}
+    if keep_from:
+        touched.update(year for year, entry in stored.items() if entry["min_date"] < keep_from)
+    if not touched:
+        return 0
+    cutoff = pd.Timestamp(keep_from) if keep_from else None
+    updates: Dict[str, Optional[pd.DataFrame]] = {}
+    for year in sorted(touched):
+        rows = new_frames.get(year)
+        if rows is not None and cutoff is not None:
+            rows = rows.loc[rows[WEATHER_DATE_COLUMN] >= cutoff]
+        updates[year] = rows
+    _commit_city(root, city, updates, manifest)
+    return sum(len(rows) for rows in updates.values() if rows is not None)
+
+
+def drop_city_partitions(root: Path, keep: Iterable[str]) -> None:
+    """Delete the partitions of every city not in ``keep``."""
+    keep = set(keep)
+    for city in partition_cities(root):
+        if city not in keep:
+            shutil.rmtree(_city_dir(root, city), ignore_errors=True)
+
+
+def mark_partition_source(root: Path, source: Path) -> None:
+    """Record the size and mtime of the CSV the partitions were last written from."""
+    stat = Path(source).stat()
+    Path(root).mkdir(parents=True, exist_ok=True)
+    _write_json(Path(root) / _SOURCE_FILENAME, {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+
+
+def partitions_match_source(root: Path, source: Path) -> bool:
+    """True when the partitions were last written from ``source`` as it is now."""
+    try:
+        with open(Path(root) / _SOURCE_FILENAME, encoding="utf-8") as handle:
+            recorded = json.load(handle)
+        stat = Path(source).stat()
+    except (OSError, ValueError):
+        return False
+    return recorded.get("size") == stat.st_size and recorded.get("mtime_ns") == stat.st_mtime_ns
+
+
+def partition_rebuild_id(root: Path) -> Optional[str]:
+    """The id ``write_partitions`` stamped on its last full rewrite; ``replace_city_years`` keeps it."""
+    try:
+        with open(Path(root) / _REBUILD_FILENAME, encoding="utf-8") as handle:
+            return json.load(handle).get("rebuild")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _partition_dates(root: Path, field: str, pick) -> Dict[str, str]:
+    found: Dict[str, str] = {}
+    for city in partition_cities(root):
+        manifest = _read_manifest(_city_dir(root, city)) or {}
+        dates = [entry[field] for entry in manifest.get("years", {}).values()]
+        if dates:
+            found[city] = pick(dates)
+    return found
+
+
+def first_partition_dates(root: Path) -> Dict[str, str]:
+    """Return the oldest stored date per city, read from the manifests alone."""
+    return _partition_dates(root, "min_date", min)
+
+
+def last_partition_dates(root: Path) -> Dict[str, str]:
+    """Return the newest stored date per city, read from the manifests alone."""
+    return _partition_dates(root, "max_date", max)
+
+
+def load_partitions(
+    root: Path,
+    cities: Optional[Iterable[str]] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    columns: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """Load rows of ``cities`` dated ``start``..``end`` (inclusive ``YYYY-MM-DD`` strings).
+
+    Years are picked from the manifests, so files of other cities and of years outside the
+    range are never opened; the date bounds are also passed to pyarrow as row filters.
+    Returns ``city`` as a categorical and ``date`` as ``datetime64[ns]``, sorted by both.
+    """
+    root = Path(root)
+    wanted = None
+    if columns is not None:
+        extra = [col for col in columns if col not in {WEATHER_CITY_COLUMN, WEATHER_DATE_COLUMN}]
+        wanted = [WEATHER_DATE_COLUMN, *extra]
+    empty = pd.DataFrame(columns=[WEATHER_CITY_COLUMN, *(wanted or [WEATHER_DATE_COLUMN])])
+    if not columnar_available():
+        return empty
+    filters = []
+    if start:
+        filters.append((WEATHER_DATE_COLUMN, ">=", pd.Timestamp(start)))
+    if end:
+        filters.append((WEATHER_DATE_COLUMN, "<=", pd.Timestamp(end)))
+
+    frames = []
+    selected = sorted(set(cities)) if cities is not None else partition_cities(root)
+    for city in selected:
+        city_dir = _city_dir(root, city)
+        manifest = _read_manifest(city_dir)
+        if manifest is None:
+            continue
+        for entry in manifest["years"].values():
+            if (start and entry["max_date"] < start) or (end and entry["min_date"] > end):
+                continue
+            table = pq.read_table(city_dir / entry["file"], columns=wanted, filters=filters or None)
+            frame = table.to_pandas()
+            frame.insert(0, WEATHER_CITY_COLUMN, city)
+            frames.append(frame)
+
+    if not frames:
+        return empty
+    result = pd.concat(frames, ignore_index=True)
+    result[WEATHER_CITY_COLUMN] = result[WEATHER_CITY_COLUMN].astype("category")
+    result[WEATHER_DATE_COLUMN] = result[WEATHER_DATE_COLUMN].astype("datetime64[ns]")
+    result.sort_values([WEATHER_CITY_COLUMN, WEATHER_DATE_COLUMN], kind="stable", inplace=True)
+    return result.reset_index(drop=True)
+
+
+__all__ = [
+    "drop_city_partitions",
+    "first_partition_dates",
+    "last_partition_dates",
+    "load_partitions",
+    "mark_partition_source",
+    "partition_cities",
+    "partition_rebuild_id",
+    "partitions_match_source",
+    "replace_city_years",
+    "write_partitions",
+]
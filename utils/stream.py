@@ -0,0 +1,205 @@
+"""Streaming decoder for large Open-Meteo archive payloads."""
+from __future__ import annotations
+
+import json
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from constants.weather import WEATHER_HOURLY_STATS
+from utils.hourly import HourlySummary, parse_days
+
+try:
+    import ijson  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    ijson = None
+
+_SCALAR_EVENTS = {"null", "boolean", "number", "string"}
+
+
+class _HourlyDailyTotals:
+    """Fold hourly samples into per-day totals as they arrive.
+
+    Only the day boundaries of the hourly time axis are kept, so memory grows with the
+    number of days rather than hours. Values that arrive before their timestamps are held
+    back until ``finish``.
+    """
+
+    def __init__(self, metrics: Sequence[str]) -> None:
+        self.metrics = list(metrics)
+        self.days: List[str] = []
+        self._day_ends: List[int] = []
+        self._sums: Dict[str, List[float]] = {metric: [] for metric in self.metrics}
+        self._counts: Dict[str, List[int]] = {metric: [] for metric in self.metrics}
+        self._mins: Dict[str, List[float]] = {metric: [] for metric in self.metrics}
+        self._maxs: Dict[str, List[float]] = {metric: [] for metric in self.metrics}
+        self._cursors: Dict[str, int] = {metric: 0 for metric in self.metrics}
+        self._pending: Dict[str, List[Tuple[int, float]]] = {metric: [] for metric in self.metrics}
+
+    def add_time(self, index: int, stamp: Any) -> None:
+        day = str(stamp).split("T", 1)[0]
+        if self.days and self.days[-1] == day:
+            self._day_ends[-1] = index + 1
+            return
+        self.days.append(day)
+        self._day_ends.append(index + 1)
+        for metric in self.metrics:
+            self._sums[metric].append(0.0)
+            self._counts[metric].append(0)
+            self._mins[metric].append(np.inf)
+            self._maxs[metric].append(-np.inf)
+
+    def add_value(self, metric: str, index: int, value: Any) -> None:
+        if value is None:
+            return
+        if not self._day_ends or index >= self._day_ends[-1]:
+            self._pending[metric].append((index, float(value)))
+            return
+        self._accumulate(metric, index, float(value))
+
+    def _accumulate(self, metric: str, index: int, value: float) -> None:
+        cursor = self._cursors[metric]
+        while index >= self._day_ends[cursor]:
+            cursor += 1
+        self._cursors[metric] = cursor
+        self._sums[metric][cursor] += value
+        self._counts[metric][cursor] += 1
+        if value < self._mins[metric][cursor]:
+            self._mins[metric][cursor] = value
+        if value > self._maxs[metric][cursor]:
+            self._maxs[metric][cursor] = value
+
+    def finish(self, stats: Sequence[str]) -> HourlySummary:
+        total_hours = self._day_ends[-1] if self._day_ends else 0
+        for metric, pending in self._pending.items():
+            for index, value in pending:
+                if index < total_hours:
+                    self._accumulate(metric, index, value)
+            pending.clear()
+
+        if not self.days:
+            return HourlySummary.empty()
+
+        def stack(totals: Dict[str, List[Any]], dtype: str) -> np.ndarray:
+            return np.array([totals[metric] for metric in self.metrics], dtype=dtype).reshape(
+                len(self.metrics), len(self.days)
+            ).T
+
+        return HourlySummary.from_totals(
+            parse_days(self.days),
+            self.metrics,
+            stack(self._sums, "float64"),
+            stack(self._counts, "int64"),
+            stack(self._mins, "float64"),
+            stack(self._maxs, "float64"),
+            stats,
+        )
+
+
+class _LocationBuilder:
+    def __init__(self, hourly_metrics: Sequence[str], stats: Sequence[str]) -> None:
+        self.meta: Dict[str, Any] = {}
+        self.daily: Dict[str, List[Any]] = {}
+        self.hourly = _HourlyDailyTotals(hourly_metrics)
+        self.stats = stats
+
+    def build(self) -> Dict[str, Any]:
+        return {**self.meta, "daily": self.daily, "hourly_summary": self.hourly.finish(self.stats)}
+
+
+def _locations_from_events(
+    events: Iterable[Tuple[str, str, Any]],
+    hourly_metrics: Sequence[str],
+    stats: Sequence[str],
+) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+    wanted = set(hourly_metrics)
+    locations: List[Dict[str, Any]] = []
+    is_list = False
+    current: Optional[_LocationBuilder] = None
+    counters: Dict[str, int] = {}
+
+    for prefix, event, value in events:
+        if prefix == "" and event == "start_array":
+            is_list = True
+            continue
+        if is_list:
+            if prefix == "item":
+                prefix = ""
+            elif prefix.startswith("item."):
+                prefix = prefix[5:]
+
+        if prefix == "":
+            if event == "start_map":
+                current = _LocationBuilder(hourly_metrics, stats)
+                counters = {}
+            elif event == "end_map" and current is not None:
+                locations.append(current.build())
+                current = None
+            continue
+        if current is None:
+            continue
+
+        section, _, rest = prefix.partition(".")
+        if not rest:
+            if event in _SCALAR_EVENTS:
+                current.meta[section] = value
+            continue
+        if event not in _SCALAR_EVENTS or not rest.endswith(".item"):
+            continue
+        name = rest[: -len(".item")]
+        if section == "daily":
+            current.daily.setdefault(name, []).append(value)
+        elif section == "hourly" and (name == "time" or name in wanted):
+            index = counters.get(name, 0)
+            counters[name] = index + 1
+            if name == "time":
+                current.hourly.add_time(index, value)
+            else:
+                current.hourly.add_value(name, index, value)
+
+    if is_list:
+        return locations
+    return locations[0] if locations else {}
+
+
+def _location_from_payload(
+    payload: Dict[str, Any],
+    hourly_metrics: Sequence[str],
+    stats: Sequence[str],
+) -> Dict[str, Any]:
+    builder = _LocationBuilder(hourly_metrics, stats)
+    builder.meta = {key: value for key, value in payload.items() if not isinstance(value, (dict, list))}
+    builder.daily = dict(payload.get("daily") or {})
+    hourly = payload.get("hourly") or {}
+    for index, stamp in enumerate(hourly.get("time") or []):
+        builder.hourly.add_time(index, stamp)
+    for metric in hourly_metrics:
+        for index, value in enumerate(hourly.get(metric) or []):
+            builder.hourly.add_value(metric, index, value)
+    return builder.build()
+
+
+def read_archive_summary(
+    handle: BinaryIO,
+    hourly_metrics: Sequence[str],
+    stats: Sequence[str] = WEATHER_HOURLY_STATS,
+) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+    """Decode an archive payload, reducing hourly metrics to per-day ``stats`` while streaming.
+
+    Returns one location dict (or a list for multi-location payloads) holding the scalar
+    fields, the ``daily`` section and an ``hourly_summary`` (``utils.hourly.HourlySummary``).
+    Without ``ijson`` the payload is decoded in full. A malformed or truncated body raises
+    ``ValueError`` with either backend, so no partial totals are returned.
+    """
+    if ijson is None:
+        payload = json.load(handle)
+        if isinstance(payload, list):
+            return [_location_from_payload(item, hourly_metrics, stats) for item in payload]
+        return _location_from_payload(payload, hourly_metrics, stats)
+    try:
+        return _locations_from_events(ijson.parse(handle, use_float=True), hourly_metrics, stats)
+    except ijson.JSONError as exc:
+        raise ValueError(f"Malformed archive payload: {exc}") from exc
+
+
+__all__ = ["read_archive_summary"]
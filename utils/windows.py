@@ -0,0 +1,102 @@
+"""Vectorized lag and trailing-window statistics over grouped series."""
+from __future__ import annotations
+
+from typing import Dict, Iterator, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+ROLLING_STATS = ("mean", "std", "min", "max")
+_CHUNK_ROWS = 65536
+
+
+def iter_window_history(
+    values: Sequence[float],
+    groups: Sequence[int],
+    size: int,
+    chunk_rows: int = _CHUNK_ROWS,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Yield ``(positions, history)`` for consecutive chunks of at most ``chunk_rows`` rows.
+
+    ``history`` holds the rows of ``window_history`` at ``positions``. Every group is stored
+    once behind ``size`` NaNs, and each row's window is a view into that array, so only one
+    chunk of windows is materialized at a time. An empty input yields one empty chunk.
+    """
+    values = np.asarray(values, dtype="float64")
+    groups = np.asarray(groups)
+    count = len(values)
+    order = np.arange(count)
+    if count > 1 and np.any(groups[1:] < groups[:-1]):
+        order = np.argsort(groups, kind="stable")
+        values, groups = values[order], groups[order]
+
+    first = np.ones(count, dtype=bool)
+    first[1:] = groups[1:] != groups[:-1]
+    # Row t of group number g (0-based, in sorted order) sits at t + (g + 1) * size.
+    offsets = (np.cumsum(first) - 1) * size if count else np.zeros(0, dtype=np.intp)
+    padded = np.full(count + int(first.sum()) * size, np.nan)
+    padded[np.arange(count) + offsets + size] = values
+    windows = sliding_window_view(padded, size) if len(padded) >= size else np.empty((0, size))
+    starts = np.arange(count) + offsets
+    for begin in range(0, max(count, 1), max(int(chunk_rows), 1)):
+        stop = min(begin + max(int(chunk_rows), 1), count)
+        yield order[begin:stop], windows[starts[begin:stop]]
+
+
+def window_history(values: Sequence[float], groups: Sequence[int], size: int) -> np.ndarray:
+    """Return the ``size`` values preceding every row within its group, oldest first.
+
+    ``groups`` are integer group codes; rows keep their relative order inside a group. The
+    result has shape ``(len(values), size)`` and holds NaN where a group has fewer earlier
+    rows, so column ``size - k`` is the series shifted by ``k`` within each group. Use
+    ``iter_window_history`` to process long series without the whole matrix in memory.
+    """
+    history = np.empty((len(values), size))
+    for positions, chunk in iter_window_history(values, groups, size):
+        history[positions] = chunk
+    return history
+
+
+def lag_values(history: np.ndarray, lag: int) -> np.ndarray:
+    """Column of ``history`` holding each row's value ``lag`` steps back."""
+    return history[:, history.shape[1] - lag]
+
+
+def window_stats(
+    history: np.ndarray,
+    window: int,
+    stats: Sequence[str] = ("mean",),
+    min_periods: int = 1,
+) -> Dict[str, np.ndarray]:
+    """Statistics of the last ``window`` columns of ``history``, skipping NaN like pandas ``rolling``.
+
+    Rows with fewer than ``min_periods`` values get NaN; ``std`` uses ``ddof=1``.
+    """
+    unknown = [stat for stat in stats if stat not in ROLLING_STATS]
+    if unknown:
+        raise ValueError(f"Unsupported rolling statistics: {unknown}")
+    recent = history[:, history.shape[1] - window:]
+    present = ~np.isnan(recent)
+    counts = np.count_nonzero(present, axis=1)
+    enough = counts >= max(int(min_periods), 1)
+    filled = np.where(present, recent, 0.0)
+
+    result: Dict[str, np.ndarray] = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = filled.sum(axis=1) / counts
+        for stat in stats:
+            if stat == "mean":
+                values = mean
+            elif stat == "std":
+                deviations = np.where(present, recent - mean[:, None], 0.0)
+                values = np.sqrt((deviations * deviations).sum(axis=1) / (counts - 1))
+                values = np.where(counts > 1, values, np.nan)
+            elif stat == "min":
+                values = np.fmin.reduce(recent, axis=1)
+            else:
+                values = np.fmax.reduce(recent, axis=1)
+            result[stat] = np.where(enough, values, np.nan)
+    return result
+
+
+__all__ = ["ROLLING_STATS", "iter_window_history", "lag_values", "window_history", "window_stats"]
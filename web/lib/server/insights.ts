@@ -1,5 +1,6 @@
 import { existsSync, promises as fs } from "fs"
 import path from "path"
+import { gunzipSync } from "zlib"
 import { findDemographicRecord, type DemographicRecord } from "@/lib/server/demographics"
 
 const resolveDataPath = (...candidates: string[]): string => {
@@ -12,6 +13,15 @@ const HOURLY_PATH = resolveDataPath(
   path.join(process.cwd(), "..", "dataset", "clean", "hourly_heat_index.json"),
 )
 
+// Columnar payload written next to the legacy one by get_hourly_heat_index.py.
+const HOURLY_COLUMNAR_PATH = path.join(process.cwd(), "public", "data", "hourly_heat_index.v2.json")
+const HOURLY_COLUMNAR_SCHEMA = "hourly_heat_index"
+const HOURLY_COLUMNAR_VERSION = 2
+// Manifest replaced last when get_hourly_heat_index.py publishes; names the current generation.
+const HOURLY_GENERATION_PATH = path.join(process.cwd(), "public", "data", "hourly_heat_index.generation.json")
+const HOURLY_GENERATION_ATTEMPTS = 20
+const HOURLY_GENERATION_DELAY_MS = 50
+
 const WEATHER_HISTORY_PATH = resolveDataPath(
   path.join(process.cwd(), "public", "data", "weather_history.csv"),
   path.join(process.cwd(), "..", "dataset", "clean", "weather_history.csv"),
@@ -41,12 +51,38 @@ export type HourlyHeatIndexCity = {
 }
 
 export type HourlyHeatIndexPayload = {
+  generation?: string
   generated_at: string
   timezone: string
   unit: string
   cities: HourlyHeatIndexCity[]
 }
 
+type HourlyColumnarField = "temperature_c" | "apparent_temperature_c" | "relative_humidity" | "heat_index_f" | "heat_index_c"
+
+type HourlyColumnarCity = {
+  city: string
+  latitude: number
+  longitude: number
+  start: string
+  offsets?: number[]
+  values: Record<HourlyColumnarField, (number | null)[]>
+  current: { offset: number; values: (number | null)[] }
+}
+
+type HourlyColumnarPayload = {
+  schema: string
+  version: number
+  generation?: string
+  generated_at: string
+  timezone: string
+  unit: string
+  scale: number
+  step_seconds: number
+  fields: HourlyColumnarField[]
+  cities: HourlyColumnarCity[]
+}
+
 type WeatherHistoryPoint = {
   city: string
   date: string
@@ -124,6 +160,135 @@ const parseJsonFile = async <T>(filePath: string): Promise<T> => {
   return JSON.parse(raw) as T
 }
 
+// Formats ``epochMs`` as an ISO timestamp with the same UTC offset suffix as ``reference``.
+const isoWithOffset = (epochMs: number, reference: string): string => {
+  const match = reference.match(/([+-])(\d{2}):(\d{2})$/)
+  if (!match) {
+    return new Date(epochMs).toISOString()
+  }
+  const minutes = (match[1] === "-" ? -1 : 1) * (Number(match[2]) * 60 + Number(match[3]))
+  return new Date(epochMs + minutes * 60_000).toISOString().slice(0, 19) + match[0]
+}
+
+const decodeColumnarPoint = (
+  payload: HourlyColumnarPayload,
+  entry: HourlyColumnarCity,
+  step: number,
+  read: (field: HourlyColumnarField, index: number) => number | null,
+  index: number,
+): HeatIndexPoint | null => {
+  const values: Partial<Record<HourlyColumnarField, number>> = {}
+  payload.fields.forEach((field) => {
+    const value = read(field, index)
+    if (value != null) {
+      values[field] = value / payload.scale
+    }
+  })
+  if (values.temperature_c == null || values.relative_humidity == null || values.heat_index_c == null) {
+    return null
+  }
+  return {
+    city: entry.city,
+    timestamp: isoWithOffset(Date.parse(entry.start) + step * payload.step_seconds * 1000, entry.start),
+    temperature_c: values.temperature_c,
+    relative_humidity: values.relative_humidity,
+    heat_index_c: values.heat_index_c,
+    heat_index_f: values.heat_index_f,
+    apparent_temperature_c: values.apparent_temperature_c,
+  }
+}
+
+const decodeColumnarCity = (payload: HourlyColumnarPayload, entry: HourlyColumnarCity): HourlyHeatIndexCity => {
+  const length = entry.values.heat_index_c?.length ?? 0
+  const hourly: HeatIndexPoint[] = []
+  for (let index = 0; index < length; index += 1) {
+    const step = entry.offsets?.[index] ?? index
+    const point = decodeColumnarPoint(payload, entry, step, (field, row) => entry.values[field]?.[row] ?? null, index)
+    if (point) {
+      hourly.push(point)
+    }
+  }
+  const fieldIndex = new Map(payload.fields.map((field, position) => [field, position]))
+  const current = decodeColumnarPoint(
+    payload,
+    entry,
+    entry.current.offset,
+    (field) => entry.current.values[fieldIndex.get(field) ?? -1] ?? null,
+    0,
+  )
+  return { city: entry.city, latitude: entry.latitude, longitude: entry.longitude, current, hourly }
+}
+
+const readColumnarPayload = async (): Promise<HourlyHeatIndexPayload | null> => {
+  let payload: HourlyColumnarPayload
+  try {
+    const compressed = `${HOURLY_COLUMNAR_PATH}.gz`
+    const raw = existsSync(compressed)
+      ? gunzipSync(await fs.readFile(compressed)).toString("utf-8")
+      : await fs.readFile(HOURLY_COLUMNAR_PATH, "utf-8")
+    payload = JSON.parse(raw) as HourlyColumnarPayload
+  } catch {
+    return null
+  }
+  if (payload.schema !== HOURLY_COLUMNAR_SCHEMA || payload.version !== HOURLY_COLUMNAR_VERSION) {
+    return null
+  }
+  return {
+    generation: payload.generation,
+    generated_at: payload.generated_at,
+    timezone: payload.timezone,
+    unit: payload.unit,
+    cities: payload.cities.map((entry) => decodeColumnarCity(payload, entry)),
+  }
+}
+
+let hourlyCache: { key: string; payload: HourlyHeatIndexPayload } | null = null
+
+const readPublishedGeneration = async (): Promise<string | null> => {
+  try {
+    const manifest = await parseJsonFile<{ generation?: string }>(HOURLY_GENERATION_PATH)
+    return manifest.generation ?? null
+  } catch {
+    return null
+  }
+}
+
+const sleep = (ms: number) => new Promise<void>((resolve) => setTimeout(resolve, ms))
+
+// Prefers the columnar payload when its schema version is understood, otherwise reads the
+// legacy JSON. The publisher renames its files one at a time and replaces the manifest
+// last, so a payload is only trusted once its generation matches the manifest's; payloads
+// written before generations were stamped carry none and are taken as is. The decoded
+// payload is reused until one of the source files changes.
+const loadHourlyPayload = async (): Promise<HourlyHeatIndexPayload> => {
+  const stamps = await Promise.all(
+    [HOURLY_GENERATION_PATH, `${HOURLY_COLUMNAR_PATH}.gz`, HOURLY_COLUMNAR_PATH, HOURLY_PATH].map((filePath) =>
+      fs.stat(filePath).then(
+        (stat) => stat.mtimeMs,
+        () => 0,
+      ),
+    ),
+  )
+  const key = stamps.join(":")
+  if (hourlyCache?.key === key) {
+    return hourlyCache.payload
+  }
+  let payload: HourlyHeatIndexPayload | null = null
+  for (let attempt = 0; attempt < HOURLY_GENERATION_ATTEMPTS; attempt += 1) {
+    if (attempt > 0) {
+      await sleep(HOURLY_GENERATION_DELAY_MS)
+    }
+    const published = await readPublishedGeneration()
+    payload = (await readColumnarPayload()) ?? (await parseJsonFile<HourlyHeatIndexPayload>(HOURLY_PATH))
+    if (payload.generation == null || payload.generation === published) {
+      hourlyCache = { key, payload }
+      return payload
+    }
+  }
+  // A publish that never completed: keep serving the last consistent payload, if any.
+  return hourlyCache?.payload ?? (payload as HourlyHeatIndexPayload)
+}
+
 const parseCsv = (contents: string): { headers: string[]; rows: string[][] } => {
   const lines = contents.trim().split(/\r?\n/)
   const headerLine = lines.shift()
@@ -272,7 +437,7 @@ const countHighRiskHours = (hourly: HeatIndexPoint[]): number => {
 }
 
 export const buildInsightSnapshot = async (city: string, days = 7): Promise<InsightSnapshot> => {
-  const hourlyPayload = await parseJsonFile<HourlyHeatIndexPayload>(HOURLY_PATH)
+  const hourlyPayload = await loadHourlyPayload()
   const cityEntry = findHourlyEntry(hourlyPayload, city)
   const weatherHistory = await loadWeatherHistory(city, days)
   const forecastPoints = await loadForecastSeries(city, days)